@@ -21,12 +21,16 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = "django-insecure-_t8!m%i65t2-)1mk#_e0wv(-m+ovt02u8on8ijdu+!xxi=qftd"
+SECRET_KEY = os.environ.get(
+    'DJANGO_SECRET_KEY', "django-insecure-_t8!m%i65t2-)1mk#_e0wv(-m+ovt02u8on8ijdu+!xxi=qftd"
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# Debug mode also keeps every SQL query of a request in memory and renders the browsable API.
+DEBUG = os.environ.get('DJANGO_DEBUG', 'true').lower() == 'true'
 
-ALLOWED_HOSTS = []
+# Comma separated host names the API is served under, required when DEBUG is off
+ALLOWED_HOSTS = [host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host]
 
 
 # Application definition
@@ -38,12 +42,113 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "geo",
 ]
 
 GOOGLE_MAPS_API_KEY = os.environ.get('GOOGLE_MAPS_API_KEY','')
+# Seconds to wait for a connection to, and a response from, Google
+GOOGLE_MAPS_CONNECT_TIMEOUT = float(os.environ.get('GOOGLE_MAPS_CONNECT_TIMEOUT', 2))
+GOOGLE_MAPS_READ_TIMEOUT = float(os.environ.get('GOOGLE_MAPS_READ_TIMEOUT', 5))
+# Seconds a geocode call may spend retrying Google server errors, with jittered backoff
+GOOGLE_MAPS_RETRY_TIMEOUT = float(os.environ.get('GOOGLE_MAPS_RETRY_TIMEOUT', 10))
+GOOGLE_MAPS_RETRY_OVER_QUERY_LIMIT = os.environ.get('GOOGLE_MAPS_RETRY_OVER_QUERY_LIMIT', 'false').lower() == 'true'
+# Size of the keep-alive connection pool used by the geocoding client
+GOOGLE_MAPS_POOL_SIZE = int(os.environ.get('GOOGLE_MAPS_POOL_SIZE', 10))
+# Size of the keep-alive connection pool used by the async geocoding client
+GOOGLE_MAPS_ASYNC_MAX_CONNECTIONS = int(os.environ.get('GOOGLE_MAPS_ASYNC_MAX_CONNECTIONS', 100))
+
+# Per-worker in-memory geocode cache, checked before the GeocodeCache table
+GEOCODE_LOCAL_CACHE_SIZE = int(os.environ.get('GEOCODE_LOCAL_CACHE_SIZE', 1024))
+GEOCODE_LOCAL_CACHE_TTL = int(os.environ.get('GEOCODE_LOCAL_CACHE_TTL', 300))
+
+# Threads used to geocode the origin and destination of a request concurrently, one per request thread by default.
+# Each keeps a database connection open, like the request threads.
+GEOCODE_THREAD_POOL_SIZE = int(os.environ.get('GEOCODE_THREAD_POOL_SIZE', 4))
+# Threads used to geocode the addresses of batch and matrix requests, apart from those of interactive requests
+GEOCODE_BATCH_THREAD_POOL_SIZE = int(os.environ.get('GEOCODE_BATCH_THREAD_POOL_SIZE', 4))
+
+# Maximum number of address pairs accepted by the batch distance API
+DISTANCE_BATCH_MAX_PAIRS = int(os.environ.get('DISTANCE_BATCH_MAX_PAIRS', 1000))
+
+# Maximum number of origins, and of destinations, accepted by the distance matrix API
+DISTANCE_MATRIX_MAX_ADDRESSES = int(os.environ.get('DISTANCE_MATRIX_MAX_ADDRESSES', 1000))
+
+# Maximum number of cached places returned by the nearby API, and number of geohash cells a query may scan
+NEARBY_MAX_RESULTS = int(os.environ.get('NEARBY_MAX_RESULTS', 100))
+NEARBY_MAX_CELLS = int(os.environ.get('NEARBY_MAX_CELLS', 16))
+
+# Size in degrees of the grid cells that reverse geocoded locations are snapped to and cached by,
+# and meters within which a cached place answers a reverse geocoding lookup
+REVERSE_GEOCODE_GRID_SIZE = float(os.environ.get('REVERSE_GEOCODE_GRID_SIZE', 0.0001))
+REVERSE_GEOCODE_TOLERANCE_M = float(os.environ.get('REVERSE_GEOCODE_TOLERANCE_M', 25))
+
+# Serialize concurrent geocoding of the same address across processes with a session-level Postgres advisory
+# lock. Off by default behind pgbouncer in transaction pooling mode, which shares sessions between clients
+GEOCODE_ADVISORY_LOCK = os.environ.get(
+    'GEOCODE_ADVISORY_LOCK', 'false' if os.environ.get('PG_PGBOUNCER', 'false').lower() == 'true' else 'true'
+).lower() == 'true'
+
+# Cache shared by all workers, checked between the in-memory cache and the GeocodeCache table.
+# Set to the alias of an entry in CACHES to enable it.
+GEOCODE_SHARED_CACHE_ALIAS = os.environ.get('GEOCODE_SHARED_CACHE_ALIAS', 'geocode' if os.environ.get('REDIS_URL') else None)
+GEOCODE_SHARED_CACHE_TTL = int(os.environ.get('GEOCODE_SHARED_CACHE_TTL', 86400))
+# Bump to invalidate every shared cache entry, e.g. when the cached value format changes
+GEOCODE_SHARED_CACHE_VERSION = int(os.environ.get('GEOCODE_SHARED_CACHE_VERSION', 1))
+
+# Rate limit for Google calls: calls per second (0 disables) and the burst allowed at once.
+# Enforced across all workers when a shared cache is configured, per worker otherwise.
+GOOGLE_MAPS_QPS = float(os.environ.get('GOOGLE_MAPS_QPS', 50))
+GOOGLE_MAPS_BURST = int(os.environ.get('GOOGLE_MAPS_BURST', 50))
+# Calls allowed per UTC day (0 disables the quota)
+GOOGLE_MAPS_DAILY_QUOTA = int(os.environ.get('GOOGLE_MAPS_DAILY_QUOTA', 0))
+# Seconds a call may queue for the rate limit before it is shed with a 503
+GOOGLE_MAPS_MAX_QUEUE_WAIT = float(os.environ.get('GOOGLE_MAPS_MAX_QUEUE_WAIT', 1))
+GOOGLE_MAPS_RATE_LIMIT_CACHE_ALIAS = os.environ.get('GOOGLE_MAPS_RATE_LIMIT_CACHE_ALIAS', GEOCODE_SHARED_CACHE_ALIAS)
+
+# Circuit breaker around Google: opens when the share of failed, or slow, calls among the last
+# GOOGLE_MAPS_CIRCUIT_WINDOW calls reaches its rate, then fails calls fast for GOOGLE_MAPS_CIRCUIT_OPEN_DURATION seconds
+GOOGLE_MAPS_CIRCUIT_WINDOW = int(os.environ.get('GOOGLE_MAPS_CIRCUIT_WINDOW', 20))
+GOOGLE_MAPS_CIRCUIT_MIN_CALLS = int(os.environ.get('GOOGLE_MAPS_CIRCUIT_MIN_CALLS', 10))
+GOOGLE_MAPS_CIRCUIT_FAILURE_RATE = float(os.environ.get('GOOGLE_MAPS_CIRCUIT_FAILURE_RATE', 0.5))
+GOOGLE_MAPS_CIRCUIT_SLOW_CALL_DURATION = float(os.environ.get('GOOGLE_MAPS_CIRCUIT_SLOW_CALL_DURATION', 2))
+GOOGLE_MAPS_CIRCUIT_SLOW_CALL_RATE = float(os.environ.get('GOOGLE_MAPS_CIRCUIT_SLOW_CALL_RATE', 0.8))
+GOOGLE_MAPS_CIRCUIT_OPEN_DURATION = float(os.environ.get('GOOGLE_MAPS_CIRCUIT_OPEN_DURATION', 30))
+
+# Seconds after which a new GeocodeCache entry expires, and is geocoded again (0 keeps entries fresh forever).
+# Each entry stores its own expiry in expires_at.
+GEOCODE_CACHE_TTL = int(os.environ.get('GEOCODE_CACHE_TTL', 0))
+# Serve stale entries right away and refresh them in the background. When disabled, stale entries
+# are refreshed before responding, and only served if Google is unavailable.
+GEOCODE_STALE_WHILE_REVALIDATE = os.environ.get('GEOCODE_STALE_WHILE_REVALIDATE', 'true').lower() == 'true'
+# Read-only snapshot file (see export_geocode_snapshot) memory-mapped by every worker and checked before
+# the shared cache and the GeocodeCache table. Publishing a new file over it is picked up within the check interval.
+GEOCODE_SNAPSHOT_PATH = os.environ.get('GEOCODE_SNAPSHOT_PATH')
+GEOCODE_SNAPSHOT_CHECK_INTERVAL = float(os.environ.get('GEOCODE_SNAPSHOT_CHECK_INTERVAL', 5))
+# Seconds between writes of the hits counted in memory to GeocodeCache.hit_count
+GEOCODE_HIT_FLUSH_INTERVAL = float(os.environ.get('GEOCODE_HIT_FLUSH_INTERVAL', 60))
+# Write new GeocodeCache entries from a background thread, in batched upserts, instead of before responding.
+# Batches are written once GEOCODE_WRITE_BEHIND_BATCH_SIZE entries, or GEOCODE_WRITE_BEHIND_INTERVAL seconds, are
+# pending; beyond GEOCODE_WRITE_BEHIND_MAX_SIZE pending entries, entries are written before responding again.
+GEOCODE_WRITE_BEHIND = os.environ.get('GEOCODE_WRITE_BEHIND', 'false').lower() == 'true'
+GEOCODE_WRITE_BEHIND_BATCH_SIZE = int(os.environ.get('GEOCODE_WRITE_BEHIND_BATCH_SIZE', 500))
+GEOCODE_WRITE_BEHIND_INTERVAL = float(os.environ.get('GEOCODE_WRITE_BEHIND_INTERVAL', 1))
+GEOCODE_WRITE_BEHIND_MAX_SIZE = int(os.environ.get('GEOCODE_WRITE_BEHIND_MAX_SIZE', 10000))
+# Serve a cache miss from the cached address most similar to it, by trigram similarity, when it is at least
+# GEOCODE_FUZZY_THRESHOLD similar and the GEOCODE_FUZZY_CANDIDATES most similar addresses agree on the place.
+# Postgres searches a pg_trgm index; other databases an in-memory index, reloaded every GEOCODE_FUZZY_INDEX_REFRESH seconds.
+GEOCODE_FUZZY_MATCH = os.environ.get('GEOCODE_FUZZY_MATCH', 'false').lower() == 'true'
+GEOCODE_FUZZY_THRESHOLD = float(os.environ.get('GEOCODE_FUZZY_THRESHOLD', 0.6))
+GEOCODE_FUZZY_CANDIDATES = int(os.environ.get('GEOCODE_FUZZY_CANDIDATES', 5))
+GEOCODE_FUZZY_INDEX_REFRESH = float(os.environ.get('GEOCODE_FUZZY_INDEX_REFRESH', 300))
+# Time the stages of every request (validation, cache read, Google call, cache write, distance calculation)
+# and report them in a Server-Timing response header and the logs. Disabled, the timing middleware is not installed.
+SERVER_TIMING = os.environ.get('SERVER_TIMING', 'false').lower() == 'true'
+
 MIDDLEWARE = [
+    # First, so that its total covers the other middleware
+    "geo.middleware.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -85,10 +190,44 @@ DATABASES = {
         'NAME': os.environ.get('PG_DB','postgres'),
         'PORT': os.environ.get('PG_PORT','5432'),
         'HOST': os.environ.get('PG_HOST','localhost'),
+        # Seconds a connection is kept open for the following requests of the same worker thread (0 closes it
+        # after every request), and whether a kept connection is checked before it is reused
+        'CONN_MAX_AGE': int(os.environ.get('PG_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.environ.get('PG_CONN_HEALTH_CHECKS', 'true').lower() == 'true',
+        # Set PG_PGBOUNCER when connecting through pgbouncer in transaction pooling mode, where a cursor
+        # cannot outlive its transaction
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('PG_PGBOUNCER', 'false').lower() == 'true',
     }
 }
 
 
+# REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    # The browsable API is only rendered in debug mode
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'] + (
+        ['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []
+    ),
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+if os.environ.get('REDIS_URL'):
+    CACHES['geocode'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL'),
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -1,4 +1,10 @@
 INVALID_FROM_ADDRESS = "Invalid from address"
 INVALID_DESTINATION_ADDRESS = "Invalid destination address"
+INVALID_ORIGIN = "Invalid origin"
+INVALID_DESTINATION = "Invalid destination"
+INVALID_NEARBY_ORIGIN = "Either an address, or lat and long, are required"
+INVALID_NEARBY_QUERY = "Either radius_km or k is required"
 
 GEOCODE_ERROR = "Could not geocode"
+REVERSE_GEOCODE_ERROR = "Could not reverse geocode"
+GEOCODE_UNAVAILABLE = "Geocoding service unavailable"
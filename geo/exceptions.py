@@ -0,0 +1,13 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from geo.constants import GEOCODE_UNAVAILABLE
+
+
+class GeocodeServiceUnavailable(APIException):
+    """
+    Raised when an address cannot be geocoded because Google is unavailable.
+    """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = GEOCODE_UNAVAILABLE
+    default_code = "geocode_unavailable"
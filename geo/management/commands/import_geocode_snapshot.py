@@ -0,0 +1,140 @@
+import io
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from geo.models import GeocodeCache, Place
+from geo.services.geohash import encode as encode_geohash
+from geo.services.snapshot import SnapshotReader
+
+
+class Command(BaseCommand):
+    """
+    Loads a snapshot written by export_geocode_snapshot into GeocodeCache and Place. Addresses
+    and places that are already cached are kept as they are.
+
+    On Postgres each batch is streamed with COPY into a temporary table and inserted
+    from there with ON CONFLICT DO NOTHING; other databases use bulk_create, ignoring conflicts.
+
+        python manage.py import_geocode_snapshot geocode.snap
+    """
+
+    help = "Imports a binary snapshot file into GeocodeCache."
+
+    COLUMNS = (
+        "input_address", "normalized_address", "place_key", "formatted_address", "latitude", "longitude", "geohash"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Snapshot file to import.")
+        parser.add_argument("--batch-size", type=int, default=50000,
+                            help="Number of entries loaded per batch.")
+
+    def handle(self, *args, **options):
+        try:
+            snapshot = SnapshotReader(options["path"])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        started_at = time.monotonic()
+        load = self.copy_batch if connection.vendor == "postgresql" else self.bulk_create_batch
+        entries = iter(snapshot)
+        imported = processed = 0
+
+        try:
+            while True:
+                batch = list(islice(entries, options["batch_size"]))
+                if not batch:
+                    break
+
+                imported += load(batch)
+                processed += len(batch)
+                self.stdout.write(f"Processed {processed} of {len(snapshot)} entries, {imported} imported")
+        finally:
+            snapshot.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} entries from {options['path']} in {time.monotonic() - started_at:.1f}s"
+        ))
+
+    def bulk_create_batch(self, batch):
+        """
+        Inserts the entries of a batch that are not cached yet with bulk_create.
+
+        Returns:
+            int: The number of entries inserted.
+        """
+        cached = set(
+            GeocodeCache.objects.filter(normalized_address__in=[entry[0] for entry in batch])
+            .values_list("normalized_address", flat=True)
+        )
+        expires_at = GeocodeCache.default_expires_at()
+        entries = [
+            {
+                "input_address": input_address,
+                "normalized_address": normalized_address,
+                "formatted_address": formatted_address,
+                "latitude": latitude,
+                "longitude": longitude,
+                "expires_at": expires_at,
+            }
+            for normalized_address, input_address, formatted_address, latitude, longitude in batch
+            if normalized_address not in cached
+        ]
+        # Entries cached by a concurrent writer since the lookup are skipped
+        GeocodeCache.upsert(entries, overwrite=False)
+        return len(entries)
+
+    def copy_batch(self, batch):
+        """
+        Streams a batch into a temporary table with COPY, then inserts the places and the
+        entries that are not cached yet, joining the entries to their places by key. Snapshots
+        hold no Google place IDs, so the places are keyed by formatted address.
+
+        Returns:
+            int: The number of entries inserted.
+        """
+        buffer = io.StringIO()
+        for normalized_address, input_address, formatted_address, latitude, longitude in batch:
+            buffer.write("\t".join((
+                self.copy_text(input_address), self.copy_text(normalized_address),
+                self.copy_text(Place.key_of({"formatted_address": formatted_address})), self.copy_text(formatted_address),
+                repr(latitude), repr(longitude), encode_geohash(latitude, longitude),
+            )))
+            buffer.write("\n")
+        buffer.seek(0)
+
+        table = GeocodeCache._meta.db_table
+        place_table = Place._meta.db_table
+        columns = ", ".join(self.COLUMNS)
+        place_key_length = Place._meta.get_field("place_key").max_length
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMPORARY TABLE geocode_snapshot_import ("
+                f"input_address varchar(255), normalized_address varchar(255), place_key varchar({place_key_length}), "
+                "formatted_address varchar(255), "
+                "latitude double precision, longitude double precision, geohash varchar(12)"
+                ") ON COMMIT DROP"
+            )
+            cursor.copy_expert(f"COPY geocode_snapshot_import ({columns}) FROM STDIN", buffer)
+            cursor.execute(
+                f"INSERT INTO {place_table} (place_key, formatted_address, latitude, longitude, geohash, google_place_id) "
+                f"SELECT DISTINCT ON (place_key) place_key, formatted_address, latitude, longitude, geohash, '' "
+                f"FROM geocode_snapshot_import ON CONFLICT (place_key) DO NOTHING"
+            )
+            cursor.execute(
+                f"INSERT INTO {table} (input_address, normalized_address, place_id, created_at, expires_at, hit_count) "
+                f"SELECT i.input_address, i.normalized_address, p.id, %s, %s, 0 FROM geocode_snapshot_import i "
+                f"JOIN {place_table} p ON p.place_key = i.place_key "
+                f"ON CONFLICT (normalized_address) DO NOTHING",
+                [timezone.now(), GeocodeCache.default_expires_at()],
+            )
+            return cursor.rowcount
+
+    @staticmethod
+    def copy_text(value):
+        # Escapes a value for COPY's text format
+        return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
@@ -0,0 +1,161 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import exceptions
+
+from geo.models import GeocodeCache, Place
+from geo.serializers import (DistanceSerializer, geocode_executor,
+                             shared_geocode_cache)
+
+
+class Command(BaseCommand):
+    """
+    Refreshes hot GeocodeCache entries before they expire, and purges expired entries
+    that are not hot, along with the places no entry resolves to any more. An entry is hot
+    when it was served at least --hot-hits times since it was last refreshed, and at least
+    once within --hot-window seconds.
+
+    Meant to be run periodically, e.g. from cron:
+        python manage.py refresh_geocode_cache
+    """
+
+    help = "Refreshes hot GeocodeCache entries before they expire and purges cold expired entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Number of entries refreshed or deleted per batch.")
+        parser.add_argument("--refresh-ahead", type=int, default=3600,
+                            help="Refresh hot entries expiring within this many seconds.")
+        parser.add_argument("--hot-hits", type=int, default=1,
+                            help="Number of hits since the last refresh that make an entry hot.")
+        parser.add_argument("--hot-window", type=int, default=7 * 24 * 60 * 60,
+                            help="Number of seconds within which a hot entry was last served.")
+        parser.add_argument("--pause", type=float, default=0.1,
+                            help="Seconds to pause between purge batches.")
+        parser.add_argument("--no-refresh", action="store_true", help="Only purge cold entries.")
+        parser.add_argument("--no-purge", action="store_true", help="Only refresh hot entries.")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        hot = Q(hit_count__gte=options["hot_hits"], last_hit_at__gte=now - timedelta(seconds=options["hot_window"]))
+
+        if not options["no_refresh"]:
+            refreshed, failed = self.refresh(
+                GeocodeCache.objects.filter(hot, expires_at__lte=now + timedelta(seconds=options["refresh_ahead"])),
+                options["batch_size"],
+            )
+            self.stdout.write(f"Refreshed {refreshed} hot entries, {failed} failed")
+
+        if not options["no_purge"]:
+            purged = self.purge(
+                GeocodeCache.objects.filter(~hot, expires_at__lte=now),
+                options["batch_size"],
+                options["pause"],
+            )
+            self.stdout.write(f"Purged {purged} cold entries")
+
+            purged = self.purge_places(options["batch_size"], options["pause"])
+            self.stdout.write(f"Purged {purged} orphaned places")
+
+        self.stdout.write(self.style.SUCCESS("Done"))
+
+    def refresh(self, queryset, batch_size):
+        """
+        Geocodes the entries of the queryset again, a batch at a time, on geocode_executor.
+
+        Args:
+            queryset (QuerySet): The entries to refresh.
+            batch_size (int): The number of entries per batch.
+
+        Returns:
+            tuple: The number of entries refreshed and the number that failed.
+        """
+        serializer = DistanceSerializer()
+        refreshed = failed = 0
+
+        def refresh_entry(geocoded_address):
+            try:
+                serializer.refresh_cached_address(
+                    geocoded_address.input_address, geocoded_address.normalized_address, geocoded_address
+                )
+                return True
+            except exceptions.APIException as e:
+                self.stderr.write(f"Could not refresh {geocoded_address.input_address}: {e.detail}")
+                return False
+            finally:
+                close_old_connections()
+
+        last_id = 0
+        while True:
+            batch = list(queryset.filter(id__gt=last_id).order_by("id")[:batch_size])
+            if not batch:
+                break
+
+            for succeeded in geocode_executor.map(refresh_entry, batch):
+                if succeeded:
+                    refreshed += 1
+                else:
+                    failed += 1
+            last_id = batch[-1].id
+            self.stdout.write(f"Refreshed {refreshed} entries so far")
+
+        return refreshed, failed
+
+    def purge(self, queryset, batch_size, pause):
+        """
+        Deletes the entries of the queryset a batch at a time, so that no delete holds
+        locks on many rows for long, and drops them from the shared cache.
+
+        Args:
+            queryset (QuerySet): The entries to delete.
+            batch_size (int): The number of entries per batch.
+            pause (float): The number of seconds to pause between batches.
+
+        Returns:
+            int: The number of entries deleted.
+        """
+        purged = 0
+        while True:
+            batch = list(queryset.values_list("id", "normalized_address")[:batch_size])
+            if not batch:
+                break
+
+            ids, normalized_addresses = zip(*batch)
+            deleted, _ = GeocodeCache.objects.filter(id__in=ids).delete()
+            for normalized_address in normalized_addresses:
+                shared_geocode_cache.delete(normalized_address)
+
+            purged += deleted
+            self.stdout.write(f"Purged {purged} entries so far")
+            if pause:
+                time.sleep(pause)
+
+        return purged
+
+    def purge_places(self, batch_size, pause):
+        """
+        Deletes the places without any entry, a batch at a time.
+
+        Args:
+            batch_size (int): The number of places per batch.
+            pause (float): The number of seconds to pause between batches.
+
+        Returns:
+            int: The number of places deleted.
+        """
+        purged = 0
+        while True:
+            ids = list(Place.objects.filter(aliases__isnull=True).values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+
+            deleted, _ = Place.objects.filter(id__in=ids, aliases__isnull=True).delete()
+            purged += deleted
+            if pause:
+                time.sleep(pause)
+
+        return purged
@@ -0,0 +1,179 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.utils import Error
+from rest_framework import exceptions
+
+from api import settings
+from geo.exceptions import GeocodeServiceUnavailable
+from geo.models import GeocodeCache
+from geo.serializers import DistanceSerializer
+from geo.services.utils import normalize_address
+
+
+class Command(BaseCommand):
+    """
+    Fills GeocodeCache from a CSV or JSONL file of addresses, ahead of the traffic that will request them.
+
+    The file is streamed a chunk at a time. Addresses already cached are skipped with one
+    IN query per chunk, the rest are geocoded by a bounded pool of threads, which go through
+    the Google rate limiter, and are written with a single upsert. After every chunk the number
+    of records done is saved to a checkpoint file, so an interrupted run resumes where it stopped.
+
+        python manage.py warm_geocode_cache addresses.csv --column address
+    """
+
+    help = "Geocodes the addresses of a CSV or JSONL file into GeocodeCache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file with a header row, or JSONL file of strings or objects.")
+        parser.add_argument("--format", choices=["csv", "jsonl"],
+                            help="File format. Defaults to the file extension.")
+        parser.add_argument("--column", default="address",
+                            help="CSV column, or JSONL object key, holding the address.")
+        parser.add_argument("--chunk-size", type=int, default=1000,
+                            help="Number of records deduplicated, geocoded and written together.")
+        parser.add_argument("--workers", type=int, default=settings.GEOCODE_THREAD_POOL_SIZE,
+                            help="Number of addresses geocoded concurrently.")
+        parser.add_argument("--retries", type=int, default=3,
+                            help="Number of times an address is retried while Google is unavailable or rate limited.")
+        parser.add_argument("--checkpoint",
+                            help="Checkpoint file. Defaults to the input path with a .checkpoint suffix.")
+        parser.add_argument("--restart", action="store_true",
+                            help="Ignore the checkpoint and start from the first record.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or os.path.splitext(path)[1].lstrip(".").lower()
+        if file_format not in ("csv", "jsonl"):
+            raise CommandError(f"Cannot tell the format of {path}, use --format")
+
+        checkpoint_path = options["checkpoint"] or f"{path}.checkpoint"
+        done = 0 if options["restart"] else self.read_checkpoint(checkpoint_path)
+        if done:
+            self.stdout.write(f"Resuming after {done} records")
+
+        self.serializer = DistanceSerializer()
+        self.retries = options["retries"]
+        totals = {"cached": 0, "geocoded": 0, "failed": 0}
+        started_at = time.monotonic()
+        processed = 0
+
+        with open(path, newline="", encoding="utf-8") as file, \
+                ThreadPoolExecutor(max_workers=options["workers"], thread_name_prefix="warm") as pool:
+            records = islice(self.read_addresses(file, file_format, options["column"]), done, None)
+
+            while True:
+                chunk = list(islice(records, options["chunk_size"]))
+                if not chunk:
+                    break
+
+                for key, count in self.warm_chunk(chunk, pool).items():
+                    totals[key] += count
+
+                processed += len(chunk)
+                self.write_checkpoint(checkpoint_path, done + processed)
+
+                elapsed = time.monotonic() - started_at
+                self.stdout.write(
+                    f"Processed {done + processed} records: {totals['cached']} already cached, "
+                    f"{totals['geocoded']} geocoded, {totals['failed']} failed "
+                    f"({processed / elapsed:.1f} records/s, {totals['geocoded'] / elapsed:.1f} geocodes/s)"
+                )
+
+        self.stdout.write(self.style.SUCCESS(f"Done, {done + processed} records processed"))
+
+    @staticmethod
+    def read_addresses(file, file_format, column):
+        """
+        Yields the address of every record of the file, without reading it all into memory.
+        Records without an address are yielded as None, so that they still count towards the checkpoint.
+        """
+        if file_format == "csv":
+            for row in csv.DictReader(file):
+                yield row.get(column)
+        else:
+            for line in file:
+                line = line.strip()
+                record = json.loads(line) if line else None
+                yield record.get(column) if isinstance(record, dict) else record
+
+    @staticmethod
+    def read_checkpoint(checkpoint_path):
+        try:
+            with open(checkpoint_path, encoding="utf-8") as checkpoint:
+                return int(checkpoint.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def write_checkpoint(checkpoint_path, done):
+        # Written to a temporary file first, so an interruption never leaves a partial checkpoint
+        temporary_path = f"{checkpoint_path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as checkpoint:
+            checkpoint.write(str(done))
+        os.replace(temporary_path, checkpoint_path)
+
+    def warm_chunk(self, chunk, pool):
+        """
+        Geocodes the addresses of a chunk that are not cached yet, and caches them.
+
+        Args:
+            chunk (list): The addresses of the chunk.
+            pool (ThreadPoolExecutor): The pool geocoding the addresses.
+
+        Returns:
+            dict: The number of unique addresses already cached, geocoded and failed.
+        """
+        addresses = {}
+        for address in chunk:
+            if isinstance(address, str) and address.strip():
+                addresses.setdefault(normalize_address(address), address)
+
+        cached = set(
+            GeocodeCache.objects.filter(normalized_address__in=list(addresses))
+            .values_list("normalized_address", flat=True)
+        )
+        misses = [(normalized_address, address) for normalized_address, address in addresses.items()
+                  if normalized_address not in cached]
+
+        entries = [geocoded_data for geocoded_data in pool.map(self.geocode, misses) if geocoded_data is not None]
+        try:
+            GeocodeCache.upsert(entries)
+        except Error as e:
+            raise CommandError(f"Error caching geocoded addresses: {e}")
+
+        return {"cached": len(cached), "geocoded": len(entries), "failed": len(misses) - len(entries)}
+
+    def geocode(self, miss):
+        """
+        Geocodes an address, waiting and retrying while Google is unavailable or rate limited.
+
+        Args:
+            miss (tuple): The normalized address and the address.
+
+        Returns:
+            dict: The GeocodeCache and Place fields of the address, or None if it could not be geocoded.
+        """
+        normalized_address, address = miss
+        for attempt in range(self.retries + 1):
+            try:
+                geocode_response = self.serializer.request_geocode(address)
+                break
+            except GeocodeServiceUnavailable as e:
+                if attempt == self.retries:
+                    self.stderr.write(f"Could not geocode {address}: {e.detail}")
+                    return None
+                time.sleep(2 ** attempt)
+            except exceptions.APIException as e:
+                self.stderr.write(f"Could not geocode {address}: {e.detail}")
+                return None
+
+        geocoded_data = self.serializer.to_geocoded_data(address, normalized_address, geocode_response)
+        geocoded_data["expires_at"] = GeocodeCache.default_expires_at()
+        return geocoded_data
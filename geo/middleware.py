@@ -0,0 +1,90 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from geo.services.timing import start_timer, stop_timer
+
+logger = logging.getLogger(__name__)
+
+
+class ServerTimingMiddleware:
+    """
+    Times the stages of every request, e.g. validation, the cache read, the Google call, the cache
+    write and the distance calculation, and reports them in a Server-Timing response header and
+    a log record with the timings as structured fields. Only installed if SERVER_TIMING is enabled.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """
+        Creates a new ServerTimingMiddleware.
+
+        Args:
+            get_response (callable): The next middleware or the view.
+
+        Raises:
+            MiddlewareNotUsed: If SERVER_TIMING is disabled, so that Django leaves the middleware out.
+        """
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        started = time.perf_counter()
+        timer, token = start_timer()
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_timer(token)
+        return self.report(request, response, timer, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        timer, token = start_timer()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_timer(token)
+        return self.report(request, response, timer, started)
+
+    def report(self, request, response, timer, started):
+        """
+        Adds the timings of a request to its response and logs them.
+
+        Args:
+            request (HttpRequest): The request.
+            response (HttpResponse): The response.
+            timer (StageTimer): The timer of the request.
+            started (float): When the request was started, from time.perf_counter().
+
+        Returns:
+            HttpResponse: The response, with a Server-Timing header.
+        """
+        timer.record("total", time.perf_counter() - started)
+
+        server_timing = timer.server_timing()
+        if response.has_header("Server-Timing"):
+            server_timing = f"{response['Server-Timing']}, {server_timing}"
+        response["Server-Timing"] = server_timing
+
+        logger.info(
+            "%s %s %s timings: %s", request.method, request.path, response.status_code, server_timing,
+            extra={
+                "method": request.method,
+                "path": request.path,
+                "status_code": response.status_code,
+                "timings": timer.timings(),
+            },
+        )
+        return response
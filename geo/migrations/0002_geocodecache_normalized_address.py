@@ -0,0 +1,49 @@
+from django.db import migrations, models
+
+from geo.services.utils import normalize_address
+
+BATCH_SIZE = 1000
+
+
+def backfill_normalized_address(apps, schema_editor):
+    GeocodeCache = apps.get_model("geo", "GeocodeCache")
+
+    last_id = 0
+    while True:
+        batch = list(
+            GeocodeCache.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "input_address")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+
+        for entry in batch:
+            entry.normalized_address = normalize_address(entry.input_address)
+        GeocodeCache.objects.bulk_update(batch, ["normalized_address"])
+
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geo', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='geocodecache',
+            name='normalized_address',
+            field=models.CharField(default='', max_length=255),
+        ),
+        migrations.RunPython(backfill_normalized_address, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='geocodecache',
+            name='input_address_hash_idx',
+        ),
+        migrations.AddIndex(
+            model_name='geocodecache',
+            index=models.Index(fields=['normalized_address'], name='normalized_address_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def backfill_expires_at(apps, schema_editor):
+    # Entries geocoded so far expire GEOCODE_CACHE_TTL after they were created
+    if not settings.GEOCODE_CACHE_TTL:
+        return
+
+    GeocodeCache = apps.get_model("geo", "GeocodeCache")
+    ttl = timedelta(seconds=settings.GEOCODE_CACHE_TTL)
+
+    last_id = 0
+    while True:
+        batch = list(
+            GeocodeCache.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "created_at")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+
+        for entry in batch:
+            entry.expires_at = entry.created_at + ttl
+        GeocodeCache.objects.bulk_update(batch, ["expires_at"])
+
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geo', '0002_geocodecache_normalized_address'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='geocodecache',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='geocodecache',
+            name='hit_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='geocodecache',
+            name='last_hit_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_expires_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='geocodecache',
+            index=models.Index(fields=['expires_at'], name='expires_at_idx'),
+        ),
+    ]
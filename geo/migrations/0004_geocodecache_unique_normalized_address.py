@@ -0,0 +1,44 @@
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+BATCH_SIZE = 1000
+
+
+def dedupe_normalized_address(apps, schema_editor):
+    # Keep the most recently geocoded entry of every normalized address
+    GeocodeCache = apps.get_model("geo", "GeocodeCache")
+    duplicates = (
+        GeocodeCache.objects.values("normalized_address")
+        .annotate(entries=Count("id"), keep_id=Max("id"))
+        .filter(entries__gt=1)
+        .order_by()
+    )
+
+    while True:
+        batch = list(duplicates[:BATCH_SIZE])
+        if not batch:
+            break
+
+        GeocodeCache.objects.filter(
+            normalized_address__in=[duplicate["normalized_address"] for duplicate in batch]
+        ).exclude(id__in=[duplicate["keep_id"] for duplicate in batch]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geo', '0003_geocodecache_expires_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_normalized_address, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='geocodecache',
+            constraint=models.UniqueConstraint(fields=('normalized_address',), name='unique_normalized_address'),
+        ),
+        # The unique constraint's index serves the lookups
+        migrations.RemoveIndex(
+            model_name='geocodecache',
+            name='normalized_address_idx',
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations, models
+
+from geo.services.geohash import encode
+
+BATCH_SIZE = 1000
+
+
+def backfill_geohash(apps, schema_editor):
+    GeocodeCache = apps.get_model("geo", "GeocodeCache")
+
+    last_id = 0
+    while True:
+        batch = list(
+            GeocodeCache.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "latitude", "longitude")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+
+        for entry in batch:
+            entry.geohash = encode(entry.latitude, entry.longitude)
+        GeocodeCache.objects.bulk_update(batch, ["geohash"])
+
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geo', '0004_geocodecache_unique_normalized_address'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='geocodecache',
+            name='geohash',
+            field=models.CharField(default='', max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+        # Indexed once backfilled, rather than maintaining the index through the backfill
+        migrations.AlterField(
+            model_name='geocodecache',
+            name='geohash',
+            field=models.CharField(db_index=True, default='', max_length=12),
+        ),
+    ]
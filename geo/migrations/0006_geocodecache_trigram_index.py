@@ -0,0 +1,31 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+INDEX_NAME = "normalized_address_trgm_idx"
+
+
+def create_trigram_index(apps, schema_editor):
+    # pg_trgm only exists on Postgres; other databases fall back to an in-memory index
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON geo_geocodecache USING gin (normalized_address gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geo', '0005_geocodecache_geohash'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,135 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+from geo.services.geohash import encode
+
+BATCH_SIZE = 1000
+
+
+def link_places(apps, schema_editor):
+    # Moves the place fields of every entry to a Place per formatted address, the most recent entry's coordinates winning
+    GeocodeCache = apps.get_model("geo", "GeocodeCache")
+    Place = apps.get_model("geo", "Place")
+
+    last_id = 0
+    while True:
+        batch = list(
+            GeocodeCache.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "formatted_address", "latitude", "longitude")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+
+        places = {
+            entry.formatted_address: Place(
+                formatted_address=entry.formatted_address,
+                latitude=entry.latitude,
+                longitude=entry.longitude,
+                geohash=encode(entry.latitude, entry.longitude),
+            )
+            for entry in batch
+        }
+        Place.objects.bulk_create(
+            list(places.values()),
+            update_conflicts=True,
+            unique_fields=["formatted_address"],
+            update_fields=["latitude", "longitude", "geohash"],
+        )
+        place_ids = dict(
+            Place.objects.filter(formatted_address__in=list(places)).values_list("formatted_address", "id")
+        )
+
+        for entry in batch:
+            entry.place_id = place_ids[entry.formatted_address]
+        GeocodeCache.objects.bulk_update(batch, ["place"])
+
+        last_id = batch[-1].id
+
+
+def unlink_places(apps, schema_editor):
+    GeocodeCache = apps.get_model("geo", "GeocodeCache")
+
+    last_id = 0
+    while True:
+        batch = list(GeocodeCache.objects.filter(id__gt=last_id).order_by("id").select_related("place")[:BATCH_SIZE])
+        if not batch:
+            break
+
+        for entry in batch:
+            entry.formatted_address = entry.place.formatted_address
+            entry.latitude = entry.place.latitude
+            entry.longitude = entry.place.longitude
+            entry.geohash = entry.place.geohash
+        GeocodeCache.objects.bulk_update(batch, ["formatted_address", "latitude", "longitude", "geohash"])
+
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geo', '0006_geocodecache_trigram_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Place',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('formatted_address', models.CharField(max_length=255, unique=True)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('geohash', models.CharField(db_index=True, default='', max_length=12)),
+                ('google_place_id', models.CharField(blank=True, default='', max_length=255)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='geocodecache',
+            name='place',
+            field=models.ForeignKey(
+                null=True, on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='geo.place'
+            ),
+        ),
+        # Nullable while they are moved, so that the migration can be reversed
+        migrations.AlterField(
+            model_name='geocodecache',
+            name='formatted_address',
+            field=models.CharField(max_length=255, null=True),
+        ),
+        migrations.AlterField(
+            model_name='geocodecache',
+            name='latitude',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='geocodecache',
+            name='longitude',
+            field=models.FloatField(null=True),
+        ),
+        migrations.RunPython(link_places, unlink_places),
+        # Required once every entry points at its place
+        migrations.AlterField(
+            model_name='geocodecache',
+            name='place',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='geo.place'
+            ),
+        ),
+        migrations.RemoveField(
+            model_name='geocodecache',
+            name='formatted_address',
+        ),
+        migrations.RemoveField(
+            model_name='geocodecache',
+            name='latitude',
+        ),
+        migrations.RemoveField(
+            model_name='geocodecache',
+            name='longitude',
+        ),
+        migrations.RemoveField(
+            model_name='geocodecache',
+            name='geohash',
+        ),
+    ]
@@ -0,0 +1,57 @@
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def key_places(apps, schema_editor):
+    # Keys every place by its Google place ID or, without one, its formatted address, merging the
+    # places that share a Google place ID into the first of them
+    GeocodeCache = apps.get_model("geo", "GeocodeCache")
+    Place = apps.get_model("geo", "Place")
+
+    keyed = {}
+    last_id = 0
+    while True:
+        batch = list(Place.objects.filter(id__gt=last_id).order_by("id")[:BATCH_SIZE])
+        if not batch:
+            break
+
+        places = []
+        for place in batch:
+            place_key = place.google_place_id or f"address:{place.formatted_address}"
+            if place_key in keyed:
+                GeocodeCache.objects.filter(place_id=place.id).update(place_id=keyed[place_key])
+                Place.objects.filter(id=place.id).delete()
+                continue
+            keyed[place_key] = place.id
+            place.place_key = place_key
+            places.append(place)
+        Place.objects.bulk_update(places, ["place_key"])
+
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geo', '0007_place'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='place_key',
+            field=models.CharField(max_length=263, null=True),
+        ),
+        migrations.RunPython(key_places, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='place',
+            name='place_key',
+            field=models.CharField(max_length=263, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='place',
+            name='formatted_address',
+            field=models.CharField(max_length=255),
+        ),
+    ]
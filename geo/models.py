@@ -1,31 +1,298 @@
-from django.db import models
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from geo.services.geohash import PRECISION as GEOHASH_PRECISION
+from geo.services.geohash import encode as encode_geohash
+from geo.services.utils import normalize_address
 
 # Create your models here.
+class Place(models.Model):
+    """
+    Model representing a place geocoded by Google, shared by every cached address that resolves to it.
+
+    Attributes:
+        place_key (str): The key identifying the place, see key_of().
+        formatted_address (str): The formatted address returned by geocoding.
+        latitude (float): The latitude coordinate of the place.
+        longitude (float): The longitude coordinate of the place.
+        geohash (str): The geohash of the coordinates, indexed for prefix scans of the cells around a location.
+        google_place_id (str): The Google place ID, if Google returned one.
+
+    Methods:
+        key_of(): Returns the key of the place of geocoded data.
+        save(): Fills in the key and the geohash before saving the place.
+        upsert(): Inserts the places of geocoded addresses, or updates the places with the same key.
+        __str__(): Returns a string representation of the place.
+    """
+
+    # The fields of geocoded data that belong to the place rather than to the cached address
+    FIELDS = ("formatted_address", "latitude", "longitude", "google_place_id")
+    # The fields overwritten when an upsert finds the key already stored
+    UPSERT_FIELDS = ("formatted_address", "latitude", "longitude", "geohash", "google_place_id")
+    # Prefix of the keys of places geocoded without a Google place ID, e.g. those migrated or imported from snapshots
+    ADDRESS_KEY_PREFIX = "address:"
+
+    # Long enough for the prefix and a formatted address of the full 255 characters
+    place_key = models.CharField(max_length=len(ADDRESS_KEY_PREFIX) + 255, unique=True)
+    formatted_address = models.CharField(max_length=255)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    geohash = models.CharField(max_length=GEOHASH_PRECISION, default="", db_index=True)
+    google_place_id = models.CharField(max_length=255, default="", blank=True)
+
+    @classmethod
+    def key_of(cls, geocoded_data):
+        """
+        Returns the key of the place of geocoded data: its Google place ID or, without one, its
+        formatted address. Formatted addresses are not unique, e.g. "Unnamed Road" reverse
+        geocoding results, so they only identify places Google gave no ID.
+
+        Args:
+            geocoded_data (dict): The fields of the geocoded address.
+
+        Returns:
+            str: The key.
+        """
+        return geocoded_data.get("google_place_id") or f"{cls.ADDRESS_KEY_PREFIX}{geocoded_data['formatted_address']}"
+
+    def save(self, *args, **kwargs):
+        if not self.place_key:
+            self.place_key = self.key_of({"google_place_id": self.google_place_id, "formatted_address": self.formatted_address})
+        self.geohash = encode_geohash(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def upsert(cls, geocoded_data, batch_size=None, overwrite=True):
+        """
+        Inserts the places of geocoded addresses with INSERT ... ON CONFLICT, one place per key.
+
+        Args:
+            geocoded_data (list): The fields of each geocoded address. Later addresses win for a key.
+            batch_size (int): The number of places written per statement. None writes them all at once.
+            overwrite (bool): Whether places already stored are updated, or kept as they are.
+
+        Returns:
+            dict: The ID of each place keyed by its key.
+        """
+        places = {}
+        for data in geocoded_data:
+            place = cls(place_key=cls.key_of(data), **{field: data[field] for field in cls.FIELDS if field in data})
+            place.geohash = encode_geohash(place.latitude, place.longitude)
+            places[place.place_key] = place
+
+        if overwrite:
+            options = {
+                "update_conflicts": True,
+                "unique_fields": ["place_key"],
+                "update_fields": list(cls.UPSERT_FIELDS),
+            }
+        else:
+            options = {"ignore_conflicts": True}
+        cls.objects.bulk_create(list(places.values()), batch_size=batch_size, **options)
+
+        # Conflicting rows do not get their IDs set by bulk_create, so every ID is read back
+        return dict(cls.objects.filter(place_key__in=list(places)).values_list("place_key", "id"))
+
+    def __str__(self):
+        return f"{self.formatted_address} -> {self.latitude}, {self.longitude}"
+
+
 class GeocodeCache(models.Model):
     """
-    Model representing a geocode cache entry.
+    Model representing a geocode cache entry: an alias from a normalized input address to its Place.
 
     Attributes:
         input_address (str): The input address used for geocoding.
-        formatted_address (str): The formatted address returned by geocoding.
-        latitude (float): The latitude coordinate of the geocoded address.
-        longitude (float): The longitude coordinate of the geocoded address.
+        normalized_address (str): The canonical cache key derived from the input address.
+        place (Place): The place the address resolves to.
         created_at (datetime): The timestamp when the cache entry was created.
+        expires_at (datetime): The timestamp after which the entry is stale, or None if it never expires.
+        hit_count (int): The number of times the entry was served since it was last refreshed.
+        last_hit_at (datetime): The timestamp when the entry was last served.
 
     Methods:
+        save(): Fills in the normalized address and the expiry before saving the entry.
+        upsert(): Inserts geocoded addresses and their places, or updates the cached entries of the same normalized addresses.
+        refresh(): Updates an entry and its place with newly geocoded data.
         __str__(): Returns a string representation of the geocode cache entry.
     """
 
+    # The fields overwritten when an upsert finds the normalized address already cached
+    UPSERT_FIELDS = ("input_address", "place", "created_at", "expires_at")
+
     input_address = models.CharField(max_length=255)
-    formatted_address = models.CharField(max_length=255)
-    latitude = models.FloatField()
-    longitude = models.FloatField()
+    normalized_address = models.CharField(max_length=255, default="")
+    place = models.ForeignKey(Place, on_delete=models.CASCADE, related_name="aliases")
     created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    hit_count = models.PositiveIntegerField(default=0)
+    last_hit_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['normalized_address'], name='unique_normalized_address'),
+        ]
         indexes = [
-            models.Index(fields=['input_address'], name='input_address_hash_idx'),
+            models.Index(fields=['expires_at'], name='expires_at_idx'),
         ]
 
+    @staticmethod
+    def default_expires_at():
+        """
+        Returns the expiry of an entry geocoded now, from GEOCODE_CACHE_TTL.
+
+        Returns:
+            datetime: The expiry, or None if entries never expire.
+        """
+        if not settings.GEOCODE_CACHE_TTL:
+            return None
+        return timezone.now() + timedelta(seconds=settings.GEOCODE_CACHE_TTL)
+
+    def fill_defaults(self):
+        if not self.normalized_address:
+            self.normalized_address = normalize_address(self.input_address)
+        if self.expires_at is None and self._state.adding:
+            self.expires_at = self.default_expires_at()
+
+    def save(self, *args, **kwargs):
+        self.fill_defaults()
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def upsert_options(cls):
+        return {
+            "update_conflicts": True,
+            "unique_fields": ["normalized_address"],
+            "update_fields": list(cls.UPSERT_FIELDS),
+        }
+
+    @classmethod
+    def upsert(cls, geocoded_data, batch_size=None, overwrite=True):
+        """
+        Inserts geocoded addresses with INSERT ... ON CONFLICT: their places first, through
+        Place.upsert, then the entries pointing at them. The cached entry of a normalized
+        address that is already cached is updated instead of adding a duplicate. Its hit count is kept.
+
+        Args:
+            geocoded_data (list): The fields of each geocoded address, those of its place included,
+                with unique normalized addresses.
+            batch_size (int): The number of rows written per statement. None writes them all at once.
+            overwrite (bool): Whether entries and places already stored are updated, or kept as they are.
+
+        Returns:
+            list: The entries.
+        """
+        with transaction.atomic():
+            place_ids = Place.upsert(geocoded_data, batch_size, overwrite)
+
+            entries = []
+            for data in geocoded_data:
+                entry = cls(
+                    place_id=place_ids[Place.key_of(data)],
+                    **{field: value for field, value in data.items() if field not in Place.FIELDS}
+                )
+                entry.fill_defaults()
+                entries.append(entry)
+
+            options = cls.upsert_options() if overwrite else {"ignore_conflicts": True}
+            return cls.objects.bulk_create(entries, batch_size=batch_size, **options)
+
+    @classmethod
+    def refresh(cls, normalized_address, geocoded_data):
+        """
+        Points the entry of a normalized address at the place of its geocoded data again, updating
+        the place for every address that resolves to it, and restarts the entry's lifetime.
+
+        Args:
+            normalized_address (str): The normalized address of the entry.
+            geocoded_data (dict): The fields of the newly geocoded address, those of its place and its expiry included.
+
+        Returns:
+            int: The number of entries updated.
+        """
+        with transaction.atomic():
+            place_ids = Place.upsert([geocoded_data])
+            return cls.objects.filter(normalized_address=normalized_address).update(
+                place_id=place_ids[Place.key_of(geocoded_data)],
+                created_at=timezone.now(),
+                expires_at=geocoded_data.get("expires_at"),
+                # Hotness is counted afresh for every lifetime of the entry
+                hit_count=0,
+            )
+
+    @classmethod
+    async def aupsert(cls, geocoded_data, batch_size=None, overwrite=True):
+        """
+        Async counterpart of upsert.
+        """
+        return await sync_to_async(cls.upsert)(geocoded_data, batch_size, overwrite)
+
     def __str__(self):
-        return f"{self.input_address} -> {self.latitude}, {self.longitude}"
+        return f"{self.input_address} -> {self.place}"
+
+
+class GeocodeResult:
+    """
+    A lightweight, read-only view of a geocode cache entry and its place, holding only
+    the fields needed to answer a request. Cache hits are read straight into it
+    from a values_list() row, skipping model instantiation.
+    """
+
+    FIELDS = ("input_address", "normalized_address", "formatted_address", "latitude", "longitude", "expires_at")
+    # The GeocodeCache columns holding FIELDS, read with a single join to the place
+    COLUMNS = (
+        "input_address", "normalized_address", "place__formatted_address", "place__latitude", "place__longitude",
+        "expires_at",
+    )
+
+    __slots__ = FIELDS
+
+    def __init__(self, input_address, normalized_address, formatted_address, latitude, longitude, expires_at=None):
+        self.input_address = input_address
+        self.normalized_address = normalized_address
+        self.formatted_address = formatted_address
+        self.latitude = latitude
+        self.longitude = longitude
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_geocoded_data(cls, geocoded_data):
+        """
+        Builds a GeocodeResult from the fields of a geocoded address.
+
+        Args:
+            geocoded_data (dict): The GeocodeCache and Place fields of the address.
+
+        Returns:
+            GeocodeResult: The result.
+        """
+        return cls(*(geocoded_data.get(field) for field in cls.FIELDS))
+
+    @classmethod
+    def from_instance(cls, geocode_cache):
+        """
+        Builds a GeocodeResult from a GeocodeCache instance.
+
+        Args:
+            geocode_cache (GeocodeCache): The cache entry.
+
+        Returns:
+            GeocodeResult: The result.
+        """
+        place = geocode_cache.place
+        return cls(
+            geocode_cache.input_address, geocode_cache.normalized_address, place.formatted_address,
+            place.latitude, place.longitude, geocode_cache.expires_at
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, GeocodeResult):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.FIELDS)
+
+    def __repr__(self):
+        return f"GeocodeResult({self.input_address!r} -> {self.latitude}, {self.longitude})"
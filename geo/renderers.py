@@ -0,0 +1,21 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class BinaryMatrixRenderer(BaseRenderer):
+    """
+    Renderer for the compact binary format of the distance matrix API.
+
+    Successful matrix responses are streamed by the view as raw little-endian
+    float32 values in row-major order. Any other response, e.g. validation
+    errors, is rendered as JSON.
+    """
+
+    media_type = "application/octet-stream"
+    format = "bin"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        return JSONRenderer().render(data, accepted_media_type, renderer_context)
@@ -1,18 +1,165 @@
+import asyncio
+import atexit
 import logging
+import math
 import re
+import threading
+from concurrent.futures import wait
+from contextlib import nullcontext
 
+from asgiref.sync import sync_to_async
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import close_old_connections, connection
+from django.db.models import F, OuterRef, Q, Subquery
+from django.db.models.functions import Cos, Radians, Sin
 from django.db.utils import Error
-from rest_framework import serializers
+from django.utils import timezone
+from rest_framework import exceptions, serializers
 
 from api import settings
-from geo.constants import (GEOCODE_ERROR, INVALID_DESTINATION_ADDRESS,
-                           INVALID_FROM_ADDRESS)
-from geo.models import GeocodeCache
-from geo.services.google import GoogleService
-from geo.services.utils import haversine_distance
+from geo.constants import (GEOCODE_ERROR, GEOCODE_UNAVAILABLE,
+                           INVALID_DESTINATION, INVALID_DESTINATION_ADDRESS,
+                           INVALID_FROM_ADDRESS, INVALID_NEARBY_ORIGIN,
+                           INVALID_NEARBY_QUERY, INVALID_ORIGIN,
+                           REVERSE_GEOCODE_ERROR)
+from geo.exceptions import GeocodeServiceUnavailable
+from geo.models import GeocodeCache, GeocodeResult, Place
+from geo.services.cache import (HitCounter, LocalGeocodeCache,
+                                SharedGeocodeCache)
+from geo.services.fuzzy import FuzzyMatchStats, TrigramIndex, same_numbers
+from geo.services.geohash import bounding_box, covering_cells
+from geo.services.google import (AsyncGoogleService, GoogleService,
+                                 GoogleServiceUnavailable)
+from geo.services.snapshot import SnapshotLookup
+from geo.services.singleflight import (AsyncSingleFlight, SingleFlight,
+                                      advisory_lock)
+from geo.services.timing import ContextThreadPoolExecutor, stage, timed
+from geo.services.utils import (EARTH_RADIUS_KM, REVERSE_GEOCODE_KEY_PREFIX,
+                               haversine_distance, haversine_distances,
+                               haversine_matrix, normalize_address,
+                               parse_reverse_geocode_key, reverse_geocode_key)
+from geo.services.writebehind import WriteBehindBuffer
 
 logger = logging.getLogger(__name__)
 
+local_geocode_cache = LocalGeocodeCache(
+	settings.GEOCODE_LOCAL_CACHE_SIZE, settings.GEOCODE_LOCAL_CACHE_TTL
+)
+shared_geocode_cache = SharedGeocodeCache(
+	settings.GEOCODE_SHARED_CACHE_ALIAS, settings.GEOCODE_SHARED_CACHE_TTL, settings.GEOCODE_SHARED_CACHE_VERSION
+)
+snapshot_geocode_cache = SnapshotLookup(
+	settings.GEOCODE_SNAPSHOT_PATH, settings.GEOCODE_SNAPSHOT_CHECK_INTERVAL
+)
+geocode_flights = SingleFlight()
+async_geocode_flights = AsyncSingleFlight()
+geocode_executor = ContextThreadPoolExecutor(
+	max_workers=settings.GEOCODE_THREAD_POOL_SIZE, thread_name_prefix="geocode"
+)
+# Geocodes the addresses of batch and matrix requests, so that they do not queue up interactive requests
+batch_geocode_executor = ContextThreadPoolExecutor(
+	max_workers=settings.GEOCODE_BATCH_THREAD_POOL_SIZE, thread_name_prefix="geocode-batch"
+)
+# Normalized addresses of the stale entries being refreshed in the background
+stale_refreshes = set()
+stale_refreshes_lock = threading.Lock()
+geocode_hits = HitCounter(settings.GEOCODE_HIT_FLUSH_INTERVAL)
+# In-memory trigram index of the cached addresses, for fuzzy matching on databases without pg_trgm
+fuzzy_index = TrigramIndex()
+fuzzy_index_lock = threading.Lock()
+fuzzy_matches = FuzzyMatchStats()
+
+
+def flush_geocode_hits():
+	"""
+	Adds the hits counted in memory to the hit_count of their GeocodeCache entries,
+	with one update per distinct hit count.
+	"""
+	hits = geocode_hits.drain()
+	if not hits:
+		return
+
+	addresses_by_count = {}
+	for normalized_address, count in hits.items():
+		addresses_by_count.setdefault(count, []).append(normalized_address)
+
+	now = timezone.now()
+	try:
+		for count, normalized_addresses in addresses_by_count.items():
+			GeocodeCache.objects.filter(normalized_address__in=normalized_addresses).update(
+				hit_count=F("hit_count") + count, last_hit_at=now
+			)
+	except Error as e:
+		# Fail silently, hit counts only decide which entries are refreshed
+		logger.error("Error flushing geocode hits: %s", e)
+	finally:
+		close_old_connections()
+
+
+# Otherwise the hits counted since the last flush are lost when a worker exits, e.g. when gunicorn recycles it
+atexit.register(flush_geocode_hits)
+
+
+def write_geocoded_addresses(geocoded_data):
+	"""
+	Upserts a batch of geocoded addresses buffered by geocode_writes.
+
+	Args:
+		geocoded_data (list): The GeocodeCache fields of each address, with unique normalized addresses.
+	"""
+	try:
+		GeocodeCache.upsert(geocoded_data)
+	finally:
+		close_old_connections()
+
+
+def load_fuzzy_index():
+	"""
+	Loads the normalized addresses of the GeocodeCache table into fuzzy_index, unless it was
+	loaded within the last GEOCODE_FUZZY_INDEX_REFRESH seconds. Reverse geocoding keys are left out.
+	"""
+	with fuzzy_index_lock:
+		if not fuzzy_index.is_due(settings.GEOCODE_FUZZY_INDEX_REFRESH):
+			return
+		fuzzy_index.load(
+			GeocodeCache.objects.exclude(normalized_address__startswith=REVERSE_GEOCODE_KEY_PREFIX)
+			.values_list("normalized_address", flat=True)
+			.iterator()
+		)
+
+
+def index_fuzzy_address(normalized_address):
+	"""
+	Adds a newly cached address to fuzzy_index, once the index is in use, so that it can be
+	matched before the next reload.
+
+	Args:
+		normalized_address (str): The normalized address.
+	"""
+	if fuzzy_index.loaded_at is not None and not normalized_address.startswith(REVERSE_GEOCODE_KEY_PREFIX):
+		fuzzy_index.add(normalized_address)
+
+
+geocode_writes = WriteBehindBuffer(
+	write_geocoded_addresses,
+	settings.GEOCODE_WRITE_BEHIND_BATCH_SIZE,
+	settings.GEOCODE_WRITE_BEHIND_INTERVAL,
+	settings.GEOCODE_WRITE_BEHIND_MAX_SIZE,
+)
+
+
+def record_geocode_hit(normalized_address):
+	"""
+	Counts a hit for an address, and flushes the counted hits on a worker thread of
+	geocode_executor every GEOCODE_HIT_FLUSH_INTERVAL seconds.
+
+	Args:
+		normalized_address (str): The normalized address that was served.
+	"""
+	if geocode_hits.record(normalized_address):
+		geocode_executor.submit_detached(flush_geocode_hits)
+
+
 class DistanceSerializer(serializers.Serializer):
 	"""
 	Serializer for validating, geocoding address data and calculating distance between them.
@@ -22,6 +169,7 @@ class DistanceSerializer(serializers.Serializer):
 	from_address = serializers.CharField(max_length=255)
 	destination_address = serializers.CharField(max_length=255)
 
+	@timed("validate")
 	def validate_from_address(self, value):
 		"""Validates the from_address field.
 
@@ -33,6 +181,7 @@ class DistanceSerializer(serializers.Serializer):
 			raise serializers.ValidationError(f"{INVALID_FROM_ADDRESS}: {value}")
 		return value
 
+	@timed("validate")
 	def validate_destination_address(self, value):
 		"""Validates the destination_address field.
 
@@ -44,70 +193,587 @@ class DistanceSerializer(serializers.Serializer):
 			raise serializers.ValidationError(f"{INVALID_DESTINATION_ADDRESS}: {value}")
 		return value
 
-	def geocode(self, address) -> GeocodeCache:
+	def get_memory_cached_address(self, address, normalized_address) -> GeocodeResult:
 		"""
-		Geocodes the given address using the Google Maps API.
+		Fetches a geocoded address from the in-process cache, then from the cache shared by all
+		workers, then from the memory-mapped snapshot. The snapshot is static: entries refreshed
+		since it was exported are served from the shared cache while it holds them.
+
+		Args:
+			address (str): The address as requested.
+			normalized_address (str): The normalized address to look up.
+
+		Returns:
+			GeocodeResult: The cached location, or None on a miss.
+		"""
+		cached_location = local_geocode_cache.get(normalized_address)
+		if not cached_location:
+			cached_location = shared_geocode_cache.get(normalized_address)
+			if cached_location:
+				local_geocode_cache.set(normalized_address, cached_location)
+			else:
+				cached_location = snapshot_geocode_cache.get(normalized_address)
+
+		return self.to_cached_address(address, normalized_address, cached_location)
+
+	@staticmethod
+	def to_cached_address(address, normalized_address, cached_location) -> GeocodeResult:
+		"""
+		Builds a GeocodeResult from a location held by the in-memory caches.
+
+		Args:
+			address (str): The address as requested.
+			normalized_address (str): The normalized address.
+			cached_location (tuple): The cached formatted address, latitude and longitude, or None.
+
+		Returns:
+			GeocodeResult: The cached address information, or None if nothing was cached.
+		"""
+		if not cached_location:
+			return None
+
+		formatted_address, latitude, longitude = cached_location
+		return GeocodeResult(address, normalized_address, formatted_address, latitude, longitude)
+
+	def remember_address(self, normalized_address, geocoded_address):
+		"""
+		Stores a geocoded address in the in-process and shared caches. Stale entries are left out,
+		so that they are revalidated from the GeocodeCache table on the next request instead of
+		being served from memory until the caches expire them, e.g. after a failed refresh.
+
+		Args:
+			normalized_address (str): The normalized address.
+			geocoded_address (GeocodeResult): The geocoded address information.
+		"""
+		if self.is_stale(geocoded_address):
+			return
+		cached_location = (geocoded_address.formatted_address, geocoded_address.latitude, geocoded_address.longitude)
+		local_geocode_cache.set(normalized_address, cached_location)
+		shared_geocode_cache.set(normalized_address, cached_location)
+
+	@timed("cache_read")
+	def get_cached_address(self, normalized_address) -> GeocodeResult:
+		"""
+		Fetches a geocoded address from the GeocodeCache table. Only the columns of
+		GeocodeResult are read, without ordering or model instantiation.
+
+		Args:
+			normalized_address (str): The normalized address to look up.
+
+		Returns:
+			GeocodeResult: The cached address information, or None on a miss or database error.
+		"""
+		try:
+			rows = GeocodeCache.objects.filter(normalized_address=normalized_address).values_list(*GeocodeResult.COLUMNS)[:1]
+			for row in rows:
+				return GeocodeResult(*row)
+			return None
+		except Error as e:
+			# Fail silently
+			logger.error("Error fetching address from cache: %s", e)
+			return None
+
+	@timed("cache_read")
+	def get_cached_addresses(self, normalized_addresses) -> dict:
+		"""
+		Fetches several geocoded addresses from the GeocodeCache table in a single query.
+
+		Args:
+			normalized_addresses (iterable): The normalized addresses to look up.
+
+		Returns:
+			dict: The cached GeocodeResult entries keyed by normalized address. Misses are left out.
+		"""
+		try:
+			rows = GeocodeCache.objects.filter(
+				normalized_address__in=list(normalized_addresses)
+			).values_list(*GeocodeResult.COLUMNS)
+			cached_addresses = (GeocodeResult(*row) for row in rows)
+			return {
+				geocoded_address.normalized_address: geocoded_address for geocoded_address in cached_addresses
+			}
+		except Error as e:
+			# Fail silently
+			logger.error("Error fetching addresses from cache: %s", e)
+			return {}
+
+	@staticmethod
+	def to_geocoded_data(address, normalized_address, geocode_response) -> dict:
+		"""
+		Extracts the GeocodeCache fields from a Google geocode response.
+
+		Args:
+			address (str): The geocoded address.
+			normalized_address (str): The normalized address.
+			geocode_response (dict): The first result of the Google geocode response.
+
+		Returns:
+			dict: The GeocodeCache fields.
+		"""
+		return {
+			"input_address": address,
+			"normalized_address": normalized_address,
+			"formatted_address": geocode_response.get("formatted_address"),
+			"latitude": geocode_response.get("geometry", {}).get("location", {}).get("lat"),
+			"longitude": geocode_response.get("geometry", {}).get("location", {}).get("lng"),
+			"google_place_id": geocode_response.get("place_id", "")
+		}
+
+	def request_geocode(self, address) -> dict:
+		"""
+		Geocodes an address with Google. Reverse geocoding cache keys are reverse geocoded,
+		so that their entries are refreshed like any other.
 
 		Args:
 			address (str): The address to be geocoded.
 
 		Returns:
-			GeocodeCache: The geocoded address information.
+			dict: The first result of the Google geocode response.
 
 		Raises:
-			serializers.ValidationError: If the geocoding fails or the address is invalid.
+			serializers.ValidationError: If the geocoding fails.
+			GeocodeServiceUnavailable: If Google is unavailable.
 		"""
+		location = parse_reverse_geocode_key(address)
+		if location:
+			return self.request_reverse_geocode(*location)
 
 		google_service = GoogleService(settings.GOOGLE_MAPS_API_KEY)
+		try:
+			with stage("google"):
+				geocode_response = google_service.geocode(address)
+		except GoogleServiceUnavailable:
+			raise GeocodeServiceUnavailable([f"{GEOCODE_UNAVAILABLE} for address: {address}"])
 
-		geocoded_address = None
+		if not geocode_response:
+			raise serializers.ValidationError(f"{GEOCODE_ERROR} address: {address}")
 
+		return geocode_response
+
+	def request_reverse_geocode(self, latitude, longitude) -> dict:
+		"""
+		Reverse geocodes a location with Google.
+
+		Args:
+			latitude (float): The latitude in degrees.
+			longitude (float): The longitude in degrees.
+
+		Returns:
+			dict: The first result of the Google reverse geocode response.
+
+		Raises:
+			serializers.ValidationError: If the reverse geocoding fails.
+			GeocodeServiceUnavailable: If Google is unavailable.
+		"""
+		google_service = GoogleService(settings.GOOGLE_MAPS_API_KEY)
 		try:
-			# Check cache
-			geocoded_address = GeocodeCache.objects.filter(input_address__iexact=address).first()
+			with stage("google"):
+				geocode_response = google_service.reverse_geocode(latitude, longitude)
+		except GoogleServiceUnavailable:
+			raise GeocodeServiceUnavailable([f"{GEOCODE_UNAVAILABLE} for location: {latitude},{longitude}"])
+
+		if not geocode_response:
+			raise serializers.ValidationError(f"{REVERSE_GEOCODE_ERROR} location: {latitude},{longitude}")
+
+		return geocode_response
+
+	def geocode_and_cache(self, address, normalized_address) -> GeocodeResult:
+		"""
+		Geocodes an address that missed the cache and upserts the result into the GeocodeCache table.
+		Holds an advisory lock on the normalized address, so that processes racing on the
+		same address wait for the first one and reuse its result. The lock is skipped with
+		GEOCODE_WRITE_BEHIND, as the result is only buffered by the time it is released.
+
+		Args:
+			address (str): The address to be geocoded.
+			normalized_address (str): The normalized address.
+
+		Returns:
+			GeocodeResult: The geocoded address information.
+
+		Raises:
+			serializers.ValidationError: If the geocoding fails.
+			GeocodeServiceUnavailable: If Google is unavailable.
+		"""
+		lock = nullcontext(False) if settings.GEOCODE_WRITE_BEHIND else advisory_lock(normalized_address)
+		with lock as locked:
+			if locked:
+				# Another process may have cached the address while we waited for the lock
+				geocoded_address = self.get_cached_address(normalized_address)
+				if geocoded_address:
+					return geocoded_address
+
+			logger.info("Cache miss for address: %s", address)
+
+			geocode_response = self.request_geocode(address)
+			geocoded_data = self.to_geocoded_data(address, normalized_address, geocode_response)
+			geocoded_data["expires_at"] = GeocodeCache.default_expires_at()
+
+			with stage("cache_write"):
+				if not self.buffer_geocoded_address(geocoded_data):
+					logger.info("Caching geocoded address: %s", address)
+					try:
+						GeocodeCache.upsert([geocoded_data])
+					except Error as e:
+						logger.error("Error caching address: %s", e)
+			index_fuzzy_address(normalized_address)
+			return GeocodeResult.from_geocoded_data(geocoded_data)
+
+	def find_similar_addresses(self, normalized_address) -> list:
+		"""
+		Finds the cached addresses most similar to a normalized address: at least GEOCODE_FUZZY_THRESHOLD
+		similar by trigrams, and holding the same numbers. Postgres searches the pg_trgm index of
+		the GeocodeCache table; other databases search fuzzy_index.
+
+		Args:
+			normalized_address (str): The normalized address to look up.
+
+		Returns:
+			list: Tuples of the GeocodeResult and its similarity, most similar first, at most GEOCODE_FUZZY_CANDIDATES.
+		"""
+		threshold = settings.GEOCODE_FUZZY_THRESHOLD
+		limit = settings.GEOCODE_FUZZY_CANDIDATES
+
+		if connection.vendor == "postgresql":
+			rows = (
+				GeocodeCache.objects.filter(normalized_address__trigram_similar=normalized_address)
+				.exclude(normalized_address__startswith=REVERSE_GEOCODE_KEY_PREFIX)
+				.annotate(similarity=TrigramSimilarity("normalized_address", normalized_address))
+				.filter(similarity__gte=threshold)
+				.order_by("-similarity")
+				.values_list(*GeocodeResult.COLUMNS, "similarity")[:limit]
+			)
+			candidates = [(GeocodeResult(*row[:-1]), row[-1]) for row in rows]
+		else:
+			load_fuzzy_index()
+			matches = fuzzy_index.search(normalized_address, threshold, limit)
+			cached_addresses = self.get_cached_addresses(key for key, _ in matches)
+			candidates = [(cached_addresses[key], similarity) for key, similarity in matches if key in cached_addresses]
+
+		return [
+			(candidate, similarity) for candidate, similarity in candidates
+			if same_numbers(normalized_address, candidate.normalized_address)
+		]
+
+	def get_fuzzy_cached_address(self, address, normalized_address) -> GeocodeResult:
+		"""
+		Serves a cache miss from the most similar cached address, if GEOCODE_FUZZY_MATCH is enabled.
+		The match is only served if it is fresh and every similar address found refers to the
+		same formatted address; otherwise the address is geocoded as usual. Every lookup is counted
+		in fuzzy_matches, and every match is logged with its similarity.
+
+		Args:
+			address (str): The address as requested.
+			normalized_address (str): The normalized address that missed the cache.
+
+		Returns:
+			GeocodeResult: The matched address information, or None if there is no match.
+		"""
+		if not settings.GEOCODE_FUZZY_MATCH:
+			return None
+
+		try:
+			candidates = self.find_similar_addresses(normalized_address)
 		except Error as e:
 			# Fail silently
-			logger.error("Error fetching address from cache: %s", e)
+			logger.error("Error fetching similar addresses from cache: %s", e)
+			return None
+
+		if not candidates:
+			fuzzy_matches.record("no_candidate")
+			return None
+
+		match, match_similarity = candidates[0]
+		if any(candidate.formatted_address != match.formatted_address for candidate, _ in candidates):
+			fuzzy_matches.record("ambiguous")
+			logger.info("Ambiguous fuzzy match for address: %s", address)
+			return None
+		if self.is_stale(match):
+			fuzzy_matches.record("stale")
+			return None
+
+		matched = fuzzy_matches.record("matched")
+		logger.info(
+			"Fuzzy match for address: %s -> %s (similarity %.2f), %s Google calls saved",
+			address, match.normalized_address, match_similarity, matched
+		)
+		record_geocode_hit(match.normalized_address)
+		return GeocodeResult(
+			address, match.normalized_address, match.formatted_address, match.latitude, match.longitude, match.expires_at
+		)
+
+	async def aget_fuzzy_cached_address(self, address, normalized_address) -> GeocodeResult:
+		"""
+		Async counterpart of get_fuzzy_cached_address. The lookup runs off the event loop.
+		"""
+		if not settings.GEOCODE_FUZZY_MATCH:
+			return None
+		return await sync_to_async(self.get_fuzzy_cached_address)(address, normalized_address)
+
+	def buffer_geocoded_address(self, geocoded_data) -> bool:
+		"""
+		Queues a geocoded address to be upserted by geocode_writes in the background,
+		if GEOCODE_WRITE_BEHIND is enabled. Until the batch is written, the address is
+		served from the in-memory caches.
+
+		Args:
+			geocoded_data (dict): The GeocodeCache fields of the address.
+
+		Returns:
+			bool: Whether the address was queued. If not, the caller writes it.
+		"""
+		if not settings.GEOCODE_WRITE_BEHIND:
+			return False
+
+		logger.info("Buffering geocoded address: %s", geocoded_data["input_address"])
+		return geocode_writes.put(geocoded_data["normalized_address"], geocoded_data)
+
+	def is_stale(self, geocoded_address) -> bool:
+		"""
+		Checks whether a GeocodeCache entry has expired.
+
+		Args:
+			geocoded_address (GeocodeResult): The cached address information.
+
+		Returns:
+			bool: Whether the entry should be geocoded again. Entries without an expiry never are.
+		"""
+		return geocoded_address.expires_at is not None and geocoded_address.expires_at <= timezone.now()
+
+	def refresh_cached_address(self, address, normalized_address, geocoded_address) -> GeocodeResult:
+		"""
+		Geocodes a stale GeocodeCache entry again and updates its place, which every address
+		resolving to the place shares, and the entry itself, with a new expiry.
+
+		Args:
+			address (str): The address as requested.
+			normalized_address (str): The normalized address.
+			geocoded_address (GeocodeResult): The stale entry.
+
+		Returns:
+			GeocodeResult: The refreshed address information.
+
+		Raises:
+			serializers.ValidationError: If the geocoding fails.
+			GeocodeServiceUnavailable: If Google is unavailable.
+		"""
+		logger.info("Refreshing stale address: %s", address)
+
+		geocode_response = self.request_geocode(address)
+		geocoded_data = self.to_geocoded_data(geocoded_address.input_address, normalized_address, geocode_response)
+		geocoded_data["expires_at"] = GeocodeCache.default_expires_at()
+
+		try:
+			with stage("cache_write"):
+				GeocodeCache.refresh(normalized_address, geocoded_data)
+		except Error as e:
+			logger.error("Error refreshing cached address: %s", e)
+
+		refreshed_address = GeocodeResult.from_geocoded_data(geocoded_data)
+		self.remember_address(normalized_address, refreshed_address)
+		return refreshed_address
+
+	def refresh_in_background(self, address, normalized_address, geocoded_address):
+		"""
+		Refreshes a stale GeocodeCache entry on a worker thread of geocode_executor,
+		unless a refresh of the same entry is already running.
+
+		Args:
+			address (str): The address as requested.
+			normalized_address (str): The normalized address.
+			geocoded_address (GeocodeResult): The stale entry.
+		"""
+		with stale_refreshes_lock:
+			if normalized_address in stale_refreshes:
+				return
+			stale_refreshes.add(normalized_address)
+
+		geocode_executor.submit_detached(self.refresh_in_thread, address, normalized_address, geocoded_address)
+
+	def refresh_in_thread(self, address, normalized_address, geocoded_address):
+		"""
+		Refreshes a stale GeocodeCache entry from a worker thread of geocode_executor.
+		Errors are logged, as the stale entry has already been served.
+
+		Args:
+			address (str): The address as requested.
+			normalized_address (str): The normalized address.
+			geocoded_address (GeocodeResult): The stale entry.
+		"""
+		try:
+			geocode_flights.do(
+				normalized_address, lambda: self.refresh_cached_address(address, normalized_address, geocoded_address)
+			)
+		except exceptions.APIException as e:
+			logger.error("Error refreshing stale address: %s: %s", address, e.detail)
+		finally:
+			with stale_refreshes_lock:
+				stale_refreshes.discard(normalized_address)
+			close_old_connections()
+
+	def revalidate(self, address, normalized_address, geocoded_address) -> GeocodeResult:
+		"""
+		Serves a stale GeocodeCache entry. With GEOCODE_STALE_WHILE_REVALIDATE the entry is served
+		as is and refreshed in the background; otherwise it is refreshed first, and only served
+		if it cannot be refreshed, e.g. while Google is unavailable.
+
+		Args:
+			address (str): The address as requested.
+			normalized_address (str): The normalized address.
+			geocoded_address (GeocodeResult): The stale entry.
+
+		Returns:
+			GeocodeResult: The refreshed or the stale address information.
+		"""
+		if settings.GEOCODE_STALE_WHILE_REVALIDATE:
+			self.refresh_in_background(address, normalized_address, geocoded_address)
+			return geocoded_address
+
+		try:
+			return geocode_flights.do(
+				normalized_address, lambda: self.refresh_cached_address(address, normalized_address, geocoded_address)
+			)
+		except exceptions.APIException as e:
+			logger.error("Serving stale address: %s: %s", address, e.detail)
+			return geocoded_address
+
+	def geocode(self, address) -> GeocodeResult:
+		"""
+		Geocodes the given address using the Google Maps API.
+
+		Concurrent misses for the same address within the process share a single
+		Google call.
+
+		Args:
+			address (str): The address to be geocoded.
+
+		Returns:
+			GeocodeResult: The geocoded address information.
+
+		Raises:
+			serializers.ValidationError: If the geocoding fails or the address is invalid.
+			GeocodeServiceUnavailable: If Google is unavailable.
+		"""
+		normalized_address = normalize_address(address)
+
+		geocoded_address = self.get_memory_cached_address(address, normalized_address)
+		if geocoded_address:
+			record_geocode_hit(normalized_address)
+			return geocoded_address
+
+		# Check cache
+		geocoded_address = self.get_cached_address(normalized_address)
 
 		if not geocoded_address:
-			logger.info("Cache miss for address: %s", address)
+			geocoded_address = self.get_fuzzy_cached_address(address, normalized_address) or geocode_flights.do(
+				normalized_address, lambda: self.geocode_and_cache(address, normalized_address)
+			)
+		else:
+			record_geocode_hit(normalized_address)
+			if self.is_stale(geocoded_address):
+				geocoded_address = self.revalidate(address, normalized_address, geocoded_address)
 
-			geocode_response = google_service.geocode(address)
+		self.remember_address(normalized_address, geocoded_address)
 
-			if not geocode_response:
-				raise serializers.ValidationError(f"{GEOCODE_ERROR} address: {address}")
+		return geocoded_address
 
-			geocoded_data = {
-				"input_address": address,
-				"formatted_address": geocode_response.get("formatted_address"),
-				"latitude": geocode_response.get("geometry", {}).get("location", {}).get("lat"),
-				"longitude": geocode_response.get("geometry", {}).get("location", {}).get("lng")
-			}
+	def geocode_many(self, addresses) -> dict:
+		"""
+		Geocodes a set of unique addresses. In-memory cache hits are served first, the
+		remaining addresses are looked up in the GeocodeCache table with a single query,
+		and only the misses, and stale entries that must be refreshed first, are geocoded, concurrently
+		on batch_geocode_executor.
+
+		Args:
+			addresses (dict): The addresses to be geocoded, keyed by normalized address.
+
+		Returns:
+			dict: The GeocodeResult, or the APIException raised while geocoding it, keyed by normalized address.
+		"""
+		geocoded_addresses = {}
+
+		for normalized_address, address in addresses.items():
+			geocoded_address = self.get_memory_cached_address(address, normalized_address)
+			if geocoded_address:
+				record_geocode_hit(normalized_address)
+				geocoded_addresses[normalized_address] = geocoded_address
 
-			logger.info("Caching geocoded address: %s", address)
+		uncached_addresses = addresses.keys() - geocoded_addresses.keys()
+		if uncached_addresses:
+			cached_addresses = self.get_cached_addresses(uncached_addresses)
+			for normalized_address, geocoded_address in cached_addresses.items():
+				if self.is_stale(geocoded_address):
+					if not settings.GEOCODE_STALE_WHILE_REVALIDATE:
+						# Refreshed below, along with the misses
+						continue
+					self.refresh_in_background(addresses[normalized_address], normalized_address, geocoded_address)
+				record_geocode_hit(normalized_address)
+				self.remember_address(normalized_address, geocoded_address)
+				geocoded_addresses[normalized_address] = geocoded_address
+
+		futures = {
+			normalized_address: batch_geocode_executor.submit(self.geocode_in_thread, address)
+			for normalized_address, address in addresses.items()
+			if normalized_address not in geocoded_addresses
+		}
+		for normalized_address, future in futures.items():
 			try:
-				geocoded_address = GeocodeCache.objects.create(**geocoded_data)
-			except Error as e:
-				logger.error("Error caching address: %s", e)
-				geocoded_address = GeocodeCache(**geocoded_data)
+				geocoded_addresses[normalized_address] = future.result()
+			except exceptions.APIException as e:
+				geocoded_addresses[normalized_address] = e
 
-		return geocoded_address
+		return geocoded_addresses
+
+	def geocode_in_thread(self, address) -> GeocodeResult:
+		"""
+		Geocodes the given address from a worker thread of geocode_executor or batch_geocode_executor.
+		Releases the thread's database connection afterwards, the same way
+		Django does at the end of a request.
+
+		Args:
+			address (str): The address to be geocoded.
+
+		Returns:
+			GeocodeResult: The geocoded address information.
+		"""
+		try:
+			return self.geocode(address)
+		finally:
+			close_old_connections()
 
 	def create(self, validated_data):
 		"""
 		Geocodes both the origin and destination addresses if not present in cache.
 		Caches the output of geocoding in the database in case of cache miss.
 
+		The destination is geocoded on a worker thread while the origin is geocoded
+		on the request thread, so two cache misses cost one Google round trip of latency.
+
 		Args:
 			data (dict): The input data containing from_address and destination_address.
 
 		Returns:
-			tuple: The geocoded from_address and destination_address objects of GeocodeCache.
+			tuple: The geocoded from_address and destination_address as GeocodeResult objects.
+
+		Raises:
+			serializers.ValidationError: If either address cannot be geocoded. The origin's
+				error takes precedence when both fail.
 		"""
 		from_address = validated_data.get("from_address")
 		destination_address = validated_data.get("destination_address")
-			
-		return self.geocode(from_address), self.geocode(destination_address)
+
+		if normalize_address(from_address) == normalize_address(destination_address):
+			geocoded_from_address = self.geocode(from_address)
+			return geocoded_from_address, self.geocode(destination_address)
+
+		destination_future = geocode_executor.submit(self.geocode_in_thread, destination_address)
+		try:
+			geocoded_from_address = self.geocode(from_address)
+		finally:
+			# Don't leave the destination running past the request, even when the origin failed
+			wait([destination_future])
+
+		return geocoded_from_address, destination_future.result()
 
 	def calculate_distance(self) -> dict:
 		"""
@@ -118,6 +784,175 @@ class DistanceSerializer(serializers.Serializer):
 		"""
 		geocoded_from_address, geocoded_destination_address = self.save()
 
+		with stage("haversine"):
+			distance = haversine_distance(
+				geocoded_from_address.latitude,
+				geocoded_from_address.longitude,
+				geocoded_destination_address.latitude,
+				geocoded_destination_address.longitude
+			)
+
+		return self.to_distance_response(geocoded_from_address, geocoded_destination_address, distance)
+
+	async def aget_memory_cached_address(self, address, normalized_address) -> GeocodeResult:
+		"""
+		Async counterpart of get_memory_cached_address.
+		"""
+		cached_location = local_geocode_cache.get(normalized_address)
+		if not cached_location:
+			cached_location = await shared_geocode_cache.aget(normalized_address)
+			if cached_location:
+				local_geocode_cache.set(normalized_address, cached_location)
+			else:
+				cached_location = snapshot_geocode_cache.get(normalized_address)
+
+		return self.to_cached_address(address, normalized_address, cached_location)
+
+	async def aremember_address(self, normalized_address, geocoded_address):
+		"""
+		Async counterpart of remember_address.
+		"""
+		if self.is_stale(geocoded_address):
+			return
+		cached_location = (geocoded_address.formatted_address, geocoded_address.latitude, geocoded_address.longitude)
+		local_geocode_cache.set(normalized_address, cached_location)
+		await shared_geocode_cache.aset(normalized_address, cached_location)
+
+	@timed("cache_read")
+	async def aget_cached_address(self, normalized_address) -> GeocodeResult:
+		"""
+		Async counterpart of get_cached_address.
+		"""
+		try:
+			rows = GeocodeCache.objects.filter(normalized_address=normalized_address).values_list(*GeocodeResult.COLUMNS)[:1]
+			async for row in rows:
+				return GeocodeResult(*row)
+			return None
+		except Error as e:
+			# Fail silently
+			logger.error("Error fetching address from cache: %s", e)
+			return None
+
+	async def ageocode_and_cache(self, address, normalized_address) -> GeocodeResult:
+		"""
+		Async counterpart of geocode_and_cache. Concurrent misses are only coalesced
+		within the event loop; no advisory lock is held across the awaited Google call.
+		"""
+		logger.info("Cache miss for address: %s", address)
+
+		google_service = AsyncGoogleService(settings.GOOGLE_MAPS_API_KEY)
+		try:
+			with stage("google"):
+				geocode_response = await google_service.geocode(address)
+		except GoogleServiceUnavailable:
+			raise GeocodeServiceUnavailable([f"{GEOCODE_UNAVAILABLE} for address: {address}"])
+
+		if not geocode_response:
+			raise serializers.ValidationError(f"{GEOCODE_ERROR} address: {address}")
+
+		geocoded_data = self.to_geocoded_data(address, normalized_address, geocode_response)
+		geocoded_data["expires_at"] = GeocodeCache.default_expires_at()
+
+		with stage("cache_write"):
+			if not self.buffer_geocoded_address(geocoded_data):
+				logger.info("Caching geocoded address: %s", address)
+				try:
+					await GeocodeCache.aupsert([geocoded_data])
+				except Error as e:
+					logger.error("Error caching address: %s", e)
+		index_fuzzy_address(normalized_address)
+		return GeocodeResult.from_geocoded_data(geocoded_data)
+
+	async def ageocode(self, address) -> GeocodeResult:
+		"""
+		Geocodes the given address without blocking the event loop.
+
+		Args:
+			address (str): The address to be geocoded.
+
+		Returns:
+			GeocodeResult: The geocoded address information.
+
+		Raises:
+			serializers.ValidationError: If the geocoding fails or the address is invalid.
+			GeocodeServiceUnavailable: If Google is unavailable.
+		"""
+		normalized_address = normalize_address(address)
+
+		geocoded_address = await self.aget_memory_cached_address(address, normalized_address)
+		if geocoded_address:
+			record_geocode_hit(normalized_address)
+			return geocoded_address
+
+		# Check cache
+		geocoded_address = await self.aget_cached_address(normalized_address)
+
+		if not geocoded_address:
+			geocoded_address = await self.aget_fuzzy_cached_address(address, normalized_address)
+		if not geocoded_address:
+			geocoded_address = await async_geocode_flights.do(
+				normalized_address, lambda: self.ageocode_and_cache(address, normalized_address)
+			)
+		elif not self.is_stale(geocoded_address):
+			record_geocode_hit(normalized_address)
+		elif settings.GEOCODE_STALE_WHILE_REVALIDATE:
+			record_geocode_hit(normalized_address)
+			self.refresh_in_background(address, normalized_address, geocoded_address)
+		else:
+			# Refreshed with the blocking client, off the event loop, where the hit is counted
+			geocoded_address = await asyncio.get_running_loop().run_in_executor(
+				geocode_executor, self.geocode_in_thread, address
+			)
+
+		await self.aremember_address(normalized_address, geocoded_address)
+
+		return geocoded_address
+
+	async def acalculate_distance(self) -> dict:
+		"""
+		Async counterpart of calculate_distance. The origin and destination are geocoded concurrently.
+
+		Returns:
+			dict: A dictionary containing the geocoded from address, geocoded destination address, and the distance between them.
+
+		Raises:
+			serializers.ValidationError: If either address cannot be geocoded. The origin's
+				error takes precedence when both fail.
+		"""
+		from_address = self.validated_data.get("from_address")
+		destination_address = self.validated_data.get("destination_address")
+
+		geocoded_addresses = await asyncio.gather(
+			self.ageocode(from_address), self.ageocode(destination_address), return_exceptions=True
+		)
+		for geocoded_address in geocoded_addresses:
+			if isinstance(geocoded_address, BaseException):
+				raise geocoded_address
+
+		geocoded_from_address, geocoded_destination_address = geocoded_addresses
+		with stage("haversine"):
+			distance = haversine_distance(
+				geocoded_from_address.latitude,
+				geocoded_from_address.longitude,
+				geocoded_destination_address.latitude,
+				geocoded_destination_address.longitude
+			)
+
+		return self.to_distance_response(geocoded_from_address, geocoded_destination_address, distance)
+
+	@staticmethod
+	def to_distance_response(geocoded_from_address, geocoded_destination_address, distance) -> dict:
+		"""
+		Builds the distance response for two geocoded addresses.
+
+		Args:
+			geocoded_from_address (GeocodeResult): The geocoded origin.
+			geocoded_destination_address (GeocodeResult): The geocoded destination.
+			distance (float): The distance between them in kilometers.
+
+		Returns:
+			dict: A dictionary containing the geocoded from address, geocoded destination address, and the distance between them.
+		"""
 		return {
 			"from_address": {
 				"original": geocoded_from_address.input_address,
@@ -131,10 +966,459 @@ class DistanceSerializer(serializers.Serializer):
 				"lat": geocoded_destination_address.latitude,
 				"long": geocoded_destination_address.longitude
 			},
-			"distance": haversine_distance(
-				geocoded_from_address.latitude,
-				geocoded_from_address.longitude,
-				geocoded_destination_address.latitude,
-				geocoded_destination_address.longitude
+			"distance": distance
+		}
+
+
+class BatchDistanceSerializer(serializers.Serializer):
+	"""
+	Serializer for calculating the distance between many pairs of addresses in one request.
+	"""
+	pairs = serializers.ListField(
+		child=serializers.DictField(), allow_empty=False, max_length=settings.DISTANCE_BATCH_MAX_PAIRS
+	)
+
+	def calculate_distances(self) -> dict:
+		"""
+		Validates every pair, geocodes each unique address once and calculates the distance for every valid pair.
+
+		Returns:
+			dict: A dictionary with the per-pair results in input order. Each result is either the
+				distance response of a pair or a dictionary holding the errors for that pair.
+		"""
+		pair_serializers = [DistanceSerializer(data=pair) for pair in self.validated_data["pairs"]]
+
+		addresses = {}
+		for pair_serializer in pair_serializers:
+			if pair_serializer.is_valid():
+				for address in pair_serializer.validated_data.values():
+					addresses.setdefault(normalize_address(address), address)
+
+		geocoded_addresses = DistanceSerializer().geocode_many(addresses)
+
+		results = []
+		geocoded_pairs = []
+		for pair_serializer in pair_serializers:
+			if pair_serializer.errors:
+				results.append({"errors": pair_serializer.errors})
+				continue
+
+			geocoded_from_address = geocoded_addresses[normalize_address(pair_serializer.validated_data["from_address"])]
+			geocoded_destination_address = geocoded_addresses[normalize_address(pair_serializer.validated_data["destination_address"])]
+
+			if isinstance(geocoded_from_address, exceptions.APIException):
+				results.append({"errors": geocoded_from_address.detail})
+			elif isinstance(geocoded_destination_address, exceptions.APIException):
+				results.append({"errors": geocoded_destination_address.detail})
+			else:
+				# Filled in below, once the distances of all pairs are calculated
+				results.append(None)
+				geocoded_pairs.append((len(results) - 1, geocoded_from_address, geocoded_destination_address))
+
+		if geocoded_pairs:
+			_, geocoded_from_addresses, geocoded_destination_addresses = zip(*geocoded_pairs)
+			with stage("haversine"):
+				distances = haversine_distances(
+					[geocoded_address.latitude for geocoded_address in geocoded_from_addresses],
+					[geocoded_address.longitude for geocoded_address in geocoded_from_addresses],
+					[geocoded_address.latitude for geocoded_address in geocoded_destination_addresses],
+					[geocoded_address.longitude for geocoded_address in geocoded_destination_addresses],
+				).tolist()
+
+			for (index, geocoded_from_address, geocoded_destination_address), distance in zip(geocoded_pairs, distances):
+				results[index] = DistanceSerializer.to_distance_response(
+					geocoded_from_address, geocoded_destination_address, None if math.isnan(distance) else distance
+				)
+
+		return {"results": results}
+
+
+class MatrixDistanceSerializer(serializers.Serializer):
+	"""
+	Serializer for calculating the distance between every origin and every destination.
+	"""
+	origins = serializers.ListField(
+		child=serializers.CharField(max_length=255), allow_empty=False, max_length=settings.DISTANCE_MATRIX_MAX_ADDRESSES
+	)
+	destinations = serializers.ListField(
+		child=serializers.CharField(max_length=255), allow_empty=False, max_length=settings.DISTANCE_MATRIX_MAX_ADDRESSES
+	)
+
+	@timed("validate")
+	def validate_addresses(self, addresses, error):
+		"""Validates every address of a list of addresses against the address pattern.
+
+		Args:
+			addresses (list): The addresses to validate.
+			error (str): The error message prefix for invalid addresses.
+		"""
+		invalid_addresses = [
+			address for address in addresses if not re.match(DistanceSerializer.ADDRESS_PATTERN, address)
+		]
+		if invalid_addresses:
+			logger.error("%s: %s", error, invalid_addresses)
+			raise serializers.ValidationError([f"{error}: {address}" for address in invalid_addresses])
+		return addresses
+
+	def validate_origins(self, value):
+		"""Validates every address of the origins field.
+
+		Args:
+			value (list): The origins field value.
+		"""
+		return self.validate_addresses(value, INVALID_ORIGIN)
+
+	def validate_destinations(self, value):
+		"""Validates every address of the destinations field.
+
+		Args:
+			value (list): The destinations field value.
+		"""
+		return self.validate_addresses(value, INVALID_DESTINATION)
+
+	@staticmethod
+	def to_address_response(address, geocoded_address) -> dict:
+		"""
+		Builds the response for a single geocoded origin or destination.
+
+		Args:
+			address (str): The address as requested.
+			geocoded_address (GeocodeResult or APIException): The geocoded address, or the error raised while geocoding it.
+
+		Returns:
+			dict: The geocoded address details, or the geocoding errors.
+		"""
+		if isinstance(geocoded_address, exceptions.APIException):
+			return {"original": address, "errors": geocoded_address.detail}
+
+		return {
+			"original": address,
+			"formatted": geocoded_address.formatted_address,
+			"lat": geocoded_address.latitude,
+			"long": geocoded_address.longitude
+		}
+
+	def calculate_matrix(self) -> tuple:
+		"""
+		Geocodes each unique origin and destination once and calculates the distance between
+		every origin and every destination in a single vectorized operation.
+
+		Returns:
+			tuple: The geocoded origins, the geocoded destinations, and an M x N numpy array of
+				distances in kilometers. Distances involving an address that could not be geocoded are NaN.
+		"""
+		origins = self.validated_data["origins"]
+		destinations = self.validated_data["destinations"]
+
+		addresses = {}
+		for address in origins + destinations:
+			addresses.setdefault(normalize_address(address), address)
+
+		geocoded_addresses = DistanceSerializer().geocode_many(addresses)
+
+		def to_responses(addresses):
+			return [
+				self.to_address_response(address, geocoded_addresses[normalize_address(address)])
+				for address in addresses
+			]
+
+		def coordinates(responses):
+			return (
+				[response.get("lat", math.nan) for response in responses],
+				[response.get("long", math.nan) for response in responses]
+			)
+
+		geocoded_origins = to_responses(origins)
+		geocoded_destinations = to_responses(destinations)
+
+		with stage("haversine"):
+			matrix = haversine_matrix(*coordinates(geocoded_origins), *coordinates(geocoded_destinations))
+
+		return geocoded_origins, geocoded_destinations, matrix
+
+
+class NearbySerializer(serializers.Serializer):
+	"""
+	Serializer for finding the cached places within a radius of, or nearest to, an address or a location.
+	"""
+	# Kilometers between antipodes, the farthest any two places can be
+	MAX_RADIUS_KM = math.pi * EARTH_RADIUS_KM
+	# Radius of the first search for the nearest places, multiplied by RADIUS_GROWTH until enough are found
+	INITIAL_RADIUS_KM = 1.0
+	RADIUS_GROWTH = 4
+
+	address = serializers.CharField(max_length=255, required=False)
+	lat = serializers.FloatField(min_value=-90, max_value=90, required=False)
+	long = serializers.FloatField(min_value=-180, max_value=180, required=False)
+	radius_km = serializers.FloatField(min_value=0, max_value=MAX_RADIUS_KM, required=False)
+	k = serializers.IntegerField(min_value=1, max_value=settings.NEARBY_MAX_RESULTS, required=False)
+
+	@timed("validate")
+	def validate_address(self, value):
+		"""Validates the address field.
+
+		Args:
+			value (str): The address field value.
+		"""
+		if not re.match(DistanceSerializer.ADDRESS_PATTERN, value):
+			logger.error("%s: %s", INVALID_ORIGIN, value)
+			raise serializers.ValidationError(f"{INVALID_ORIGIN}: {value}")
+		return value
+
+	def validate(self, data):
+		"""Validates that a single origin, and a radius or a number of places, are given.
+
+		Args:
+			data (dict): The validated fields.
+		"""
+		location_fields = {"lat", "long"} & data.keys()
+		if ("address" in data) == bool(location_fields) or len(location_fields) == 1:
+			raise serializers.ValidationError(INVALID_NEARBY_ORIGIN)
+		if "radius_km" not in data and "k" not in data:
+			raise serializers.ValidationError(INVALID_NEARBY_QUERY)
+		return data
+
+	@staticmethod
+	def find_within(latitude, longitude, radius_km, exclude=None, include_locations=False, limit=None) -> list:
+		"""
+		Finds the nearest cached places within radius_km of a location. Only the places that lie in
+		the geohash cells covering the radius, and in its bounding box, are considered, through a
+		prefix scan of the geohash index. The database orders them by angular distance, so that
+		at most limit of them are read, and their exact distances are calculated in a single
+		vectorized operation. Every place is found once, with the first cached address that resolves to it.
+
+		Args:
+			latitude (float): The latitude of the location in degrees.
+			longitude (float): The longitude of the location in degrees.
+			radius_km (float): The radius in kilometers.
+			exclude (str): The normalized address of an entry whose place to leave out, e.g. the origin's.
+			include_locations (bool): Whether the entries of reverse geocoded locations count as addresses of
+				their places. Their keys are not addresses, so places only they resolve to are left out by default.
+			limit (int): The maximum number of places, NEARBY_MAX_RESULTS by default.
+
+		Returns:
+			list: Tuples of the GeocodeResult and its distance in kilometers, nearest first.
+		"""
+		cells = covering_cells(latitude, longitude, radius_km, settings.NEARBY_MAX_CELLS)
+		min_latitude, max_latitude, min_longitude, max_longitude = bounding_box(latitude, longitude, radius_km)
+
+		candidates = Place.objects.filter(latitude__range=(min_latitude, max_latitude))
+		if max_longitude - min_longitude < 360:
+			# A range past the antimeridian continues on the other side of it
+			if min_longitude < -180:
+				candidates = candidates.filter(Q(longitude__gte=min_longitude + 360) | Q(longitude__lte=max_longitude))
+			elif max_longitude > 180:
+				candidates = candidates.filter(Q(longitude__gte=min_longitude) | Q(longitude__lte=max_longitude - 360))
+			else:
+				candidates = candidates.filter(longitude__range=(min_longitude, max_longitude))
+		if cells is not None:
+			prefixes = Q()
+			for cell in cells:
+				prefixes |= Q(geohash__startswith=cell)
+			candidates = candidates.filter(prefixes)
+		if exclude:
+			candidates = candidates.exclude(aliases__normalized_address=exclude)
+
+		aliases = GeocodeCache.objects.filter(place=OuterRef("pk")).order_by("id")
+		if not include_locations:
+			aliases = aliases.exclude(normalized_address__startswith=REVERSE_GEOCODE_KEY_PREFIX)
+		candidates = candidates.annotate(**{
+			field: Subquery(aliases.values(field)[:1]) for field in ("input_address", "normalized_address", "expires_at")
+		}).filter(input_address__isnull=False)
+
+		# The cosine of the angular distance to the location, which grows as the distance shrinks
+		closeness = (
+			Sin(Radians("latitude")) * math.sin(math.radians(latitude))
+			+ Cos(Radians("latitude")) * math.cos(math.radians(latitude))
+			* Cos(Radians("longitude") - math.radians(longitude))
+		)
+		candidates = candidates.annotate(closeness=closeness).order_by("-closeness")
+		rows = list(candidates.values_list(*GeocodeResult.FIELDS)[:limit or settings.NEARBY_MAX_RESULTS])
+		if not rows:
+			return []
+
+		places = [GeocodeResult(*row) for row in rows]
+		with stage("haversine"):
+			distances = haversine_distances(
+				latitude, longitude, [place.latitude for place in places], [place.longitude for place in places]
+			)
+		return [
+			(places[index], float(distances[index]))
+			for index in distances.argsort(kind="stable") if distances[index] <= radius_km
+		]
+
+	def find_nearest(self, latitude, longitude, k, radius_km=None, exclude=None) -> list:
+		"""
+		Finds the k cached places nearest to a location, searching ever larger radii until k
+		places are found. Every place within a searched radius is found, so the k nearest of
+		them are the k nearest overall.
+
+		Args:
+			latitude (float): The latitude of the location in degrees.
+			longitude (float): The longitude of the location in degrees.
+			k (int): The number of places.
+			radius_km (float): The radius beyond which places are not returned, or None for no limit.
+			exclude (str): The normalized address of an entry whose place to leave out, e.g. the origin's.
+
+		Returns:
+			list: Tuples of the GeocodeResult and its distance in kilometers, nearest first.
+		"""
+		max_radius_km = self.MAX_RADIUS_KM if radius_km is None else radius_km
+		search_radius_km = min(self.INITIAL_RADIUS_KM, max_radius_km)
+		while True:
+			places = self.find_within(latitude, longitude, search_radius_km, exclude, limit=k)
+			if len(places) >= k or search_radius_km >= max_radius_km:
+				return places[:k]
+			search_radius_km = min(search_radius_km * self.RADIUS_GROWTH, max_radius_km)
+
+	@staticmethod
+	def to_place_response(place, distance) -> dict:
+		"""
+		Builds the response for a cached place.
+
+		Args:
+			place (GeocodeResult): The cached place.
+			distance (float): The distance to the place in kilometers.
+
+		Returns:
+			dict: The place details and distance.
+		"""
+		return {
+			"original": place.input_address,
+			"formatted": place.formatted_address,
+			"lat": place.latitude,
+			"long": place.longitude,
+			"distance": distance
+		}
+
+	def find_nearby(self) -> dict:
+		"""
+		Geocodes the origin, if given as an address, and finds the cached places within
+		radius_km of it or, if k is given, the k nearest places, optionally within radius_km.
+
+		Returns:
+			dict: The origin and the places found, nearest first, with their distances in kilometers.
+
+		Raises:
+			serializers.ValidationError: If the origin address cannot be geocoded.
+			GeocodeServiceUnavailable: If Google is unavailable.
+		"""
+		data = self.validated_data
+		exclude = None
+		if "address" in data:
+			geocoded_address = DistanceSerializer().geocode(data["address"])
+			latitude, longitude = geocoded_address.latitude, geocoded_address.longitude
+			exclude = geocoded_address.normalized_address
+			origin = {
+				"original": geocoded_address.input_address,
+				"formatted": geocoded_address.formatted_address,
+				"lat": latitude,
+				"long": longitude
+			}
+		else:
+			latitude, longitude = data["lat"], data["long"]
+			origin = {"lat": latitude, "long": longitude}
+
+		if "k" in data:
+			places = self.find_nearest(latitude, longitude, data["k"], data.get("radius_km"), exclude)
+		else:
+			places = self.find_within(latitude, longitude, data["radius_km"], exclude)
+
+		return {
+			"origin": origin,
+			"results": [self.to_place_response(place, distance) for place, distance in places]
+		}
+
+
+class ReverseGeocodeSerializer(serializers.Serializer):
+	"""
+	Serializer for finding the address of a location.
+	"""
+	lat = serializers.FloatField(min_value=-90, max_value=90)
+	long = serializers.FloatField(min_value=-180, max_value=180)
+
+	def reverse_geocode(self) -> dict:
+		"""
+		Finds the address of the location. Locations are snapped to a grid of
+		REVERSE_GEOCODE_GRID_SIZE degrees, and each grid cell is cached in the GeocodeCache
+		table under its own key, with the same tiers, expiry and eviction as addresses.
+		A cell missing from the cache is answered by the nearest cached place within
+		REVERSE_GEOCODE_TOLERANCE_M, through the geohash index, and only if there is none
+		is Google called.
+
+		Returns:
+			dict: The location and its address.
+
+		Raises:
+			serializers.ValidationError: If the location cannot be reverse geocoded.
+			GeocodeServiceUnavailable: If Google is unavailable.
+		"""
+		latitude, longitude = self.validated_data["lat"], self.validated_data["long"]
+		key = reverse_geocode_key(latitude, longitude, settings.REVERSE_GEOCODE_GRID_SIZE)
+		distance_serializer = DistanceSerializer()
+
+		geocoded_address = distance_serializer.get_memory_cached_address(key, key)
+		if geocoded_address:
+			record_geocode_hit(key)
+			return self.to_reverse_geocode_response(latitude, longitude, geocoded_address)
+
+		geocoded_address = distance_serializer.get_cached_address(key)
+		if geocoded_address:
+			record_geocode_hit(key)
+			if distance_serializer.is_stale(geocoded_address):
+				geocoded_address = distance_serializer.revalidate(key, key, geocoded_address)
+		else:
+			geocoded_address = self.find_cached_place(latitude, longitude)
+			if geocoded_address:
+				record_geocode_hit(geocoded_address.normalized_address)
+			else:
+				geocoded_address = geocode_flights.do(key, lambda: distance_serializer.geocode_and_cache(key, key))
+
+		distance_serializer.remember_address(key, geocoded_address)
+
+		return self.to_reverse_geocode_response(latitude, longitude, geocoded_address)
+
+	@staticmethod
+	def find_cached_place(latitude, longitude) -> GeocodeResult:
+		"""
+		Finds the nearest cached place within REVERSE_GEOCODE_TOLERANCE_M of a location.
+
+		Args:
+			latitude (float): The latitude in degrees.
+			longitude (float): The longitude in degrees.
+
+		Returns:
+			GeocodeResult: The nearest place, or None if there is none or on a database error.
+		"""
+		try:
+			places = NearbySerializer.find_within(
+				latitude, longitude, settings.REVERSE_GEOCODE_TOLERANCE_M / 1000, include_locations=True, limit=1
 			)
+		except Error as e:
+			# Fail silently
+			logger.error("Error fetching nearby places from cache: %s", e)
+			return None
+
+		if not places:
+			return None
+		place, distance = places[0]
+		return place
+
+	@staticmethod
+	def to_reverse_geocode_response(latitude, longitude, geocoded_address) -> dict:
+		"""
+		Builds the response for a reverse geocoded location.
+
+		Args:
+			latitude (float): The requested latitude in degrees.
+			longitude (float): The requested longitude in degrees.
+			geocoded_address (GeocodeResult): The address found for the location.
+
+		Returns:
+			dict: The location and its address.
+		"""
+		return {
+			"lat": latitude,
+			"long": longitude,
+			"formatted": geocoded_address.formatted_address
 		}
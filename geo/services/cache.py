@@ -0,0 +1,297 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+class LocalGeocodeCache:
+    """
+    A bounded, thread-safe in-process cache with LRU eviction and a TTL.
+
+    Sits in front of the GeocodeCache table so that hot addresses are served
+    from worker memory instead of a database round trip.
+    """
+
+    def __init__(self, maxsize, ttl):
+        """
+        Creates a new LocalGeocodeCache.
+
+        Args:
+            maxsize (int): The maximum number of entries kept. 0 disables the cache.
+            ttl (float): The number of seconds an entry stays fresh. None keeps entries until evicted.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the value cached for the given key.
+
+        Args:
+            key (str): The normalized address.
+
+        Returns:
+            The cached value, or None if the key is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Caches a value for the given key, evicting the least recently used
+        entries if the cache is full.
+
+        Args:
+            key (str): The normalized address.
+            value: The value to cache.
+        """
+        if self.maxsize <= 0:
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        """
+        Removes the given key from the cache.
+
+        Args:
+            key (str): The normalized address.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Removes all entries and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: The current size, hits, misses and evictions of the cache.
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SharedGeocodeCache:
+    """
+    A geocode cache tier backed by Django's cache framework.
+
+    When the configured cache is shared (e.g. Redis), every worker and pod reads
+    the same entries, so a fresh worker does not have to go to the database
+    for addresses another worker has already resolved.
+    """
+
+    KEY_PREFIX = "geocode"
+
+    def __init__(self, alias, ttl, version=1):
+        """
+        Creates a new SharedGeocodeCache.
+
+        Args:
+            alias (str): The CACHES alias to use. None disables the cache.
+            ttl (int): The number of seconds an entry is kept.
+            version (int): The key version, bumped to invalidate all entries.
+        """
+        self.alias = alias
+        self.ttl = ttl
+        self.version = version
+
+    @property
+    def enabled(self):
+        return self.alias is not None
+
+    def make_key(self, key):
+        """
+        Builds the cache key for a normalized address. The address is hashed
+        so that keys are fixed length and safe for every cache backend.
+
+        Args:
+            key (str): The normalized address.
+
+        Returns:
+            str: The cache key.
+        """
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return f"{self.KEY_PREFIX}:{digest}"
+
+    def get(self, key):
+        """
+        Returns the value cached for the given key.
+
+        Args:
+            key (str): The normalized address.
+
+        Returns:
+            The cached value, or None if the key is missing or the cache is unavailable.
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            return caches[self.alias].get(self.make_key(key), version=self.version)
+        except Exception as e:
+            # Fail silently
+            logger.error("Error fetching address from shared cache: %s", e)
+            return None
+
+    def set(self, key, value):
+        """
+        Caches a value for the given key.
+
+        Args:
+            key (str): The normalized address.
+            value: The value to cache.
+        """
+        if not self.enabled:
+            return
+
+        try:
+            caches[self.alias].set(self.make_key(key), value, timeout=self.ttl, version=self.version)
+        except Exception as e:
+            logger.error("Error caching address in shared cache: %s", e)
+
+    def delete(self, key):
+        """
+        Removes the given key from the cache.
+
+        Args:
+            key (str): The normalized address.
+        """
+        if not self.enabled:
+            return
+
+        try:
+            caches[self.alias].delete(self.make_key(key), version=self.version)
+        except Exception as e:
+            logger.error("Error removing address from shared cache: %s", e)
+
+    async def aget(self, key):
+        """
+        Returns the value cached for the given key, without blocking the event loop.
+
+        Args:
+            key (str): The normalized address.
+
+        Returns:
+            The cached value, or None if the key is missing or the cache is unavailable.
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            return await caches[self.alias].aget(self.make_key(key), version=self.version)
+        except Exception as e:
+            # Fail silently
+            logger.error("Error fetching address from shared cache: %s", e)
+            return None
+
+    async def aset(self, key, value):
+        """
+        Caches a value for the given key, without blocking the event loop.
+
+        Args:
+            key (str): The normalized address.
+            value: The value to cache.
+        """
+        if not self.enabled:
+            return
+
+        try:
+            await caches[self.alias].aset(self.make_key(key), value, timeout=self.ttl, version=self.version)
+        except Exception as e:
+            logger.error("Error caching address in shared cache: %s", e)
+
+
+class HitCounter:
+    """
+    Counts cache hits per key in memory, so that they can be written to the
+    database in one go instead of with an update on every hit.
+    """
+
+    def __init__(self, flush_interval):
+        """
+        Creates a new HitCounter.
+
+        Args:
+            flush_interval (float): The number of seconds between flushes.
+        """
+        self.flush_interval = flush_interval
+        self._hits = Counter()
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, key):
+        """
+        Counts a hit for the given key.
+
+        Args:
+            key (str): The normalized address.
+
+        Returns:
+            bool: Whether the hits are due to be flushed. Only one caller per interval is told so.
+        """
+        with self._lock:
+            self._hits[key] += 1
+            now = time.monotonic()
+            if now - self._flushed_at < self.flush_interval:
+                return False
+            self._flushed_at = now
+            return True
+
+    def drain(self):
+        """
+        Returns the hits counted since the last drain and resets them.
+
+        Returns:
+            dict: The number of hits keyed by normalized address.
+        """
+        with self._lock:
+            hits, self._hits = self._hits, Counter()
+            return dict(hits)
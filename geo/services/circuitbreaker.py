@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpen(Exception):
+    """
+    Raised instead of making a call while the circuit is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Fails calls to an upstream fast once it is unhealthy, instead of letting every
+    call wait for the full timeout.
+
+    The outcome of the last window_size calls is tracked. When at least min_calls are
+    tracked and the share of failed calls, or of calls slower than slow_call_duration,
+    reaches its threshold, the circuit opens and calls are rejected for open_duration.
+    After that a single probe call is let through (half open): if it succeeds the
+    circuit closes, otherwise it opens again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, window_size, min_calls, failure_rate, slow_call_duration, slow_call_rate,
+                 open_duration, failure_exceptions=(Exception,)):
+        """
+        Creates a new CircuitBreaker.
+
+        Args:
+            window_size (int): The number of most recent calls whose outcome is tracked.
+            min_calls (int): The number of tracked calls needed before the circuit can open.
+            failure_rate (float): The share of failed calls, between 0 and 1, that opens the circuit.
+            slow_call_duration (float): The number of seconds after which a call counts as slow.
+            slow_call_rate (float): The share of slow calls, between 0 and 1, that opens the circuit. 0 disables it.
+            open_duration (float): The number of seconds the circuit stays open before a probe call.
+            failure_exceptions (tuple): The exception types that count as failed calls.
+                Other exceptions count as successful calls, as the upstream did answer.
+        """
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate = slow_call_rate
+        self.open_duration = open_duration
+        self.failure_exceptions = failure_exceptions
+
+        self.rejected = 0
+        self.opened = 0
+        self._state = self.CLOSED
+        self._opened_at = None
+        self._probing = False
+        self._outcomes = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_duration:
+            self._state = self.HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probing = False
+        self._outcomes.clear()
+        self.opened += 1
+
+    def check(self):
+        """
+        Fails fast if the circuit is open, without taking the half open probe.
+
+        Raises:
+            CircuitOpen: If the circuit is open.
+        """
+        with self._lock:
+            if self._current_state() == self.OPEN:
+                self.rejected += 1
+                raise CircuitOpen()
+
+    def _admit(self):
+        with self._lock:
+            state = self._current_state()
+            if state == self.OPEN or (state == self.HALF_OPEN and self._probing):
+                self.rejected += 1
+                raise CircuitOpen()
+            if state == self.HALF_OPEN:
+                self._probing = True
+
+    def _record(self, failed, duration):
+        with self._lock:
+            state = self._current_state()
+            slow = duration >= self.slow_call_duration
+
+            if state == self.HALF_OPEN:
+                if failed or slow:
+                    logger.error("Circuit probe failed, reopening circuit")
+                    self._open()
+                else:
+                    logger.info("Circuit probe succeeded, closing circuit")
+                    self._state = self.CLOSED
+                    self._probing = False
+                    self._outcomes.clear()
+                return
+
+            if state == self.OPEN:
+                # A call admitted before the circuit opened
+                return
+
+            self._outcomes.append((failed, slow))
+            if len(self._outcomes) < self.min_calls:
+                return
+
+            failures = sum(1 for failed, _ in self._outcomes if failed)
+            slow_calls = sum(1 for _, slow in self._outcomes if slow)
+            if failures / len(self._outcomes) >= self.failure_rate or (
+                self.slow_call_rate and slow_calls / len(self._outcomes) >= self.slow_call_rate
+            ):
+                logger.error(
+                    "Opening circuit: %s failed and %s slow of the last %s calls",
+                    failures, slow_calls, len(self._outcomes)
+                )
+                self._open()
+
+    @contextmanager
+    def guard(self):
+        """
+        Runs the enclosed call if the circuit allows it, and records its outcome and duration.
+
+        Raises:
+            CircuitOpen: If the circuit is open, or half open with the probe call already in flight.
+        """
+        self._admit()
+        started_at = time.monotonic()
+        try:
+            yield
+        except self.failure_exceptions:
+            self._record(True, time.monotonic() - started_at)
+            raise
+        except Exception:
+            self._record(False, time.monotonic() - started_at)
+            raise
+        except BaseException:
+            # Cancelled: the call says nothing about the upstream, but frees the probe
+            with self._lock:
+                self._probing = False
+            raise
+        else:
+            self._record(False, time.monotonic() - started_at)
+
+    def stats(self):
+        """
+        Returns the circuit breaker counters.
+
+        Returns:
+            dict: The current state, the calls tracked and failed in the window,
+                the number of times the circuit opened and the calls rejected.
+        """
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "calls": len(self._outcomes),
+                "failures": sum(1 for failed, _ in self._outcomes if failed),
+                "slow_calls": sum(1 for _, slow in self._outcomes if slow),
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
@@ -0,0 +1,197 @@
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+_WORD_PATTERN = re.compile(r"[^\W_]+")
+_NUMBER_PATTERN = re.compile(r"\d+")
+
+
+def trigrams(text):
+    """
+    Returns the trigrams of a text the way pg_trgm extracts them: every word is lowercased and
+    padded with two spaces in front and one behind, and split into its three-character runs.
+
+    Args:
+        text (str): The text, e.g. a normalized address.
+
+    Returns:
+        frozenset: The trigrams.
+    """
+    return frozenset(
+        padded[i:i + 3]
+        for word in _WORD_PATTERN.findall(text.lower())
+        for padded in (f"  {word} ",)
+        for i in range(len(padded) - 2)
+    )
+
+
+def similarity(text, other):
+    """
+    Returns the trigram similarity of two texts, matching pg_trgm's similarity(): the number
+    of shared trigrams over the number of distinct trigrams of both.
+
+    Args:
+        text (str): The first text.
+        other (str): The second text.
+
+    Returns:
+        float: The similarity, from 0 for nothing in common to 1 for the same trigrams.
+    """
+    text_trigrams, other_trigrams = trigrams(text), trigrams(other)
+    if not text_trigrams or not other_trigrams:
+        return 0.0
+    return len(text_trigrams & other_trigrams) / len(text_trigrams | other_trigrams)
+
+
+def same_numbers(text, other):
+    """
+    Checks whether two addresses hold the same numbers, in the same order. House numbers and
+    postal codes differ by a single trigram, so a similar address with other numbers is
+    another place rather than a typo.
+
+    Args:
+        text (str): The first address.
+        other (str): The second address.
+
+    Returns:
+        bool: Whether the numbers are the same.
+    """
+    return _NUMBER_PATTERN.findall(text) == _NUMBER_PATTERN.findall(other)
+
+
+class TrigramIndex:
+    """
+    A thread-safe in-memory inverted index from trigrams to keys, to find the keys
+    similar to a text without comparing it against every key. It stands in for a
+    pg_trgm index on databases without pg_trgm.
+    """
+
+    def __init__(self):
+        """
+        Creates a new, empty TrigramIndex.
+        """
+        self.loaded_at = None
+        self._keys = {}
+        self._postings = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def add(self, key):
+        """
+        Adds a key to the index.
+
+        Args:
+            key (str): The key, e.g. a normalized address.
+        """
+        key_trigrams = trigrams(key)
+        with self._lock:
+            if key in self._keys:
+                return
+            self._keys[key] = len(key_trigrams)
+            for trigram in key_trigrams:
+                self._postings[trigram].add(key)
+
+    def load(self, keys):
+        """
+        Replaces the keys of the index.
+
+        Args:
+            keys (iterable): The keys.
+        """
+        indexed_keys = {}
+        postings = defaultdict(set)
+        for key in keys:
+            key_trigrams = trigrams(key)
+            indexed_keys[key] = len(key_trigrams)
+            for trigram in key_trigrams:
+                postings[trigram].add(key)
+
+        with self._lock:
+            self._keys, self._postings = indexed_keys, postings
+            self.loaded_at = time.monotonic()
+
+    def is_due(self, interval):
+        """
+        Checks whether the index should be loaded again.
+
+        Args:
+            interval (float): The number of seconds a load is kept.
+
+        Returns:
+            bool: Whether the index was never loaded, or was loaded more than interval seconds ago.
+        """
+        return self.loaded_at is None or time.monotonic() - self.loaded_at >= interval
+
+    def search(self, text, threshold, limit):
+        """
+        Finds the keys most similar to a text.
+
+        Args:
+            text (str): The text to look up.
+            threshold (float): The lowest similarity returned.
+            limit (int): The maximum number of keys returned.
+
+        Returns:
+            list: Tuples of the key and its similarity, most similar first.
+        """
+        text_trigrams = trigrams(text)
+        if not text_trigrams:
+            return []
+
+        with self._lock:
+            shared = Counter()
+            for trigram in text_trigrams:
+                shared.update(self._postings.get(trigram, ()))
+            matches = [
+                (key, count / (len(text_trigrams) + self._keys[key] - count))
+                for key, count in shared.items()
+            ]
+
+        matches = [match for match in matches if match[1] >= threshold]
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches[:limit]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._keys)
+
+
+class FuzzyMatchStats:
+    """
+    Counts the outcomes of fuzzy cache lookups, to measure how many Google calls they save.
+    """
+
+    # A match was served, no candidate was similar enough, the candidates disagreed on the place,
+    # or the match had expired
+    OUTCOMES = ("matched", "no_candidate", "ambiguous", "stale")
+
+    def __init__(self):
+        """
+        Creates a new FuzzyMatchStats with every count at 0.
+        """
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, outcome):
+        """
+        Counts a lookup.
+
+        Args:
+            outcome (str): One of OUTCOMES.
+
+        Returns:
+            int: The number of lookups with the same outcome so far.
+        """
+        with self._lock:
+            self._counts[outcome] += 1
+            return self._counts[outcome]
+
+    def stats(self):
+        """
+        Returns the counts.
+
+        Returns:
+            dict: The number of lookups per outcome. Every match is a Google call saved.
+        """
+        with self._lock:
+            return {outcome: self._counts[outcome] for outcome in self.OUTCOMES}
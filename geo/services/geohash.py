@@ -0,0 +1,129 @@
+import math
+
+from geo.services.utils import EARTH_RADIUS_KM
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Length of the geohashes stored with every entry, cells of about 4 x 2 cm
+PRECISION = 12
+
+
+def encode(latitude, longitude, precision=PRECISION):
+    """
+    Encodes a location as a geohash: the base32 path of the location through a grid that
+    alternately halves the longitude and latitude ranges. Locations sharing a prefix lie
+    in the same cell, so a B-tree index on the geohash finds a cell's locations with a prefix scan.
+
+    Args:
+        latitude (float): The latitude in degrees.
+        longitude (float): The longitude in degrees.
+        precision (int): The number of characters, each halving the cell 5 times.
+
+    Returns:
+        str: The geohash, or an empty string if a coordinate is missing.
+    """
+    if latitude is None or longitude is None:
+        return ""
+
+    latitude_range = [-90.0, 90.0]
+    longitude_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(geohash) < precision:
+        value, value_range = (longitude, longitude_range) if even else (latitude, latitude_range)
+        middle = (value_range[0] + value_range[1]) / 2
+        if value >= middle:
+            bits = bits * 2 + 1
+            value_range[0] = middle
+        else:
+            bits = bits * 2
+            value_range[1] = middle
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(geohash)
+
+
+def cell_size(precision):
+    """
+    Returns the size of the cells of a geohash precision.
+
+    Args:
+        precision (int): The number of characters of the geohashes.
+
+    Returns:
+        tuple: The height and width of a cell, in degrees of latitude and longitude.
+    """
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Returns the latitude and longitude ranges holding every location within radius_km of a location.
+
+    Returns:
+        tuple: The minimum and maximum latitude, and the minimum and maximum longitude, in degrees.
+            The longitude range may extend past the antimeridian, and spans 360 degrees near a pole.
+    """
+    latitude_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_latitude = max(-90.0, latitude - latitude_delta)
+    max_latitude = min(90.0, latitude + latitude_delta)
+
+    farthest_latitude = max(abs(min_latitude), abs(max_latitude))
+    if farthest_latitude >= 90.0 or latitude_delta >= 90.0:
+        return min_latitude, max_latitude, -180.0, 180.0
+
+    longitude_delta = min(180.0, latitude_delta / math.cos(math.radians(farthest_latitude)))
+    return min_latitude, max_latitude, longitude - longitude_delta, longitude + longitude_delta
+
+
+def _steps(start, stop, step):
+    # Values from start to stop, at most step apart, so that every cell row or column in between is visited
+    value = start
+    while value < stop:
+        yield value
+        value += step
+    yield stop
+
+
+def covering_cells(latitude, longitude, radius_km, max_cells):
+    """
+    Returns the geohash cells covering every location within radius_km of a location, at the
+    finest precision that needs at most max_cells cells.
+
+    Args:
+        latitude (float): The latitude of the center in degrees.
+        longitude (float): The longitude of the center in degrees.
+        radius_km (float): The radius in kilometers.
+        max_cells (int): The maximum number of cells.
+
+    Returns:
+        list: The geohash prefixes of the cells, or None if even the coarsest cells are too many,
+            in which case every location is a candidate.
+    """
+    min_latitude, max_latitude, min_longitude, max_longitude = bounding_box(latitude, longitude, radius_km)
+
+    cells = None
+    for precision in range(1, PRECISION + 1):
+        height, width = cell_size(precision)
+        rows = math.floor(max_latitude / height) - math.floor(min_latitude / height) + 1
+        columns = min(math.floor(max_longitude / width) - math.floor(min_longitude / width) + 1, 2 ** ((5 * precision + 1) // 2))
+        if rows * columns > max_cells:
+            break
+
+        cells = sorted({
+            encode(cell_latitude, (cell_longitude + 180.0) % 360.0 - 180.0, precision)
+            for cell_latitude in _steps(min_latitude, max_latitude, height)
+            for cell_longitude in _steps(min_longitude, max_longitude, width)
+        })
+
+    return cells
@@ -1,9 +1,98 @@
+import asyncio
 import logging
+import math
+import random
+import time
+import weakref
+from functools import lru_cache
 
 import googlemaps
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from geo.services.circuitbreaker import CircuitBreaker, CircuitOpen
+from geo.services.ratelimit import RateLimitExceeded, get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
+GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
+# Same retry policy as the googlemaps client
+RETRIABLE_STATUSES = {500, 503, 504}
+
+
+class GoogleServiceUnavailable(Exception):
+    """
+    Raised when Google cannot be reached within the configured timeouts and retry budget,
+    or when the call is shed by the rate limiter or the circuit breaker.
+    """
+
+
+def build_session():
+    """
+    Builds the keep-alive HTTP session used by the googlemaps client, with a
+    connection pool sized for the number of threads calling Google.
+
+    Returns:
+        requests.Session: The HTTP session.
+    """
+    session = requests.Session()
+    # Retries are left to the googlemaps client, which backs off with jitter
+    adapter = HTTPAdapter(pool_maxsize=settings.GOOGLE_MAPS_POOL_SIZE, max_retries=0)
+    session.mount("https://", adapter)
+    return session
+
+
+def backoff_delay(retry_counter):
+    """
+    Returns the jittered exponential backoff before the given retry, matching the
+    googlemaps client: 0.5s growing 1.5x per retry, jittered by 50%.
+
+    Args:
+        retry_counter (int): The number of the retry, starting at 1.
+
+    Returns:
+        float: The delay in seconds.
+    """
+    return 0.5 * 1.5 ** (retry_counter - 1) * (random.random() + 0.5)
+
+
+@lru_cache(maxsize=None)
+def get_circuit_breaker():
+    """
+    Returns the CircuitBreaker around Google shared by every thread and event loop of the process.
+    Only GoogleServiceUnavailable counts as a failed call; any other answer means Google is up.
+
+    Returns:
+        CircuitBreaker: The circuit breaker configured from settings.
+    """
+    return CircuitBreaker(
+        window_size=settings.GOOGLE_MAPS_CIRCUIT_WINDOW,
+        min_calls=settings.GOOGLE_MAPS_CIRCUIT_MIN_CALLS,
+        failure_rate=settings.GOOGLE_MAPS_CIRCUIT_FAILURE_RATE,
+        slow_call_duration=settings.GOOGLE_MAPS_CIRCUIT_SLOW_CALL_DURATION,
+        slow_call_rate=settings.GOOGLE_MAPS_CIRCUIT_SLOW_CALL_RATE,
+        open_duration=settings.GOOGLE_MAPS_CIRCUIT_OPEN_DURATION,
+        failure_exceptions=(GoogleServiceUnavailable,),
+    )
+
+def client_queries_per_second():
+    """
+    Returns the queries_per_second of the googlemaps client, which sleeps on its own once it
+    has sent that many calls within a second. GoogleRateLimiter lets at most GOOGLE_MAPS_BURST
+    plus GOOGLE_MAPS_QPS calls through in any second, so the client's limit is set to that,
+    and never adds waits of its own that the rate limiter does not record.
+
+    Returns:
+        int: The number of calls per second, at least googlemaps' default of 50 if the rate is not limited.
+    """
+    if not settings.GOOGLE_MAPS_QPS:
+        return max(50, settings.GOOGLE_MAPS_BURST)
+    return math.ceil(settings.GOOGLE_MAPS_BURST + settings.GOOGLE_MAPS_QPS)
+
+
 class GoogleService:
     """
     A class that provides geocoding services using the Google Maps API.
@@ -23,7 +112,15 @@ class GoogleService:
         """
         if not cls._instance:
             cls._instance = super().__new__(cls)
-            cls._instance.client = googlemaps.Client(api_key)
+            cls._instance.client = googlemaps.Client(
+                api_key,
+                connect_timeout=settings.GOOGLE_MAPS_CONNECT_TIMEOUT,
+                read_timeout=settings.GOOGLE_MAPS_READ_TIMEOUT,
+                retry_timeout=settings.GOOGLE_MAPS_RETRY_TIMEOUT,
+                retry_over_query_limit=settings.GOOGLE_MAPS_RETRY_OVER_QUERY_LIMIT,
+                queries_per_second=client_queries_per_second(),
+                requests_session=build_session(),
+            )
         return cls._instance
 
     def geocode(self, address):
@@ -35,12 +132,262 @@ class GoogleService:
 
         Returns:
             dict: A dictionary containing the geocoded address information.
+
+        Raises:
+            GoogleServiceUnavailable: If the call is shed by the rate limiter or the circuit breaker,
+                or Google times out, cannot be reached, is over the query limit, or keeps failing
+                until the retry budget is spent.
         """
         logger.info("Geocoding address: %s", address)
 
-        geocode_result = self.client.geocode(address)
+        circuit_breaker = get_circuit_breaker()
+        try:
+            circuit_breaker.check()
+            get_rate_limiter().acquire()
+            with circuit_breaker.guard():
+                return self.call_geocode(address)
+        except CircuitOpen as e:
+            logger.error("Circuit open, not geocoding address: %s", address)
+            raise GoogleServiceUnavailable(address) from e
+        except RateLimitExceeded as e:
+            raise GoogleServiceUnavailable(address) from e
+
+    def call_geocode(self, address):
+        """
+        Calls the Google geocoding API through the googlemaps client.
+
+        Args:
+            address (str): The address to geocode.
+
+        Returns:
+            dict: The first geocoding result, or None if there is none.
+
+        Raises:
+            GoogleServiceUnavailable: If Google times out, cannot be reached, is over the
+                query limit, or keeps failing until the retry budget is spent.
+        """
+        try:
+            geocode_result = self.client.geocode(address)
+        except (googlemaps.exceptions.Timeout, googlemaps.exceptions.TransportError) as e:
+            logger.error("Google unavailable while geocoding address: %s: %s", address, e)
+            raise GoogleServiceUnavailable(address) from e
+        except googlemaps.exceptions.ApiError as e:
+            if e.status != "OVER_QUERY_LIMIT":
+                raise
+            logger.error("Google over query limit while geocoding address: %s", address)
+            raise GoogleServiceUnavailable(address) from e
+
         if geocode_result:
             return geocode_result[0]
         else:
             logger.error("Could not geocode address: %s", address)
             return None
+
+    def reverse_geocode(self, latitude, longitude):
+        """
+        Reverse geocodes the given location using the Google Maps API, through the same
+        circuit breaker and rate limiter as geocode.
+
+        Args:
+            latitude (float): The latitude in degrees.
+            longitude (float): The longitude in degrees.
+
+        Returns:
+            dict: A dictionary containing the address information of the location.
+
+        Raises:
+            GoogleServiceUnavailable: If the call is shed by the rate limiter or the circuit breaker,
+                or Google times out, cannot be reached, is over the query limit, or keeps failing
+                until the retry budget is spent.
+        """
+        location = f"{latitude},{longitude}"
+        logger.info("Reverse geocoding location: %s", location)
+
+        circuit_breaker = get_circuit_breaker()
+        try:
+            circuit_breaker.check()
+            get_rate_limiter().acquire()
+            with circuit_breaker.guard():
+                return self.call_reverse_geocode(latitude, longitude)
+        except CircuitOpen as e:
+            logger.error("Circuit open, not reverse geocoding location: %s", location)
+            raise GoogleServiceUnavailable(location) from e
+        except RateLimitExceeded as e:
+            raise GoogleServiceUnavailable(location) from e
+
+    def call_reverse_geocode(self, latitude, longitude):
+        """
+        Calls the Google reverse geocoding API through the googlemaps client.
+
+        Args:
+            latitude (float): The latitude in degrees.
+            longitude (float): The longitude in degrees.
+
+        Returns:
+            dict: The first reverse geocoding result, or None if there is none.
+
+        Raises:
+            GoogleServiceUnavailable: If Google times out, cannot be reached, is over the
+                query limit, or keeps failing until the retry budget is spent.
+        """
+        location = f"{latitude},{longitude}"
+        try:
+            reverse_geocode_result = self.client.reverse_geocode((latitude, longitude))
+        except (googlemaps.exceptions.Timeout, googlemaps.exceptions.TransportError) as e:
+            logger.error("Google unavailable while reverse geocoding location: %s: %s", location, e)
+            raise GoogleServiceUnavailable(location) from e
+        except googlemaps.exceptions.ApiError as e:
+            if e.status != "OVER_QUERY_LIMIT":
+                raise
+            logger.error("Google over query limit while reverse geocoding location: %s", location)
+            raise GoogleServiceUnavailable(location) from e
+
+        if reverse_geocode_result:
+            return reverse_geocode_result[0]
+        else:
+            logger.error("Could not reverse geocode location: %s", location)
+            return None
+
+
+class AsyncGoogleService:
+    """
+    A class that provides non-blocking geocoding services using the Google Maps API.
+
+    Requests go through a pooled keep-alive HTTP client, so a single event loop can
+    keep many lookups in flight at once. Connections are only reused across requests
+    served by the same event loop, i.e. under ASGI; an event loop that ends with its
+    request, as under WSGI, must close its client with aclose().
+    """
+
+    _instance = None
+
+    def __new__(cls, api_key):
+        """
+        Creates a new instance of the AsyncGoogleService class.
+
+        Args:
+            api_key (str): The API key for accessing the Google Maps API.
+
+        Returns:
+            AsyncGoogleService: An instance of the AsyncGoogleService class.
+        """
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+            cls._instance.api_key = api_key
+            cls._instance._clients = weakref.WeakKeyDictionary()
+        return cls._instance
+
+    def get_client(self):
+        """
+        Returns the HTTP client of the running event loop. Connections cannot be
+        shared between event loops, so each loop gets its own pool.
+
+        Returns:
+            httpx.AsyncClient: The pooled HTTP client.
+        """
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.GOOGLE_MAPS_ASYNC_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.GOOGLE_MAPS_ASYNC_MAX_CONNECTIONS,
+                ),
+                timeout=httpx.Timeout(
+                    settings.GOOGLE_MAPS_READ_TIMEOUT,
+                    connect=settings.GOOGLE_MAPS_CONNECT_TIMEOUT,
+                    pool=settings.GOOGLE_MAPS_CONNECT_TIMEOUT,
+                ),
+            )
+        return client
+
+    async def aclose(self):
+        """
+        Closes the HTTP client of the running event loop, if it has one, and its connections.
+        """
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    async def geocode(self, address):
+        """
+        Geocodes the given address using the Google Maps API. Server errors are retried
+        with jittered exponential backoff until GOOGLE_MAPS_RETRY_TIMEOUT is spent.
+
+        Args:
+            address (str): The address to geocode.
+
+        Returns:
+            dict: A dictionary containing the geocoded address information.
+
+        Raises:
+            GoogleServiceUnavailable: If the call is shed by the rate limiter or the circuit breaker,
+                or Google times out, cannot be reached, is over the query limit, or keeps failing
+                until the retry budget is spent.
+            googlemaps.exceptions.ApiError: If Google returns any other error status.
+        """
+        logger.info("Geocoding address: %s", address)
+
+        circuit_breaker = get_circuit_breaker()
+        try:
+            circuit_breaker.check()
+            await get_rate_limiter().aacquire()
+            with circuit_breaker.guard():
+                return await self.call_geocode(address)
+        except CircuitOpen as e:
+            logger.error("Circuit open, not geocoding address: %s", address)
+            raise GoogleServiceUnavailable(address) from e
+        except RateLimitExceeded as e:
+            raise GoogleServiceUnavailable(address) from e
+
+    async def call_geocode(self, address):
+        """
+        Calls the Google geocoding API, retrying server errors.
+
+        Args:
+            address (str): The address to geocode.
+
+        Returns:
+            dict: The first geocoding result, or None if there is none.
+
+        Raises:
+            GoogleServiceUnavailable: If Google times out, cannot be reached, is over the
+                query limit, or keeps failing until the retry budget is spent.
+            googlemaps.exceptions.ApiError: If Google returns any other error status.
+        """
+        deadline = time.monotonic() + settings.GOOGLE_MAPS_RETRY_TIMEOUT
+        retry_counter = 0
+
+        while True:
+            try:
+                response = await self.get_client().get(GEOCODE_URL, params={"address": address, "key": self.api_key})
+            except httpx.HTTPError as e:
+                logger.error("Google unavailable while geocoding address: %s: %s", address, e)
+                raise GoogleServiceUnavailable(address) from e
+
+            if response.status_code in RETRIABLE_STATUSES:
+                body = None
+            elif response.status_code != 200:
+                logger.error("Google returned HTTP %s while geocoding address: %s", response.status_code, address)
+                raise GoogleServiceUnavailable(address)
+            else:
+                body = response.json()
+                status = body.get("status")
+
+                if status == "OK":
+                    return body["results"][0]
+                elif status == "ZERO_RESULTS":
+                    logger.error("Could not geocode address: %s", address)
+                    return None
+                elif status != "OVER_QUERY_LIMIT":
+                    raise googlemaps.exceptions.ApiError(status, body.get("error_message"))
+                elif not settings.GOOGLE_MAPS_RETRY_OVER_QUERY_LIMIT:
+                    logger.error("Google over query limit while geocoding address: %s", address)
+                    raise GoogleServiceUnavailable(address)
+
+            retry_counter += 1
+            delay = backoff_delay(retry_counter)
+            if time.monotonic() + delay > deadline:
+                logger.error("Retry budget spent while geocoding address: %s", address)
+                raise GoogleServiceUnavailable(address)
+            await asyncio.sleep(delay)
@@ -0,0 +1,329 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a call would have to wait longer than allowed for the rate limit,
+    or when the daily quota is spent.
+    """
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket. Tokens refill at a fixed rate up to a burst capacity.
+
+    Callers that find the bucket empty reserve a future token and are told how long
+    to wait for it, so queued callers are served in order at the configured rate.
+    """
+
+    def __init__(self, rate, capacity):
+        """
+        Creates a new TokenBucket.
+
+        Args:
+            rate (float): The number of tokens added per second.
+            capacity (float): The maximum number of tokens, i.e. the allowed burst.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait):
+        """
+        Takes a token, possibly one that will only be available in the future.
+
+        Args:
+            max_wait (float): The longest the caller is willing to wait, in seconds.
+
+        Returns:
+            float: The number of seconds to wait before using the token, or None if
+                that would exceed max_wait. No token is taken in that case.
+        """
+        with self._lock:
+            self._refill()
+
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if wait > max_wait:
+                return None
+
+            self._tokens -= 1
+            return wait
+
+    def release(self):
+        """
+        Gives back a token taken by reserve() that will not be used.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    @property
+    def tokens(self):
+        with self._lock:
+            elapsed = time.monotonic() - self._updated_at
+            return min(self.capacity, self._tokens + elapsed * self.rate)
+
+
+class GoogleRateLimiter:
+    """
+    Limits how fast, and how often per day, Google is called.
+
+    Without a shared cache the rate is enforced per process with a TokenBucket. With
+    a shared cache (e.g. Redis) the rate is enforced across all workers with a counter
+    per window of burst / qps seconds, at least one, and the daily quota is counted
+    across all workers too. Calls that would queue for longer than max_wait are shed
+    immediately, without counting against the daily quota.
+    """
+
+    KEY_PREFIX = "geocode:ratelimit"
+
+    def __init__(self, qps, burst, daily_quota, max_wait, cache_alias=None):
+        """
+        Creates a new GoogleRateLimiter.
+
+        Args:
+            qps (float): The allowed number of calls per second. 0 disables the rate limit.
+            burst (int): The number of calls allowed at once before calls are spaced out.
+            daily_quota (int): The allowed number of calls per UTC day. 0 disables the quota.
+            max_wait (float): The longest a call may be queued, in seconds.
+            cache_alias (str): The CACHES alias shared by all workers, or None to limit per process.
+        """
+        self.qps = qps
+        self.burst = max(burst, 1)
+        self.daily_quota = daily_quota
+        self.max_wait = max_wait
+        self.cache_alias = cache_alias
+        self.bucket = TokenBucket(qps, self.burst) if qps else None
+
+        self.acquired = 0
+        self.shed = 0
+        self.total_wait = 0.0
+        self.max_observed_wait = 0.0
+        self._local_quota_day = None
+        self._local_quota_used = 0
+        self._lock = threading.Lock()
+
+    def reserve_shared(self, cache, now):
+        """
+        Reserves a call in the first window, starting from now, that has room left. A window
+        lasts burst / qps seconds and allows burst calls, so that calls average qps per second,
+        fractional rates included. Windows last at least a second, which allows qps calls at
+        once when burst is lower.
+
+        Returns:
+            tuple: The number of seconds to wait before calling, or None if the call must be shed,
+                and the key of the window the call was reserved in.
+        """
+        window_length = max(1.0, self.burst / self.qps)
+        limit = max(1, math.floor(self.qps * window_length))
+        window = math.floor(now / window_length)
+        while window * window_length - now <= self.max_wait:
+            key = f"{self.KEY_PREFIX}:window:{window_length}:{window}"
+            cache.add(key, 0, timeout=math.ceil(self.max_wait + window_length) + 2)
+            if cache.incr(key) <= limit:
+                return max(0.0, window * window_length - now), key
+            window += 1
+        return None, None
+
+    def reserve_rate(self):
+        """
+        Reserves a call against the rate limit.
+
+        Returns:
+            tuple: The number of seconds to wait before calling, or None if the call must be shed,
+                and the key of the shared window the call was reserved in, or None if it was
+                reserved in the local bucket.
+        """
+        if not self.qps:
+            return 0.0, None
+
+        if self.cache_alias is not None:
+            try:
+                return self.reserve_shared(caches[self.cache_alias], time.time())
+            except Exception as e:
+                # Fall back to limiting this process only
+                logger.error("Error reserving rate limit in shared cache: %s", e)
+
+        return self.bucket.reserve(self.max_wait), None
+
+    def release_rate(self, window_key):
+        """
+        Gives back a call reserved by reserve_rate that will not be made, e.g. because the daily quota is spent.
+
+        Args:
+            window_key (str): The key of the shared window the call was reserved in, or None.
+        """
+        if not self.qps:
+            return
+
+        if window_key is not None:
+            try:
+                caches[self.cache_alias].decr(window_key)
+            except Exception as e:
+                logger.error("Error releasing rate limit in shared cache: %s", e)
+            return
+
+        self.bucket.release()
+
+    def quota_key(self):
+        return f"{self.KEY_PREFIX}:quota:{datetime.now(timezone.utc).date().isoformat()}"
+
+    def consume_quota(self):
+        """
+        Counts a call against the daily quota.
+
+        Returns:
+            bool: Whether the call fits in the quota.
+        """
+        if not self.daily_quota:
+            return True
+
+        if self.cache_alias is not None:
+            try:
+                cache = caches[self.cache_alias]
+                key = self.quota_key()
+                cache.add(key, 0, timeout=2 * 24 * 60 * 60)
+                return cache.incr(key) <= self.daily_quota
+            except Exception as e:
+                logger.error("Error counting daily quota in shared cache: %s", e)
+
+        with self._lock:
+            day = datetime.now(timezone.utc).date()
+            if day != self._local_quota_day:
+                self._local_quota_day = day
+                self._local_quota_used = 0
+            self._local_quota_used += 1
+            return self._local_quota_used <= self.daily_quota
+
+    def reserve(self):
+        """
+        Reserves a call against the rate limit, then the daily quota, so that calls shed by the
+        rate limit do not use up the quota. Calls refused by the quota give their rate back.
+
+        Returns:
+            float: The number of seconds to wait before calling.
+
+        Raises:
+            RateLimitExceeded: If the daily quota is spent or the call would wait longer than max_wait.
+        """
+        wait, window_key = self.reserve_rate()
+        if wait is None:
+            with self._lock:
+                self.shed += 1
+            logger.error("Shedding Google call, rate limit of %s calls per second reached", self.qps)
+            raise RateLimitExceeded("Rate limit exceeded")
+
+        if not self.consume_quota():
+            self.release_rate(window_key)
+            with self._lock:
+                self.shed += 1
+            logger.error("Daily Google quota of %s calls spent", self.daily_quota)
+            raise RateLimitExceeded("Daily quota exceeded")
+
+        with self._lock:
+            self.acquired += 1
+            self.total_wait += wait
+            self.max_observed_wait = max(self.max_observed_wait, wait)
+
+        return wait
+
+    def acquire(self):
+        """
+        Blocks until a call may be made.
+
+        Raises:
+            RateLimitExceeded: If the daily quota is spent or the call would wait longer than max_wait.
+        """
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def aacquire(self):
+        """
+        Waits, without blocking the event loop, until a call may be made. Calls are reserved
+        in the shared cache from a worker thread, as its client blocks, e.g. Redis'.
+
+        Raises:
+            RateLimitExceeded: If the daily quota is spent or the call would wait longer than max_wait.
+        """
+        if self.cache_alias is not None:
+            wait = await sync_to_async(self.reserve, thread_sensitive=False)()
+        else:
+            wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+    def remaining_daily_quota(self):
+        """
+        Returns the number of calls left in today's quota, or None if there is no quota.
+        """
+        if not self.daily_quota:
+            return None
+
+        used = None
+        if self.cache_alias is not None:
+            try:
+                used = caches[self.cache_alias].get(self.quota_key(), 0)
+            except Exception as e:
+                logger.error("Error reading daily quota from shared cache: %s", e)
+
+        if used is None:
+            with self._lock:
+                today = datetime.now(timezone.utc).date()
+                used = self._local_quota_used if self._local_quota_day == today else 0
+
+        return max(0, self.daily_quota - used)
+
+    def stats(self):
+        """
+        Returns the rate limiter counters.
+
+        Returns:
+            dict: The calls acquired and shed, the total and longest wait in seconds,
+                the tokens left in the local bucket and the remaining daily quota.
+        """
+        with self._lock:
+            stats = {
+                "acquired": self.acquired,
+                "shed": self.shed,
+                "total_wait": self.total_wait,
+                "max_wait": self.max_observed_wait,
+            }
+        stats["tokens"] = self.bucket.tokens if self.bucket else None
+        stats["remaining_daily_quota"] = self.remaining_daily_quota()
+        return stats
+
+
+@lru_cache(maxsize=None)
+def get_rate_limiter():
+    """
+    Returns the GoogleRateLimiter shared by every thread and event loop of the process.
+
+    Returns:
+        GoogleRateLimiter: The rate limiter configured from settings.
+    """
+    return GoogleRateLimiter(
+        qps=settings.GOOGLE_MAPS_QPS,
+        burst=settings.GOOGLE_MAPS_BURST,
+        daily_quota=settings.GOOGLE_MAPS_DAILY_QUOTA,
+        max_wait=settings.GOOGLE_MAPS_MAX_QUEUE_WAIT,
+        cache_alias=settings.GOOGLE_MAPS_RATE_LIMIT_CACHE_ALIAS,
+    )
@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import Error
+
+logger = logging.getLogger(__name__)
+
+class _Call:
+    """
+    An in-flight call whose result is shared by every caller of the same key.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key within a process.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait for it and receive the same result or exception.
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """
+        Runs fn once for all concurrent callers of the given key.
+
+        Args:
+            key (str): The key identifying the call, e.g. a normalized address.
+            fn (callable): The function to run if no call for the key is in flight.
+
+        Returns:
+            The result of fn.
+
+        Raises:
+            Exception: Whatever fn raised, re-raised in every waiting caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    def in_flight(self):
+        """
+        Returns the number of keys with a call in flight.
+        """
+        with self._lock:
+            return len(self._calls)
+
+
+
+class AsyncSingleFlight:
+    """
+    Coalesces concurrent calls for the same key within an event loop.
+
+    The asyncio counterpart of SingleFlight: the first coroutine for a key awaits
+    the function; coroutines arriving while it is in flight await the same result.
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._calls = {}
+
+    async def do(self, key, fn):
+        """
+        Awaits fn() once for all concurrent callers of the given key.
+
+        Args:
+            key (str): The key identifying the call, e.g. a normalized address.
+            fn (callable): A coroutine function to await if no call for the key is in flight.
+
+        Returns:
+            The result of fn.
+
+        Raises:
+            Exception: Whatever fn raised, re-raised in every waiting caller.
+        """
+        loop = asyncio.get_running_loop()
+        call_key = (loop, key)
+
+        call = self._calls.get(call_key)
+        if call is not None:
+            self.coalesced += 1
+            return await asyncio.shield(call)
+
+        call = self._calls[call_key] = loop.create_future()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except Exception as e:
+            call.set_exception(e)
+            # Mark the exception as retrieved in case nobody was waiting for it
+            call.exception()
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            del self._calls[call_key]
+
+    def in_flight(self):
+        """
+        Returns the number of keys with a call in flight.
+        """
+        return len(self._calls)
+
+
+def advisory_lock_id(key):
+    """
+    Maps a key to a signed 64 bit integer usable as a Postgres advisory lock id.
+
+    Args:
+        key (str): The key to lock on.
+
+    Returns:
+        int: The advisory lock id.
+    """
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+@contextmanager
+def advisory_lock(key, using=DEFAULT_DB_ALIAS):
+    """
+    Holds a session-level Postgres advisory lock on the given key, so that only one
+    process at a time works on it. The lock is taken and released with statements of
+    their own, so that no transaction stays open while it is held, e.g. across a Google
+    call. Session-level locks need a connection of their own for the whole session, so
+    disable the lock behind a pooler in transaction pooling mode, e.g. pgbouncer's.
+
+    The lock is skipped on other database vendors, when GEOCODE_ADVISORY_LOCK is
+    disabled, or when it cannot be acquired.
+
+    Args:
+        key (str): The key to lock on.
+        using (str): The database alias to lock on.
+
+    Yields:
+        bool: Whether the lock is held.
+    """
+    connection = connections[using]
+    if not settings.GEOCODE_ADVISORY_LOCK or connection.vendor != "postgresql":
+        yield False
+        return
+
+    lock_id = advisory_lock_id(key)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [lock_id])
+    except Error as e:
+        # Fail silently
+        logger.error("Error acquiring advisory lock: %s", e)
+        locked = False
+    else:
+        locked = True
+
+    try:
+        yield locked
+    finally:
+        if locked:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_unlock(%s)", [lock_id])
+            except Error as e:
+                # The lock is released with the session at the latest
+                logger.error("Error releasing advisory lock: %s", e)
@@ -0,0 +1,321 @@
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Snapshot layout, little-endian, with every array aligned to 8 bytes:
+#   header:   magic, version, float size (4 or 8), entry count, string table size
+#   keys:     uint64[count], blake2b hashes of the normalized addresses, sorted
+#   lats:     float32/float64[count]
+#   longs:    float32/float64[count]
+#   starts:   uint64[count], offset of each entry's strings in the string table
+#   lengths:  uint32[count], length of each entry's strings
+#   strings:  per entry, "normalized\0input\0formatted" in UTF-8
+MAGIC = b"GEOSNAP\0"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQ")
+
+
+def snapshot_key(normalized_address):
+    """
+    Hashes a normalized address to the unsigned 64 bit key it is sorted and looked up by.
+
+    Args:
+        normalized_address (str): The normalized address.
+
+    Returns:
+        int: The key.
+    """
+    digest = hashlib.blake2b(normalized_address.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _padding(size):
+    return -size % 8
+
+
+def write_snapshot(path, entries, dtype=np.float64):
+    """
+    Writes geocoded addresses to a snapshot file. The file is written next to the
+    destination and renamed over it, so readers never see a partial snapshot.
+
+    Entries are streamed: only the keys and coordinates are held in memory, the
+    strings go to a temporary file until the entries are sorted.
+
+    Args:
+        path (str): The snapshot file to write.
+        entries (iterable): Tuples of normalized address, input address, formatted address,
+            latitude and longitude, with unique normalized addresses.
+        dtype (numpy.dtype): The float type of the coordinates, float32 or float64.
+
+    Returns:
+        int: The number of entries written.
+    """
+    dtype = np.dtype(dtype).newbyteorder("<")
+    keys, latitudes, longitudes, starts, lengths = array("Q"), array("d"), array("d"), array("Q"), array("I")
+
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.TemporaryFile(dir=directory) as strings:
+        offset = 0
+        for normalized_address, input_address, formatted_address, latitude, longitude in entries:
+            record = "\0".join((normalized_address, input_address, formatted_address)).encode("utf-8")
+            strings.write(record)
+            keys.append(snapshot_key(normalized_address))
+            latitudes.append(latitude)
+            longitudes.append(longitude)
+            starts.append(offset)
+            lengths.append(len(record))
+            offset += len(record)
+
+        count = len(keys)
+        order = np.argsort(np.frombuffer(keys, dtype="<u8"), kind="stable")
+
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as snapshot:
+            try:
+                snapshot.write(HEADER.pack(MAGIC, VERSION, dtype.itemsize, count, offset))
+                for values, values_dtype in (
+                    (keys, "<u8"), (latitudes, dtype), (longitudes, dtype), (starts, "<u8"), (lengths, "<u4")
+                ):
+                    column = np.frombuffer(values, dtype=values.typecode)[order].astype(values_dtype)
+                    snapshot.write(column.tobytes())
+                    snapshot.write(b"\0" * _padding(column.nbytes))
+
+                strings.seek(0)
+                while True:
+                    block = strings.read(1 << 20)
+                    if not block:
+                        break
+                    snapshot.write(block)
+
+                snapshot.flush()
+                os.fsync(snapshot.fileno())
+            except BaseException:
+                os.unlink(snapshot.name)
+                raise
+
+    os.replace(snapshot.name, path)
+    return count
+
+
+class SnapshotReader:
+    """
+    Reads a snapshot file through a read-only memory map. Lookups binary search the
+    sorted keys in place, so the file is never loaded into the process, and the pages
+    are shared by every process on the host that maps the same file.
+    """
+
+    def __init__(self, path):
+        """
+        Opens a snapshot file.
+
+        Args:
+            path (str): The snapshot file.
+
+        Raises:
+            ValueError: If the file is not a snapshot.
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            self.identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else None
+
+        if self._mmap is None or len(self._mmap) < HEADER.size:
+            raise ValueError(f"Not a geocode snapshot: {path}")
+
+        magic, version, float_size, count, strings_size = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION or float_size not in (4, 8):
+            raise ValueError(f"Not a geocode snapshot: {path}")
+
+        self.count = count
+        float_dtype = np.dtype(f"<f{float_size}")
+        offset = HEADER.size
+
+        def column(dtype):
+            nonlocal offset
+            values = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+            offset += values.nbytes + _padding(values.nbytes)
+            return values
+
+        self.keys = column("<u8")
+        self.latitudes = column(float_dtype)
+        self.longitudes = column(float_dtype)
+        self.starts = column("<u8")
+        self.lengths = column("<u4")
+        self.strings_offset = offset
+
+        if offset + strings_size > len(self._mmap):
+            raise ValueError(f"Truncated geocode snapshot: {path}")
+
+    def record(self, index):
+        """
+        Returns the strings of an entry.
+
+        Args:
+            index (int): The position of the entry.
+
+        Returns:
+            tuple: The normalized, input and formatted addresses.
+        """
+        start = self.strings_offset + int(self.starts[index])
+        return tuple(self._mmap[start:start + int(self.lengths[index])].decode("utf-8").split("\0"))
+
+    def get(self, normalized_address):
+        """
+        Looks up a normalized address.
+
+        Args:
+            normalized_address (str): The normalized address.
+
+        Returns:
+            tuple: The formatted address, latitude and longitude, or None if the address is not in the snapshot.
+        """
+        key = np.uint64(snapshot_key(normalized_address))
+        index = int(np.searchsorted(self.keys, key))
+        # Keys are hashes, so compare the address of every entry with the same key
+        while index < self.count and self.keys[index] == key:
+            normalized, _, formatted_address = self.record(index)
+            if normalized == normalized_address:
+                return formatted_address, float(self.latitudes[index]), float(self.longitudes[index])
+            index += 1
+        return None
+
+    def __iter__(self):
+        """
+        Yields every entry as a tuple of normalized address, input address, formatted address,
+        latitude and longitude, in key order.
+        """
+        for index in range(self.count):
+            normalized_address, input_address, formatted_address = self.record(index)
+            yield (
+                normalized_address, input_address, formatted_address,
+                float(self.latitudes[index]), float(self.longitudes[index])
+            )
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        """
+        Unmaps the file. The arrays viewing the map are dropped first, as a map cannot be closed while viewed.
+        """
+        self.keys = self.latitudes = self.longitudes = self.starts = self.lengths = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+class SnapshotLookup:
+    """
+    A read-only geocode lookup tier backed by a memory-mapped snapshot file.
+
+    Every worker process on a host maps the same file, so the entries are held in
+    memory once, in the page cache. The file is checked every check_interval seconds,
+    and when a new snapshot has been published over it (e.g. by export_geocode_snapshot,
+    which renames the new file into place) it is mapped and swapped in atomically.
+    Lookups in flight keep using the snapshot they started with.
+    """
+
+    def __init__(self, path, check_interval):
+        """
+        Creates a new SnapshotLookup.
+
+        Args:
+            path (str): The snapshot file. None disables the tier.
+            check_interval (float): The number of seconds between checks for a new snapshot.
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self._reader = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def reader(self):
+        """
+        Returns the reader of the current snapshot, mapping a new one if it was published since the last check.
+
+        Returns:
+            SnapshotReader: The reader, or None if there is no readable snapshot.
+        """
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return self._reader
+
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return self._reader
+            self._checked_at = now
+
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                if self._reader is not None:
+                    logger.error("Geocode snapshot %s is gone, keeping the mapped one", self.path)
+                return self._reader
+
+            identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+            if self._reader is not None and self._reader.identity == identity:
+                return self._reader
+
+            try:
+                reader = SnapshotReader(self.path)
+            except (OSError, ValueError) as e:
+                logger.error("Error loading geocode snapshot: %s", e)
+                return self._reader
+
+            # The previous map is released once no lookup uses it any more
+            self._reader = reader
+            self.reloads += 1
+            logger.info("Loaded geocode snapshot %s with %s entries", self.path, len(reader))
+            return reader
+
+    def get(self, key):
+        """
+        Returns the location held by the snapshot for the given key.
+
+        Args:
+            key (str): The normalized address.
+
+        Returns:
+            tuple: The formatted address, latitude and longitude, or None if the key is not in the snapshot.
+        """
+        if not self.enabled:
+            return None
+
+        reader = self.reader()
+        value = reader.get(key) if reader is not None else None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def stats(self):
+        """
+        Returns the lookup counters.
+
+        Returns:
+            dict: The number of entries in the current snapshot, hits, misses and reloads.
+        """
+        return {
+            "size": len(self._reader) if self._reader is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+        }
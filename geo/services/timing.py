@@ -0,0 +1,183 @@
+import contextlib
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# The timer of the request being served, or None when stages are not timed
+_current_timer = contextvars.ContextVar("stage_timer", default=None)
+
+# Returned by stage() when no timer is running, so that untimed stages cost a context variable lookup
+_UNTIMED = contextlib.nullcontext()
+
+
+class StageTimer:
+    """
+    A thread-safe accumulator of the time a request spends in each stage, e.g. the cache read
+    or the Google call. A stage entered several times, or from several threads at once, adds
+    up, so the time of a stage may exceed the duration of the request.
+    """
+
+    def __init__(self):
+        """
+        Creates a new StageTimer with no stages.
+        """
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, duration):
+        """
+        Adds the duration of a stage.
+
+        Args:
+            name (str): The name of the stage.
+            duration (float): The duration in seconds.
+        """
+        with self._lock:
+            total, count = self._stages.get(name, (0.0, 0))
+            self._stages[name] = (total + duration, count + 1)
+
+    def timings(self):
+        """
+        Returns the stages timed so far.
+
+        Returns:
+            dict: The total duration in milliseconds and the number of times of every stage,
+                keyed by name, in the order they were first recorded.
+        """
+        with self._lock:
+            return {
+                name: {"duration_ms": round(total * 1000, 3), "count": count}
+                for name, (total, count) in self._stages.items()
+            }
+
+    def server_timing(self):
+        """
+        Formats the stages timed so far as the value of a Server-Timing header.
+
+        Returns:
+            str: A metric per stage with its total duration in milliseconds, e.g. "google;dur=85.2".
+        """
+        return ", ".join(
+            f"{name};dur={timing['duration_ms']:.1f}" for name, timing in self.timings().items()
+        )
+
+
+class _Stage:
+    """
+    Times a block of code into a StageTimer.
+    """
+
+    __slots__ = ("timer", "name", "started")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timer.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def start_timer():
+    """
+    Starts timing the stages of the current context, e.g. of a request.
+
+    Returns:
+        tuple: The new StageTimer, and the token to pass to stop_timer().
+    """
+    timer = StageTimer()
+    return timer, _current_timer.set(timer)
+
+
+def stop_timer(token):
+    """
+    Stops timing the stages of the current context, restoring the timer that ran before start_timer().
+
+    Args:
+        token (contextvars.Token): The token returned by start_timer().
+    """
+    _current_timer.reset(token)
+
+
+def current_timer():
+    """
+    Returns the timer of the current context.
+
+    Returns:
+        StageTimer: The running timer, or None if stages are not timed.
+    """
+    return _current_timer.get()
+
+
+def stage(name):
+    """
+    Times a block of code as a stage of the running timer:
+
+        with stage("cache_read"):
+            ...
+
+    Args:
+        name (str): The name of the stage.
+
+    Returns:
+        A context manager, which does nothing if no timer is running.
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        return _UNTIMED
+    return _Stage(timer, name)
+
+
+def timed(name):
+    """
+    Decorates a function, or a coroutine function, to time every call as a stage of the running timer.
+
+    Args:
+        name (str): The name of the stage.
+
+    Returns:
+        function: The decorator.
+    """
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            timer = _current_timer.get()
+            if timer is None:
+                return fn(*args, **kwargs)
+            with _Stage(timer, name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    A ThreadPoolExecutor that runs every task in a copy of the context it was submitted from,
+    the way asyncio runs callbacks, so that the stages of a task are timed on the timer of
+    the request that submitted it.
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+    def submit_detached(self, fn, /, *args, **kwargs):
+        """
+        Submits a background task, which may outlive the request submitting it, to run in
+        a fresh context, so that its stages are not timed on a timer already reported.
+        """
+        return super().submit(contextvars.Context().run, fn, *args, **kwargs)
@@ -1,4 +1,75 @@
 import math
+import re
+import unicodedata
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+# Prefix of the cache keys of reverse geocoded locations
+REVERSE_GEOCODE_KEY_PREFIX = "latlng:"
+
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s]+")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_address(address):
+    """
+    Builds the canonical cache key for an address.
+
+    The key is casefolded, has punctuation replaced by whitespace and runs of
+    whitespace collapsed, so that "India Gate", " india  gate " and "India-Gate."
+    all map to the same key.
+
+    Args:
+        address (str): The address as entered by the user.
+
+    Returns:
+        str: The normalized address key.
+    """
+    if address is None:
+        return None
+
+    address = unicodedata.normalize("NFKC", address).casefold()
+    address = _PUNCTUATION_PATTERN.sub(" ", address)
+    return _WHITESPACE_PATTERN.sub(" ", address).strip()
+
+def reverse_geocode_key(latitude, longitude, grid_size):
+    """
+    Builds the cache key of a location to reverse geocode: the location snapped to a grid
+    of grid_size degrees, so that every location of a grid cell shares the key.
+
+    Normalized addresses never hold a colon, so the keys can share the GeocodeCache
+    table with them without colliding.
+
+    Args:
+        latitude (float): The latitude in degrees.
+        longitude (float): The longitude in degrees.
+        grid_size (float): The size of the grid cells in degrees.
+
+    Returns:
+        str: The cache key.
+    """
+    # Adding 0.0 turns -0.0 into 0.0, so both sides of the equator and meridian share the cell's key
+    latitude = round(latitude / grid_size) * grid_size + 0.0
+    longitude = round(longitude / grid_size) * grid_size + 0.0
+    return f"{REVERSE_GEOCODE_KEY_PREFIX}{latitude:.7f},{longitude:.7f}"
+
+def parse_reverse_geocode_key(key):
+    """
+    Returns the location of a reverse geocoding cache key.
+
+    Args:
+        key (str): The cache key, or an address.
+
+    Returns:
+        tuple: The latitude and longitude of the grid cell, or None if the key is not a reverse geocoding key.
+    """
+    if not key or not key.startswith(REVERSE_GEOCODE_KEY_PREFIX):
+        return None
+
+    latitude, longitude = key[len(REVERSE_GEOCODE_KEY_PREFIX):].split(",")
+    return float(latitude), float(longitude)
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     """
@@ -13,9 +84,9 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     Returns:
         float: The haversine distance between the two points in kilometers.
     """
-    if any([value is None for value in [lat1, lat2, lon1, lon2]]):
+    if lat1 is None or lon1 is None or lat2 is None or lon2 is None:
         return None
-    
+
     # Convert latitude and longitude from degrees to radians
     lat1_rad = math.radians(lat1)
     lon1_rad = math.radians(lon1)
@@ -27,6 +98,60 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     dlat = lat2_rad - lat1_rad
     a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon/2)**2
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    distance = 6371 * c  # Earth radius in kilometers
+    distance = EARTH_RADIUS_KM * c
 
     return distance
+
+
+def haversine_distances(lats1, lons1, lats2, lons2, dtype=np.float64):
+    """
+    Calculate the haversine distance between many pairs of points at once.
+
+    The inputs are broadcast against each other like any NumPy operation, so the
+    same function computes pairwise distances (four arrays of equal length) or
+    one point against many (a scalar and an array).
+
+    Args:
+        lats1 (array-like of float): Latitudes of the first points in degrees.
+        lons1 (array-like of float): Longitudes of the first points in degrees.
+        lats2 (array-like of float): Latitudes of the second points in degrees.
+        lons2 (array-like of float): Longitudes of the second points in degrees.
+        dtype (numpy.dtype): The float type used for the computation and the result,
+            numpy.float64 (default) or numpy.float32.
+
+    Returns:
+        numpy.ndarray: The haversine distances in kilometers. Pairs with a missing
+            (None or NaN) coordinate are NaN.
+    """
+    lat1, lon1, lat2, lon2 = (
+        np.radians(np.asarray(values, dtype=dtype)) for values in (lats1, lons1, lats2, lons2)
+    )
+
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return (2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))).astype(dtype, copy=False)
+
+
+def haversine_matrix(lats1, lons1, lats2, lons2, dtype=np.float64):
+    """
+    Calculate the haversine distance between every pair of points from two sets of points.
+
+    Args:
+        lats1 (sequence of float): Latitudes of the first set of points in degrees.
+        lons1 (sequence of float): Longitudes of the first set of points in degrees.
+        lats2 (sequence of float): Latitudes of the second set of points in degrees.
+        lons2 (sequence of float): Longitudes of the second set of points in degrees.
+        dtype (numpy.dtype): The float type used for the computation and the result.
+
+    Returns:
+        numpy.ndarray: An M x N matrix of distances in kilometers, where M and N are the sizes
+            of the first and second set. Rows or columns of points with a missing coordinate are NaN.
+    """
+    return haversine_distances(
+        np.asarray(lats1, dtype=dtype)[:, np.newaxis],
+        np.asarray(lons1, dtype=dtype)[:, np.newaxis],
+        np.asarray(lats2, dtype=dtype)[np.newaxis, :],
+        np.asarray(lons2, dtype=dtype)[np.newaxis, :],
+        dtype=dtype,
+    )
@@ -0,0 +1,153 @@
+import atexit
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindBuffer:
+    """
+    Collects writes in memory and hands them to a writer function in batches, from a
+    background thread, so that the callers do not wait for the write.
+
+    Writes are keyed: a write replaces a pending write with the same key, so a batch never
+    holds the same key twice. The buffer is flushed once it holds batch_size writes, or
+    flush_interval seconds after the oldest pending write, and at interpreter exit.
+    Writes are only buffered up to max_size; beyond that put() refuses them, and the
+    caller is expected to write synchronously.
+    """
+
+    def __init__(self, write, batch_size, flush_interval, max_size):
+        """
+        Creates a new WriteBehindBuffer.
+
+        Args:
+            write (callable): Called with a list of pending writes. Errors are logged and the writes dropped.
+            batch_size (int): The number of pending writes that triggers a flush.
+            flush_interval (float): The longest a write stays pending, in seconds.
+            max_size (int): The maximum number of pending writes.
+        """
+        self.write = write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+
+        self.written = 0
+        self.failed = 0
+        self.rejected = 0
+        self.batches = 0
+        self.max_depth = 0
+        self._pending = {}
+        self._pending_since = None
+        self._closed = False
+        self._thread = None
+        self._condition = threading.Condition()
+
+    def put(self, key, item):
+        """
+        Queues a write.
+
+        Args:
+            key (str): The key of the write. A pending write with the same key is replaced.
+            item: The write, as passed to the writer function.
+
+        Returns:
+            bool: Whether the write was queued. It is not when the buffer is full or closed.
+        """
+        with self._condition:
+            if self._closed or (key not in self._pending and len(self._pending) >= self.max_size):
+                self.rejected += 1
+                return False
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending[key] = item
+            self.max_depth = max(self.max_depth, len(self._pending))
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify()
+            return True
+
+    def _take(self):
+        # Waits until a batch is due, then takes it. Returns None once closed and drained.
+        with self._condition:
+            while True:
+                if self._pending:
+                    waited = time.monotonic() - self._pending_since
+                    if self._closed or len(self._pending) >= self.batch_size or waited >= self.flush_interval:
+                        break
+                    self._condition.wait(self.flush_interval - waited)
+                elif self._closed:
+                    return None
+                else:
+                    self._condition.wait()
+
+            batch = list(self._pending.values())[:self.batch_size]
+            for key in list(self._pending)[:self.batch_size]:
+                del self._pending[key]
+            self._pending_since = time.monotonic() if self._pending else None
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            self._flush(batch)
+
+    def _flush(self, batch):
+        started_at = time.monotonic()
+        try:
+            self.write(batch)
+        except Exception as e:
+            with self._condition:
+                self.failed += len(batch)
+            logger.error("Error writing %s buffered writes: %s", len(batch), e)
+            return
+
+        with self._condition:
+            self.written += len(batch)
+            self.batches += 1
+            depth = len(self._pending)
+        logger.info(
+            "Wrote %s buffered writes in %.3fs, %s still pending", len(batch), time.monotonic() - started_at, depth
+        )
+
+    def close(self, timeout=None):
+        """
+        Stops accepting writes and waits for the pending ones to be written.
+
+        Args:
+            timeout (float): The longest to wait, in seconds. None waits until done.
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+            thread = self._thread
+
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self):
+        """
+        Returns the buffer counters.
+
+        Returns:
+            dict: The current and highest number of pending writes, the writes written,
+                failed and rejected, and the number of batches written.
+        """
+        with self._condition:
+            return {
+                "depth": len(self._pending),
+                "max_depth": self.max_depth,
+                "written": self.written,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "batches": self.batches,
+            }
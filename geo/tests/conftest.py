@@ -0,0 +1,30 @@
+from unittest.mock import patch
+
+import pytest
+
+from api import settings
+from geo.serializers import geocode_hits
+from geo.services.timing import ContextThreadPoolExecutor
+
+
+@pytest.fixture(autouse=True)
+def geocode_executor():
+    # A pool per test, so that no worker thread keeps a database connection from one test to the next,
+    # where database access may be blocked
+    executor = ContextThreadPoolExecutor(max_workers=settings.GEOCODE_THREAD_POOL_SIZE, thread_name_prefix="geocode")
+    batch_executor = ContextThreadPoolExecutor(
+        max_workers=settings.GEOCODE_BATCH_THREAD_POOL_SIZE, thread_name_prefix="geocode-batch"
+    )
+    with patch("geo.serializers.geocode_executor", executor), \
+            patch("geo.serializers.batch_geocode_executor", batch_executor), \
+            patch("geo.management.commands.refresh_geocode_cache.geocode_executor", executor):
+        yield executor
+    batch_executor.shutdown(wait=True)
+    executor.shutdown(wait=True)
+
+
+@pytest.fixture(autouse=True)
+def drain_geocode_hits():
+    # Hits left over are flushed at exit, once the test database is gone
+    yield
+    geocode_hits.drain()
@@ -2,6 +2,14 @@ import pytest
 from requests_mock import Mocker
 from rest_framework.test import APIClient
 
+from geo.serializers import local_geocode_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_local_geocode_cache():
+    local_geocode_cache.clear()
+    yield
+    local_geocode_cache.clear()
 
 @pytest.fixture
 def invalid_geocode_response():
@@ -1,11 +1,18 @@
 import json
+import time
+from datetime import timedelta
+from unittest.mock import patch
 
 import pytest
 import requests_mock
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.exceptions import ErrorDetail
 
-from geo.models import GeocodeCache
+from geo.models import GeocodeCache, Place
+from geo.serializers import stale_refreshes, write_geocoded_addresses
+from geo.services.fuzzy import FuzzyMatchStats, TrigramIndex
+from geo.services.writebehind import WriteBehindBuffer
 
 DISTANCE_URL = reverse("distance")
 
@@ -118,9 +125,7 @@ class TestDistanceAPI:
         GeocodeCache.objects.all().delete()
         GeocodeCache.objects.create(
             input_address=from_address,
-            formatted_address=from_address,
-            latitude=37.7749295,
-            longitude=-122.4194155,
+            place=Place.objects.create(formatted_address=from_address, latitude=37.7749295, longitude=-122.4194155),
         )
 
         # Setting up mock request to google
@@ -179,3 +184,252 @@ class TestDistanceAPI:
         GeocodeCache.objects.count() == 2
         GeocodeCache.objects.filter(input_address=from_address).exists()
         GeocodeCache.objects.filter(input_address=destination_address).exists()
+
+    @pytest.mark.django_db(transaction=True)
+    @requests_mock.Mocker(kw="request_mocker")
+    def test_distance_api_server_timing(self, api_client, settings, **kwargs):
+        """
+        Scenario:
+            - A request is made for a cached and an uncached address while SERVER_TIMING is enabled.
+        Expectation:
+            - The response has a Server-Timing header with every stage of the request, the Google
+              call and cache write of the destination included, although they ran on a worker thread.
+            - The timings are logged as structured fields.
+        """
+        settings.SERVER_TIMING = True
+        GeocodeCache.objects.all().delete()
+        GeocodeCache.objects.create(
+            input_address="123 Main St",
+            place=Place.objects.create(formatted_address="123 Main St", latitude=37.7749295, longitude=-122.4194155),
+        )
+
+        request_mocker = kwargs.get("request_mocker")
+        request_mocker.get(
+            "https://maps.googleapis.com/maps/api/geocode/json?address=456+Elm+St",
+            json={
+                "results": [
+                    {"formatted_address": "456 Elm St", "geometry": {"location": {"lat": 37.7849295, "lng": -122.4594155}}}
+                ],
+                "status": "OK",
+            },
+        )
+
+        with patch("geo.middleware.logger") as mock_logger:
+            response = api_client.post(
+                DISTANCE_URL,
+                data=json.dumps({"from_address": "123 Main St", "destination_address": "456 Elm St"}),
+                content_type="application/json",
+            )
+
+        assert response.status_code == 200
+        stages = [metric.split(";")[0] for metric in response["Server-Timing"].split(", ")]
+        assert sorted(stages) == ["cache_read", "cache_write", "google", "haversine", "total", "validate"]
+
+        timings = mock_logger.info.call_args.kwargs["extra"]["timings"]
+        assert timings["validate"]["count"] == 2
+        assert timings["cache_read"]["count"] == 2
+        assert timings["google"]["count"] == 1
+        assert timings["total"]["duration_ms"] > 0
+
+    @pytest.mark.django_db(transaction=True)
+    @requests_mock.Mocker(kw="request_mocker")
+    def test_distance_api_normalized_cache_hit(self, api_client, **kwargs):
+        """
+        Scenario:
+            - Both addresses are cached, but are requested with different casing, spacing and punctuation.
+        Expectation:
+            - The API returns a 200 OK response served from the cache.
+            - The geocode API is not called.
+        """
+        GeocodeCache.objects.all().delete()
+        GeocodeCache.objects.create(
+            input_address="123 Main St",
+            place=Place.objects.create(formatted_address="123 Main St", latitude=37.7749295, longitude=-122.4194155),
+        )
+        GeocodeCache.objects.create(
+            input_address="456 Elm St",
+            place=Place.objects.create(formatted_address="456 Elm St", latitude=37.7849295, longitude=-122.4594155),
+        )
+
+        request_mocker = kwargs.get("request_mocker")
+
+        response = api_client.post(
+            DISTANCE_URL,
+            data=json.dumps(
+                {
+                    "from_address": "  123 MAIN st. ",
+                    "destination_address": "456 elm-St",
+                }
+            ),
+            content_type="application/json",
+        )
+
+        assert response.status_code == 200
+        assert response.data["distance"] == 3.6870713647672746
+        assert request_mocker.call_count == 0
+
+    @pytest.mark.django_db(transaction=True)
+    @requests_mock.Mocker(kw="request_mocker")
+    def test_distance_api_fuzzy_match(self, api_client, **kwargs):
+        """
+        Scenario:
+            - Fuzzy matching is enabled, and an address is requested with a typo.
+            - Another misspelled address is similar to two cached addresses of different places.
+        Expectation:
+            - The misspelled address is served from the similar cached address, without calling Google.
+            - The ambiguous address is geocoded by Google.
+            - Both lookups are counted.
+        """
+        GeocodeCache.objects.all().delete()
+        for input_address, formatted_address, latitude, longitude in [
+            ("Qutub Minar", "Qutub Minar, Mehrauli, New Delhi", 28.5244754, 77.1854559),
+            ("India Gate", "India Gate, New Delhi", 28.612912, 77.2295097),
+            ("Springfield Mall", "Springfield Mall, Springfield, VA", 38.7743, -77.1739),
+            ("Springfield Mall IL", "Springfield Mall, Springfield, IL", 39.7817, -89.6501),
+        ]:
+            GeocodeCache.objects.create(
+                input_address=input_address,
+                place=Place.objects.create(formatted_address=formatted_address, latitude=latitude, longitude=longitude),
+            )
+
+        request_mocker = kwargs.get("request_mocker")
+        request_mocker.get(
+            "https://maps.googleapis.com/maps/api/geocode/json?address=Springfeld+Mall",
+            json={
+                "results": [
+                    {
+                        "formatted_address": "Springfield Mall, Springfield, VA",
+                        "geometry": {"location": {"lat": 38.7743, "lng": -77.1739}},
+                    }
+                ],
+                "status": "OK",
+            },
+        )
+
+        matches = FuzzyMatchStats()
+        with patch("api.settings.GEOCODE_FUZZY_MATCH", True), \
+                patch("geo.serializers.fuzzy_index", TrigramIndex()), \
+                patch("geo.serializers.fuzzy_matches", matches):
+            response = api_client.post(
+                DISTANCE_URL,
+                data=json.dumps({"from_address": "Qutb Minar", "destination_address": "India Gate"}),
+                content_type="application/json",
+            )
+
+            assert response.status_code == 200
+            assert response.data["from_address"] == {
+                "original": "Qutb Minar",
+                "formatted": "Qutub Minar, Mehrauli, New Delhi",
+                "lat": 28.5244754,
+                "long": 77.1854559,
+            }
+            assert request_mocker.call_count == 0
+
+            response = api_client.post(
+                DISTANCE_URL,
+                data=json.dumps({"from_address": "Springfeld Mall", "destination_address": "India Gate"}),
+                content_type="application/json",
+            )
+
+            assert response.status_code == 200
+            assert request_mocker.call_count == 1
+            assert GeocodeCache.objects.filter(normalized_address="springfeld mall").exists()
+
+        assert matches.stats() == {"matched": 1, "no_candidate": 0, "ambiguous": 1, "stale": 0}
+
+    @pytest.mark.django_db(transaction=True)
+    @requests_mock.Mocker(kw="request_mocker")
+    def test_distance_api_stale_while_revalidate(self, api_client, **kwargs):
+        """
+        Scenario:
+            - Both addresses are cached, but the origin's entry has expired.
+        Expectation:
+            - The API returns a 200 OK response with the stale origin, without waiting for Google.
+            - The origin's entry is refreshed in the background.
+        """
+        GeocodeCache.objects.all().delete()
+        GeocodeCache.objects.create(
+            input_address="123 Main St",
+            place=Place.objects.create(formatted_address="123 Main St", latitude=37.7749295, longitude=-122.4194155),
+        )
+        GeocodeCache.objects.create(
+            input_address="456 Elm St",
+            place=Place.objects.create(formatted_address="456 Elm St", latitude=37.7849295, longitude=-122.4594155),
+        )
+        GeocodeCache.objects.filter(input_address="123 Main St").update(
+            expires_at=timezone.now() - timedelta(hours=1)
+        )
+
+        request_mocker = kwargs.get("request_mocker")
+        request_mocker.get(
+            "https://maps.googleapis.com/maps/api/geocode/json?address=123+Main+St",
+            json={
+                "results": [
+                    {
+                        "formatted_address": "123 Main Street",
+                        "geometry": {"location": {"lat": 37.7749, "lng": -122.4194}},
+                    }
+                ],
+                "status": "OK",
+            },
+        )
+
+        response = api_client.post(
+            DISTANCE_URL,
+            data=json.dumps({"from_address": "123 Main St", "destination_address": "456 Elm St"}),
+            content_type="application/json",
+        )
+
+        assert response.status_code == 200
+        assert response.data["from_address"]["formatted"] == "123 Main St"
+        assert response.data["distance"] == 3.6870713647672746
+
+        # Wait for the background refresh
+        deadline = time.monotonic() + 5
+        while stale_refreshes and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        refreshed_address = GeocodeCache.objects.get(input_address="123 Main St")
+        assert refreshed_address.place.formatted_address == "123 Main Street"
+        assert refreshed_address.created_at > timezone.now() - timedelta(minutes=1)
+        assert refreshed_address.expires_at is None
+        assert GeocodeCache.objects.count() == 2
+        assert request_mocker.call_count == 1
+
+    @pytest.mark.django_db(transaction=True)
+    @requests_mock.Mocker(kw="request_mocker")
+    def test_distance_api_write_behind(self, api_client, **kwargs):
+        """
+        Scenario:
+            - A request is made for two uncached addresses while GEOCODE_WRITE_BEHIND is enabled.
+        Expectation:
+            - The API responds before the geocoded addresses are cached in the database.
+            - Both addresses are cached in one batch once the buffer is flushed.
+        """
+        GeocodeCache.objects.all().delete()
+        request_mocker = kwargs.get("request_mocker")
+        for address, lat, lng in [("123 Main St", 37.7749295, -122.4194155), ("456 Elm St", 37.7849295, -122.4594155)]:
+            request_mocker.get(
+                f"https://maps.googleapis.com/maps/api/geocode/json?address={address.replace(' ', '+')}",
+                json={
+                    "results": [{"formatted_address": address, "geometry": {"location": {"lat": lat, "lng": lng}}}],
+                    "status": "OK",
+                },
+            )
+
+        buffer = WriteBehindBuffer(write_geocoded_addresses, batch_size=100, flush_interval=60, max_size=100)
+        with patch("api.settings.GEOCODE_WRITE_BEHIND", True), patch("geo.serializers.geocode_writes", buffer):
+            response = api_client.post(
+                DISTANCE_URL,
+                data=json.dumps({"from_address": "123 Main St", "destination_address": "456 Elm St"}),
+                content_type="application/json",
+            )
+
+            assert response.status_code == 200
+            assert response.data["distance"] == 3.6870713647672746
+            assert GeocodeCache.objects.count() == 0
+
+            buffer.close(timeout=5)
+
+        assert sorted(GeocodeCache.objects.values_list("normalized_address", flat=True)) == ["123 main st", "456 elm st"]
+        assert buffer.stats()["batches"] == 1
@@ -0,0 +1,127 @@
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import Client
+from django.urls import reverse
+
+from geo.models import GeocodeCache, Place
+
+DISTANCE_ASYNC_URL = reverse("distance-async")
+
+
+@pytest.fixture
+def post(async_client):
+    @async_to_sync
+    async def post(data):
+        return await async_client.post(
+            DISTANCE_ASYNC_URL, data=json.dumps(data), content_type="application/json"
+        )
+    return post
+
+
+@pytest.fixture
+def mock_async_google_service():
+    with patch("geo.serializers.AsyncGoogleService") as MockAsyncGoogleService:
+        MockAsyncGoogleService.return_value.geocode = AsyncMock()
+        yield MockAsyncGoogleService.return_value
+
+
+class TestDistanceAsyncAPI:
+
+    def test_method_not_allowed(self, async_client):
+        """
+        Scenario:
+            - A GET request is made to the async distance API.
+        Expectation:
+            - The API returns a 405 Method Not Allowed response.
+        """
+        @async_to_sync
+        async def get():
+            return await async_client.get(DISTANCE_ASYNC_URL)
+
+        response = get()
+        assert response.status_code == 405
+
+    def test_csrf_exempt(self):
+        """
+        Scenario:
+            - A request without a CSRF token is made to the async distance API by a client enforcing CSRF checks.
+        Expectation:
+            - The request is not rejected by the CSRF check, like a request to the distance API.
+        """
+        response = Client(enforce_csrf_checks=True).post(
+            DISTANCE_ASYNC_URL,
+            data=json.dumps({"from_address": "invalid&%", "destination_address": "123 Main St"}),
+            content_type="application/json",
+        )
+
+        assert response.status_code == 400
+
+    def test_invalid_from_address(self, post):
+        """
+        Scenario:
+            - A request is made to the async distance API with an invalid from_address.
+        Expectation:
+            - The API returns a 400 Bad Request response.
+        """
+        response = post({"from_address": "invalid&%", "destination_address": "123 Main St"})
+
+        assert response.status_code == 400
+        assert response.json() == {"from_address": ["Invalid from address: invalid&%"]}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_invalid_geocode(self, post, mock_async_google_service):
+        """
+        Scenario:
+            - A request is made to the async distance API and the geocode API call fails.
+        Expectation:
+            - The API returns a 400 Bad Request response.
+        """
+        mock_async_google_service.geocode.return_value = None
+
+        response = post({"from_address": "none", "destination_address": "456 Elm St"})
+
+        assert response.status_code == 400
+        assert response.json() == ["Could not geocode address: none"]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_distance_async_api_success(self, post, mock_async_google_service):
+        """
+        Scenario:
+            - A request is made to the async distance API with one cached and one uncached address.
+        Expectation:
+            - The API returns a 200 OK response with the distance between the addresses.
+            - Only the uncached address is geocoded, and it is cached in the database.
+        """
+        GeocodeCache.objects.all().delete()
+        GeocodeCache.objects.create(
+            input_address="123 Main St",
+            place=Place.objects.create(formatted_address="123 Main St", latitude=37.7749295, longitude=-122.4194155),
+        )
+        mock_async_google_service.geocode.return_value = {
+            "formatted_address": "456 Elm St",
+            "geometry": {"location": {"lat": 37.7849295, "lng": -122.4594155}},
+        }
+
+        response = post({"from_address": "123 Main St", "destination_address": "456 Elm St"})
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "from_address": {
+                "original": "123 Main St",
+                "formatted": "123 Main St",
+                "lat": 37.7749295,
+                "long": -122.4194155,
+            },
+            "destination_address": {
+                "original": "456 Elm St",
+                "formatted": "456 Elm St",
+                "lat": 37.7849295,
+                "long": -122.4594155,
+            },
+            "distance": 3.6870713647672746,
+        }
+        mock_async_google_service.geocode.assert_awaited_once_with("456 Elm St")
+        assert GeocodeCache.objects.filter(normalized_address="456 elm st").exists()
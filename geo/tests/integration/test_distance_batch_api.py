@@ -0,0 +1,119 @@
+import json
+
+import pytest
+import requests_mock
+from django.urls import reverse
+from rest_framework.exceptions import ErrorDetail
+
+from geo.models import GeocodeCache, Place
+
+DISTANCE_BATCH_URL = reverse("distance-batch")
+GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
+
+class TestDistanceBatchAPI:
+
+    def test_empty_body(self, api_client):
+        """
+        Scenario:
+            - A request is made to the batch distance API with an empty body.
+        Expectation:
+            - The API returns a 400 Bad Request response.
+        """
+        response = api_client.post(
+            DISTANCE_BATCH_URL, data={}, content_type="application/json"
+        )
+        assert response.data == {
+            "pairs": [ErrorDetail(string="This field is required.", code="required")],
+        }
+        assert response.status_code == 400
+
+    def test_too_many_pairs(self, api_client):
+        """
+        Scenario:
+            - A request is made to the batch distance API with more pairs than allowed.
+        Expectation:
+            - The API returns a 400 Bad Request response.
+        """
+        pair = {"from_address": "123 Main St", "destination_address": "456 Elm St"}
+
+        response = api_client.post(
+            DISTANCE_BATCH_URL,
+            data=json.dumps({"pairs": [pair] * 1001}),
+            content_type="application/json",
+        )
+        assert response.status_code == 400
+        assert "pairs" in response.data
+
+    @pytest.mark.django_db(transaction=True)
+    @requests_mock.Mocker(kw="request_mocker")
+    def test_distance_batch_api_success(self, api_client, **kwargs):
+        """
+        Scenario:
+            - A request is made to the batch distance API with valid, invalid and ungeocodable pairs.
+            - One address is cached and repeated across pairs.
+        Expectation:
+            - The API returns a 200 OK response with per-pair results and errors in input order.
+            - Each uncached address is geocoded once.
+            - The geocoded addresses are cached in the database.
+        """
+        GeocodeCache.objects.all().delete()
+        GeocodeCache.objects.create(
+            input_address="123 Main St",
+            place=Place.objects.create(formatted_address="123 Main St", latitude=37.7749295, longitude=-122.4194155),
+        )
+
+        request_mocker = kwargs.get("request_mocker")
+        request_mocker.get(
+            f"{GEOCODE_URL}?address=456+Elm+St",
+            json={
+                "results": [
+                    {
+                        "formatted_address": "456 Elm St",
+                        "geometry": {"location": {"lat": 37.7849295, "lng": -122.4594155}},
+                    }
+                ],
+                "status": "OK",
+            },
+        )
+        request_mocker.get(
+            f"{GEOCODE_URL}?address=none",
+            json={"results": [], "status": "ZERO_RESULTS"},
+        )
+
+        response = api_client.post(
+            DISTANCE_BATCH_URL,
+            data=json.dumps(
+                {
+                    "pairs": [
+                        {"from_address": "123 Main St", "destination_address": "456 Elm St"},
+                        {"from_address": "invalid&%", "destination_address": "456 Elm St"},
+                        {"from_address": "123 main st.", "destination_address": "none"},
+                        {"from_address": "456 ELM ST", "destination_address": "123 Main St"},
+                    ]
+                }
+            ),
+            content_type="application/json",
+        )
+
+        assert response.status_code == 200
+
+        results = response.data["results"]
+        assert len(results) == 4
+        assert results[0]["distance"] == 3.6870713647672746
+        assert results[0]["destination_address"]["formatted"] == "456 Elm St"
+        assert results[1] == {
+            "errors": {
+                "from_address": [
+                    ErrorDetail(string="Invalid from address: invalid&%", code="invalid")
+                ]
+            }
+        }
+        assert results[2] == {
+            "errors": [ErrorDetail(string="Could not geocode address: none", code="invalid")]
+        }
+        assert results[3]["distance"] == 3.6870713647672746
+
+        assert request_mocker.call_count == 2
+        assert GeocodeCache.objects.filter(normalized_address="456 elm st").count() == 1
+        assert not GeocodeCache.objects.filter(normalized_address="none").exists()
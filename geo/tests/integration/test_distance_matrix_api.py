@@ -0,0 +1,104 @@
+import json
+
+import numpy as np
+import pytest
+import requests_mock
+from django.urls import reverse
+from rest_framework.exceptions import ErrorDetail
+
+from geo.models import GeocodeCache, Place
+
+DISTANCE_MATRIX_URL = reverse("distance-matrix")
+GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
+
+@pytest.fixture
+def geocoded_addresses():
+    GeocodeCache.objects.all().delete()
+    GeocodeCache.objects.create(
+        input_address="123 Main St",
+        place=Place.objects.create(formatted_address="123 Main St", latitude=37.7749295, longitude=-122.4194155),
+    )
+    GeocodeCache.objects.create(
+        input_address="456 Elm St",
+        place=Place.objects.create(formatted_address="456 Elm St", latitude=37.7849295, longitude=-122.4594155),
+    )
+
+
+class TestDistanceMatrixAPI:
+
+    def test_invalid_addresses(self, api_client):
+        """
+        Scenario:
+            - A request is made to the distance matrix API with an invalid origin and no destinations.
+        Expectation:
+            - The API returns a 400 Bad Request response.
+        """
+        response = api_client.post(
+            DISTANCE_MATRIX_URL,
+            data=json.dumps({"origins": ["invalid&%", "123 Main St"], "destinations": []}),
+            content_type="application/json",
+        )
+        assert response.data == {
+            "origins": [ErrorDetail(string="Invalid origin: invalid&%", code="invalid")],
+            "destinations": [ErrorDetail(string="This list may not be empty.", code="empty")],
+        }
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    @requests_mock.Mocker(kw="request_mocker")
+    def test_distance_matrix_api_json(self, api_client, geocoded_addresses, **kwargs):
+        """
+        Scenario:
+            - A request is made to the distance matrix API with cached and ungeocodable addresses.
+        Expectation:
+            - The API streams a JSON matrix with one row per origin and one column per destination.
+            - Distances involving an ungeocodable address are null.
+        """
+        request_mocker = kwargs.get("request_mocker")
+        request_mocker.get(
+            f"{GEOCODE_URL}?address=none",
+            json={"results": [], "status": "ZERO_RESULTS"},
+        )
+
+        response = api_client.post(
+            DISTANCE_MATRIX_URL,
+            data=json.dumps(
+                {"origins": ["123 Main St", "none"], "destinations": ["456 Elm St", "123 main st", "none"]}
+            ),
+            content_type="application/json",
+        )
+
+        assert response.status_code == 200
+        body = json.loads(b"".join(response.streaming_content))
+
+        assert [origin["original"] for origin in body["origins"]] == ["123 Main St", "none"]
+        assert body["origins"][1]["errors"] == ["Could not geocode address: none"]
+        assert body["destinations"][0]["formatted"] == "456 Elm St"
+        assert body["distances"][0][:2] == [3.6870713647672746, 0.0]
+        assert body["distances"][0][2] is None
+        assert body["distances"][1] == [None, None, None]
+        assert request_mocker.call_count == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_distance_matrix_api_binary(self, api_client, geocoded_addresses):
+        """
+        Scenario:
+            - A request is made to the distance matrix API accepting application/octet-stream.
+        Expectation:
+            - The API streams the matrix as little-endian float32 values in row-major order.
+        """
+        response = api_client.post(
+            DISTANCE_MATRIX_URL,
+            data=json.dumps({"origins": ["123 Main St", "456 Elm St"], "destinations": ["456 Elm St"]}),
+            content_type="application/json",
+            HTTP_ACCEPT="application/octet-stream",
+        )
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/octet-stream"
+        assert response["X-Matrix-Shape"] == "2,1"
+
+        matrix = np.frombuffer(b"".join(response.streaming_content), dtype="<f4").reshape(2, 1)
+        assert matrix[0, 0] == pytest.approx(3.6870713647672746, rel=1e-6)
+        assert matrix[1, 0] == 0
@@ -0,0 +1,82 @@
+import pytest
+
+from geo.models import GeocodeCache, Place
+
+
+class TestGeocodeCacheUpsert:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_upsert(self):
+        """
+        Scenario:
+            - An address is upserted into GeocodeCache, then upserted again, spelled differently,
+              with new coordinates after it was served.
+        Expectation:
+            - The table holds a single entry for the normalized address.
+            - The entry points at the place with the latest coordinates and keeps its hit count.
+        """
+        GeocodeCache.objects.all().delete()
+        Place.objects.all().delete()
+        GeocodeCache.upsert([
+            {"input_address": "India Gate", "formatted_address": "India Gate", "latitude": 28.6, "longitude": 77.2}
+        ])
+        GeocodeCache.objects.update(hit_count=3)
+
+        GeocodeCache.upsert([
+            {"input_address": "india gate.", "formatted_address": "India Gate, Delhi", "latitude": 28.61, "longitude": 77.22}
+        ])
+
+        entry = GeocodeCache.objects.select_related("place").get()
+        assert entry.normalized_address == "india gate"
+        assert (entry.place.formatted_address, entry.place.latitude, entry.place.longitude) == (
+            "India Gate, Delhi", 28.61, 77.22
+        )
+        assert entry.hit_count == 3
+
+    @pytest.mark.django_db(transaction=True)
+    def test_aliases_share_place(self):
+        """
+        Scenario:
+            - Two addresses that Google resolves to the same place are upserted, and the place moves.
+        Expectation:
+            - Both entries point at a single place, whose coordinates are updated once for both.
+        """
+        GeocodeCache.objects.all().delete()
+        Place.objects.all().delete()
+        GeocodeCache.upsert([
+            {"input_address": "India Gate", "formatted_address": "India Gate, Delhi", "latitude": 28.6, "longitude": 77.2},
+            {"input_address": "Kartavya Path", "formatted_address": "India Gate, Delhi", "latitude": 28.6, "longitude": 77.2},
+        ])
+        GeocodeCache.upsert([
+            {"input_address": "India Gate", "formatted_address": "India Gate, Delhi", "latitude": 28.61, "longitude": 77.22}
+        ])
+
+        assert Place.objects.count() == 1
+        assert set(GeocodeCache.objects.values_list("place__latitude", flat=True)) == {28.61}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_places_keyed_by_google_place_id(self):
+        """
+        Scenario:
+            - Two locations Google gives the same formatted address but different place IDs are upserted,
+              then one of them again with a new formatted address.
+        Expectation:
+            - Each location has its own place, the other's coordinates untouched.
+            - The place with the same place ID is updated rather than duplicated.
+        """
+        GeocodeCache.objects.all().delete()
+        Place.objects.all().delete()
+        GeocodeCache.upsert([
+            {"input_address": "latlng:1", "formatted_address": "Unnamed Road, India", "latitude": 28.6,
+             "longitude": 77.2, "google_place_id": "place-1"},
+            {"input_address": "latlng:2", "formatted_address": "Unnamed Road, India", "latitude": 19.0,
+             "longitude": 72.8, "google_place_id": "place-2"},
+        ])
+        GeocodeCache.upsert([
+            {"input_address": "latlng:1", "formatted_address": "Unnamed Road, Delhi, India", "latitude": 28.6,
+             "longitude": 77.2, "google_place_id": "place-1"},
+        ])
+
+        assert sorted(Place.objects.values_list("place_key", "formatted_address", "latitude")) == [
+            ("place-1", "Unnamed Road, Delhi, India", 28.6), ("place-2", "Unnamed Road, India", 19.0)
+        ]
@@ -0,0 +1,47 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from geo.models import GeocodeCache, Place
+from geo.services.snapshot import SnapshotReader
+
+
+class TestGeocodeSnapshot:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_export_import(self, tmp_path):
+        """
+        Scenario:
+            - GeocodeCache is exported to a snapshot, and the snapshot is imported
+              into a table holding one of the addresses.
+        Expectation:
+            - The snapshot holds every entry.
+            - Only the addresses missing from the table are imported, with their coordinates.
+        """
+        GeocodeCache.objects.all().delete()
+        for input_address, latitude in [("India Gate", 28.612912), ("Qutub Minar", 28.5244754)]:
+            GeocodeCache.objects.create(
+                input_address=input_address,
+                place=Place.objects.create(formatted_address=input_address, latitude=latitude, longitude=77.2),
+            )
+        path = str(tmp_path / "geocode.snap")
+
+        out = StringIO()
+        call_command("export_geocode_snapshot", path, stdout=out)
+
+        assert "Exported 2 entries" in out.getvalue()
+        snapshot = SnapshotReader(path)
+        assert snapshot.get("india gate") == ("India Gate", 28.612912, 77.2)
+        snapshot.close()
+
+        GeocodeCache.objects.exclude(input_address="Qutub Minar").delete()
+        Place.objects.filter(formatted_address="Qutub Minar").update(latitude=1.0)
+
+        out = StringIO()
+        call_command("import_geocode_snapshot", path, "--batch-size=1", stdout=out)
+
+        assert "Imported 1 entries" in out.getvalue()
+        assert GeocodeCache.objects.count() == 2
+        assert GeocodeCache.objects.get(normalized_address="india gate").place.latitude == 28.612912
+        assert GeocodeCache.objects.get(normalized_address="qutub minar").place.latitude == 1.0
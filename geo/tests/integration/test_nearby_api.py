@@ -0,0 +1,198 @@
+import json
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.exceptions import ErrorDetail
+
+from geo.models import GeocodeCache, Place
+from geo.services.utils import haversine_distance
+
+NEARBY_URL = reverse("nearby")
+
+PLACES = [
+    ("India Gate", 28.612912, 77.2295097),
+    ("Rashtrapati Bhavan", 28.6143478, 77.1994),
+    ("Qutub Minar", 28.5244754, 77.1854559),
+    ("Taj Mahal", 27.1751448, 78.0421422),
+    ("Gateway of India", 18.9219841, 72.8346543),
+]
+
+
+@pytest.fixture
+def places():
+    GeocodeCache.objects.all().delete()
+    Place.objects.all().delete()
+    for address, latitude, longitude in PLACES:
+        GeocodeCache.objects.create(
+            input_address=address,
+            place=Place.objects.create(formatted_address=address, latitude=latitude, longitude=longitude),
+        )
+
+
+class TestNearbyAPI:
+
+    def test_invalid_query(self, api_client):
+        """
+        Scenario:
+            - Requests are made to the nearby API with both an address and a location, and without a radius or k.
+        Expectation:
+            - The API returns a 400 Bad Request response.
+        """
+        response = api_client.post(
+            NEARBY_URL,
+            data=json.dumps({"address": "India Gate", "lat": 28.6, "long": 77.2, "k": 1}),
+            content_type="application/json",
+        )
+        assert response.status_code == 400
+        assert response.data == {"non_field_errors": [
+            ErrorDetail(string="Either an address, or lat and long, are required", code="invalid")
+        ]}
+
+        response = api_client.post(
+            NEARBY_URL, data=json.dumps({"lat": 28.6, "long": 77.2}), content_type="application/json"
+        )
+        assert response.status_code == 400
+        assert response.data == {"non_field_errors": [
+            ErrorDetail(string="Either radius_km or k is required", code="invalid")
+        ]}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_radius(self, api_client, places):
+        """
+        Scenario:
+            - A request is made to the nearby API for the places within 20 km of a location in Delhi.
+        Expectation:
+            - The API returns the places in Delhi, nearest first, with their distances.
+            - Only the geohash cells around the location are queried.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.post(
+                NEARBY_URL,
+                data=json.dumps({"lat": 28.6139, "long": 77.2090, "radius_km": 20}),
+                content_type="application/json",
+            )
+
+        assert response.status_code == 200
+        assert response.data["origin"] == {"lat": 28.6139, "long": 77.2090}
+        assert [place["original"] for place in response.data["results"]] == [
+            "Rashtrapati Bhavan", "India Gate", "Qutub Minar"
+        ]
+        assert response.data["results"][0]["distance"] == pytest.approx(
+            haversine_distance(28.6139, 77.2090, 28.6143478, 77.1994)
+        )
+        assert "geohash" in queries.captured_queries[-1]["sql"]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_nearest(self, api_client, places):
+        """
+        Scenario:
+            - A request is made to the nearby API for the 2 places nearest to a cached address.
+        Expectation:
+            - The API returns the 2 nearest places, leaving out the address itself.
+        """
+        response = api_client.post(
+            NEARBY_URL,
+            data=json.dumps({"address": "india gate", "k": 2}),
+            content_type="application/json",
+        )
+
+        assert response.status_code == 200
+        assert response.data["origin"]["formatted"] == "India Gate"
+        assert [place["original"] for place in response.data["results"]] == ["Rashtrapati Bhavan", "Qutub Minar"]
+
+        response = api_client.post(
+            NEARBY_URL,
+            data=json.dumps({"lat": 20.0, "long": 73.0, "k": 1}),
+            content_type="application/json",
+        )
+        assert [place["original"] for place in response.data["results"]] == ["Gateway of India"]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_place_listed_once(self, api_client, places):
+        """
+        Scenario:
+            - Several addresses resolve to the same place, and the 2 nearest places to a location are requested.
+        Expectation:
+            - The place is listed once, with the first address that resolves to it.
+        """
+        india_gate = Place.objects.get(formatted_address="India Gate")
+        GeocodeCache.objects.create(input_address="india gate delhi", place=india_gate)
+        GeocodeCache.objects.create(input_address="Kartavya Path", place=india_gate)
+
+        response = api_client.post(
+            NEARBY_URL,
+            data=json.dumps({"lat": 28.6129, "long": 77.2295, "k": 2}),
+            content_type="application/json",
+        )
+
+        assert [place["original"] for place in response.data["results"]] == ["India Gate", "Rashtrapati Bhavan"]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_reverse_geocoded_locations_left_out(self, api_client, places):
+        """
+        Scenario:
+            - A reverse geocoded location is cached, at a new place and at the place of a cached address.
+        Expectation:
+            - The location's key is never listed as an address; the place only it resolves to is left out.
+        """
+        GeocodeCache.objects.create(
+            input_address="latlng:28.6129000,77.2295000", normalized_address="latlng:28.6129000,77.2295000",
+            place=Place.objects.get(formatted_address="India Gate"),
+        )
+        GeocodeCache.objects.create(
+            input_address="latlng:28.6100000,77.2300000", normalized_address="latlng:28.6100000,77.2300000",
+            place=Place.objects.create(formatted_address="Unnamed Road", latitude=28.61, longitude=77.23),
+        )
+
+        response = api_client.post(
+            NEARBY_URL,
+            data=json.dumps({"lat": 28.6129, "long": 77.2295, "radius_km": 5}),
+            content_type="application/json",
+        )
+
+        assert [place["original"] for place in response.data["results"]] == ["India Gate", "Rashtrapati Bhavan"]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_rows_bounded(self, api_client, places):
+        """
+        Scenario:
+            - A request is made for the places within a radius too large for the geohash cell budget.
+        Expectation:
+            - Only the NEARBY_MAX_RESULTS nearest places are read from the database, nearest first.
+        """
+        with patch("api.settings.NEARBY_MAX_RESULTS", 2), CaptureQueriesContext(connection) as queries:
+            response = api_client.post(
+                NEARBY_URL,
+                data=json.dumps({"lat": 28.6139, "long": 77.2090, "radius_km": 10000}),
+                content_type="application/json",
+            )
+
+        assert [place["original"] for place in response.data["results"]] == ["Rashtrapati Bhavan", "India Gate"]
+        assert "LIMIT 2" in queries.captured_queries[-1]["sql"]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_antimeridian(self, api_client):
+        """
+        Scenario:
+            - Places lie on both sides of the antimeridian, and a request is made for those within 50 km of it.
+        Expectation:
+            - The places on both sides are found.
+        """
+        GeocodeCache.objects.all().delete()
+        Place.objects.all().delete()
+        for address, longitude in [("Taveuni West", 179.9), ("Taveuni East", -179.9), ("Suva", 178.44)]:
+            GeocodeCache.objects.create(
+                input_address=address,
+                place=Place.objects.create(formatted_address=address, latitude=-16.8, longitude=longitude),
+            )
+
+        response = api_client.post(
+            NEARBY_URL,
+            data=json.dumps({"lat": -16.8, "long": 179.99, "radius_km": 50}),
+            content_type="application/json",
+        )
+
+        assert [place["original"] for place in response.data["results"]] == ["Taveuni West", "Taveuni East"]
@@ -0,0 +1,93 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+import requests_mock
+from django.core.management import call_command
+from django.utils import timezone
+
+from geo.models import GeocodeCache, Place
+from geo.serializers import flush_geocode_hits, geocode_hits
+
+
+def create_entry(address, expires_in, hit_count=0, last_hit_in=None):
+    now = timezone.now()
+    return GeocodeCache.objects.create(
+        input_address=address,
+        expires_at=now + timedelta(seconds=expires_in),
+        hit_count=hit_count,
+        last_hit_at=now + timedelta(seconds=last_hit_in) if last_hit_in is not None else None,
+        place=Place.objects.create(formatted_address=address, latitude=37.7749295, longitude=-122.4194155),
+    )
+
+
+class TestRefreshGeocodeCache:
+
+    @pytest.mark.django_db(transaction=True)
+    @requests_mock.Mocker(kw="request_mocker")
+    def test_refresh_and_purge(self, **kwargs):
+        """
+        Scenario:
+            - The cache holds a hot entry about to expire, a hot entry far from expiry,
+              cold expired entries, and a cold entry that has not expired yet.
+        Expectation:
+            - Only the hot entry about to expire is geocoded again, with its hits reset.
+            - Only the cold expired entries are deleted, and the places no entry points at any more.
+        """
+        GeocodeCache.objects.all().delete()
+        Place.objects.all().delete()
+        create_entry("hot expiring", expires_in=60, hit_count=5, last_hit_in=-60)
+        create_entry("hot fresh", expires_in=86400, hit_count=5, last_hit_in=-60)
+        create_entry("cold expired", expires_in=-60)
+        create_entry("stale hits expired", expires_in=-60, hit_count=5, last_hit_in=-30 * 86400)
+        create_entry("cold fresh", expires_in=86400)
+
+        request_mocker = kwargs.get("request_mocker")
+        request_mocker.get(
+            "https://maps.googleapis.com/maps/api/geocode/json",
+            json={
+                "results": [
+                    {"formatted_address": "Hot Expiring", "geometry": {"location": {"lat": 1.0, "lng": 2.0}}}
+                ],
+                "status": "OK",
+            },
+        )
+
+        out = StringIO()
+        call_command("refresh_geocode_cache", "--batch-size=1", "--pause=0", stdout=out)
+
+        assert "Refreshed 1 hot entries, 0 failed" in out.getvalue()
+        assert "Purged 2 cold entries" in out.getvalue()
+        assert "Purged 3 orphaned places" in out.getvalue()
+        assert request_mocker.call_count == 1
+
+        assert sorted(GeocodeCache.objects.values_list("input_address", flat=True)) == [
+            "cold fresh", "hot expiring", "hot fresh"
+        ]
+        refreshed_address = GeocodeCache.objects.get(input_address="hot expiring")
+        assert refreshed_address.place.formatted_address == "Hot Expiring"
+        assert refreshed_address.hit_count == 0
+        assert sorted(Place.objects.values_list("formatted_address", flat=True)) == [
+            "Hot Expiring", "cold fresh", "hot fresh"
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_flush_geocode_hits(self):
+        """
+        Scenario:
+            - Hits are counted in memory for cached addresses and flushed.
+        Expectation:
+            - The hits are added to hit_count and last_hit_at is set.
+        """
+        GeocodeCache.objects.all().delete()
+        create_entry("123 Main St", expires_in=60, hit_count=1)
+        create_entry("456 Elm St", expires_in=60)
+        geocode_hits.drain()
+
+        for normalized_address in ["123 main st", "123 main st", "456 elm st"]:
+            geocode_hits.record(normalized_address)
+        flush_geocode_hits()
+
+        assert GeocodeCache.objects.get(input_address="123 Main St").hit_count == 3
+        assert GeocodeCache.objects.get(input_address="456 Elm St").hit_count == 1
+        assert GeocodeCache.objects.filter(last_hit_at__isnull=True).count() == 0
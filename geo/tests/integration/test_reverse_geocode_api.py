@@ -0,0 +1,117 @@
+import json
+
+import pytest
+import requests_mock
+from django.urls import reverse
+from rest_framework.exceptions import ErrorDetail
+
+from geo.models import GeocodeCache, Place
+
+REVERSE_GEOCODE_URL = reverse("reverse-geocode")
+GOOGLE_REVERSE_GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json?latlng=18.922,72.8346"
+
+
+class TestReverseGeocodeAPI:
+
+    def test_invalid_location(self, api_client):
+        """
+        Scenario:
+            - A request is made to the reverse geocode API with a latitude out of range and no longitude.
+        Expectation:
+            - The API returns a 400 Bad Request response.
+        """
+        response = api_client.post(REVERSE_GEOCODE_URL, data=json.dumps({"lat": 91}), content_type="application/json")
+
+        assert response.status_code == 400
+        assert set(response.data) == {"lat", "long"}
+
+    @pytest.mark.django_db(transaction=True)
+    @requests_mock.Mocker(kw="request_mocker")
+    def test_cached_place(self, api_client, **kwargs):
+        """
+        Scenario:
+            - A request is made to the reverse geocode API for a location 10 meters from a cached place.
+        Expectation:
+            - The API returns the address of the cached place, without calling Google.
+        """
+        GeocodeCache.objects.all().delete()
+        GeocodeCache.objects.create(
+            input_address="India Gate",
+            place=Place.objects.create(formatted_address="India Gate, New Delhi", latitude=28.612912, longitude=77.2295097),
+        )
+        request_mocker = kwargs.get("request_mocker")
+
+        response = api_client.post(
+            REVERSE_GEOCODE_URL, data=json.dumps({"lat": 28.613, "long": 77.2295}), content_type="application/json"
+        )
+
+        assert response.status_code == 200
+        assert response.data == {"lat": 28.613, "long": 77.2295, "formatted": "India Gate, New Delhi"}
+        assert request_mocker.call_count == 0
+
+    @pytest.mark.django_db(transaction=True)
+    @requests_mock.Mocker(kw="request_mocker")
+    def test_google(self, api_client, settings, **kwargs):
+        """
+        Scenario:
+            - Two requests are made to the reverse geocode API for locations of the same grid cell, far from any cached place.
+        Expectation:
+            - The first location is reverse geocoded by Google and cached under the key of its grid cell, with an expiry.
+            - The second location is served from the cache, without calling Google again.
+        """
+        settings.GEOCODE_CACHE_TTL = 3600
+        GeocodeCache.objects.all().delete()
+        request_mocker = kwargs.get("request_mocker")
+        request_mocker.get(
+            GOOGLE_REVERSE_GEOCODE_URL,
+            json={
+                "results": [
+                    {
+                        "formatted_address": "Apollo Bandar, Colaba, Mumbai",
+                        "geometry": {"location": {"lat": 18.9219841, "lng": 72.8346543}},
+                    }
+                ],
+                "status": "OK",
+            },
+        )
+
+        response = api_client.post(
+            REVERSE_GEOCODE_URL, data=json.dumps({"lat": 18.92198, "long": 72.83463}), content_type="application/json"
+        )
+
+        assert response.status_code == 200
+        assert response.data["formatted"] == "Apollo Bandar, Colaba, Mumbai"
+        assert request_mocker.call_count == 1
+
+        entry = GeocodeCache.objects.get()
+        assert entry.normalized_address == "latlng:18.9220000,72.8346000"
+        assert entry.expires_at is not None
+
+        response = api_client.post(
+            REVERSE_GEOCODE_URL, data=json.dumps({"lat": 18.92201, "long": 72.83458}), content_type="application/json"
+        )
+
+        assert response.data["formatted"] == "Apollo Bandar, Colaba, Mumbai"
+        assert request_mocker.call_count == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_zero_results(self, api_client):
+        """
+        Scenario:
+            - A request is made to the reverse geocode API for a location Google has no address for.
+        Expectation:
+            - The API returns a 400 Bad Request response.
+        """
+        GeocodeCache.objects.all().delete()
+        with requests_mock.Mocker() as request_mocker:
+            request_mocker.get(
+                "https://maps.googleapis.com/maps/api/geocode/json", json={"results": [], "status": "ZERO_RESULTS"}
+            )
+            response = api_client.post(
+                REVERSE_GEOCODE_URL, data=json.dumps({"lat": -45.0, "long": -140.0}), content_type="application/json"
+            )
+
+        assert response.status_code == 400
+        assert response.data == [
+            ErrorDetail(string="Could not reverse geocode location: -45.0,-140.0", code="invalid")
+        ]
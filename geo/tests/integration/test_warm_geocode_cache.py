@@ -0,0 +1,84 @@
+import json
+from io import StringIO
+
+import pytest
+import requests_mock
+from django.core.management import call_command
+
+from geo.models import GeocodeCache, Place
+
+GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
+
+def geocode_response(request, context):
+    address = request.qs["address"][0]
+    if address == "nowhere":
+        return {"results": [], "status": "ZERO_RESULTS"}
+    return {
+        "results": [{"formatted_address": address.title(), "geometry": {"location": {"lat": 1.0, "lng": 2.0}}}],
+        "status": "OK",
+    }
+
+
+class TestWarmGeocodeCache:
+
+    @pytest.mark.django_db(transaction=True)
+    @requests_mock.Mocker(kw="request_mocker")
+    def test_warm_csv(self, tmp_path, **kwargs):
+        """
+        Scenario:
+            - A CSV file lists a cached address, duplicates of an address, and an address Google cannot geocode.
+        Expectation:
+            - Only addresses missing from the cache are geocoded, once each.
+            - The geocoded addresses are cached and the progress is reported. Addresses cached by an
+              earlier chunk count as already cached.
+            - The checkpoint holds the number of records processed.
+        """
+        GeocodeCache.objects.all().delete()
+        GeocodeCache.objects.create(
+            input_address="India Gate",
+            place=Place.objects.create(formatted_address="India Gate", latitude=28.61, longitude=77.22),
+        )
+        path = tmp_path / "addresses.csv"
+        path.write_text("id,address\n1,india gate\n2,Qutub Minar\n3,qutub minar.\n4,nowhere\n5,Red Fort\n")
+
+        request_mocker = kwargs.get("request_mocker")
+        request_mocker.get(GEOCODE_URL, json=geocode_response)
+
+        out = StringIO()
+        call_command("warm_geocode_cache", str(path), "--chunk-size=2", "--workers=2", stdout=out, stderr=StringIO())
+
+        assert sorted(GeocodeCache.objects.values_list("normalized_address", flat=True)) == [
+            "india gate", "qutub minar", "red fort"
+        ]
+        assert request_mocker.call_count == 3
+        assert "Processed 5 records: 2 already cached, 2 geocoded, 1 failed" in out.getvalue()
+        assert (tmp_path / "addresses.csv.checkpoint").read_text() == "5"
+
+    @pytest.mark.django_db(transaction=True)
+    @requests_mock.Mocker(kw="request_mocker")
+    def test_resume_jsonl(self, tmp_path, **kwargs):
+        """
+        Scenario:
+            - A JSONL file of strings and objects is warmed, with a checkpoint left by an interrupted run.
+        Expectation:
+            - The records before the checkpoint are skipped and the rest are cached.
+        """
+        GeocodeCache.objects.all().delete()
+        path = tmp_path / "addresses.jsonl"
+        path.write_text("\n".join(json.dumps(record) for record in [
+            "india gate", {"address": "qutub minar"}, {"address": "red fort"}, "lotus temple"
+        ]) + "\n")
+        (tmp_path / "addresses.jsonl.checkpoint").write_text("2")
+
+        request_mocker = kwargs.get("request_mocker")
+        request_mocker.get(GEOCODE_URL, json=geocode_response)
+
+        out = StringIO()
+        call_command("warm_geocode_cache", str(path), stdout=out)
+
+        assert "Resuming after 2 records" in out.getvalue()
+        assert sorted(GeocodeCache.objects.values_list("normalized_address", flat=True)) == [
+            "lotus temple", "red fort"
+        ]
+        assert (tmp_path / "addresses.jsonl.checkpoint").read_text() == "4"
@@ -2,9 +2,37 @@ from unittest.mock import patch
 
 import pytest
 
-from geo.serializers import DistanceSerializer
+from geo.models import GeocodeCache
+from geo.serializers import DistanceSerializer, local_geocode_cache
+from geo.services.google import GoogleService, get_circuit_breaker
+from geo.services.ratelimit import get_rate_limiter
 
 
+@pytest.fixture(autouse=True)
+def clear_local_geocode_cache():
+    local_geocode_cache.clear()
+    yield
+    local_geocode_cache.clear()
+
+@pytest.fixture(autouse=True)
+def disable_advisory_lock(settings):
+    # Unit tests have no database access
+    settings.GEOCODE_ADVISORY_LOCK = False
+
+@pytest.fixture(autouse=True)
+def reset_rate_limiter():
+    # Build the rate limiter from each test's settings
+    get_rate_limiter.cache_clear()
+    yield
+    get_rate_limiter.cache_clear()
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breaker():
+    # Start every test with a closed circuit
+    get_circuit_breaker.cache_clear()
+    yield
+    get_circuit_breaker.cache_clear()
+
 @pytest.fixture
 def mock_google_service():
     with patch('geo.serializers.GoogleService') as MockGoogleService:
@@ -13,6 +41,7 @@ def mock_google_service():
 @pytest.fixture
 def mock_geocode_cache():
     with patch('geo.serializers.GeocodeCache') as MockGeocodeCache:
+        MockGeocodeCache.default_expires_at.side_effect = GeocodeCache.default_expires_at
         yield MockGeocodeCache
 
 @pytest.fixture
@@ -22,4 +51,7 @@ def distance_serializer():
 @pytest.fixture
 def mock_google_client():
     with patch('geo.services.google.googlemaps.Client') as MockGoogleClient:
+        # Start from, and leave behind, no GoogleService built on the mocked client
+        GoogleService._instance = None
         yield MockGoogleClient
+        GoogleService._instance = None
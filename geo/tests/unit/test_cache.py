@@ -0,0 +1,191 @@
+from unittest.mock import patch
+
+import pytest
+
+from geo.services.cache import (HitCounter, LocalGeocodeCache,
+                                SharedGeocodeCache)
+
+
+class TestLocalGeocodeCache:
+
+    def test_get_set(self):
+        """
+        Scenario:
+            - A value is cached and then read back.
+        Expectation:
+            - The cached value is returned and a hit is recorded.
+            - A missing key returns None and a miss is recorded.
+        """
+        cache = LocalGeocodeCache(maxsize=2, ttl=60)
+        cache.set("india gate", ("India Gate", 28.61, 77.22))
+
+        assert cache.get("india gate") == ("India Gate", 28.61, 77.22)
+        assert cache.get("qutub minar") is None
+        assert cache.stats() == {"size": 1, "maxsize": 2, "hits": 1, "misses": 1, "evictions": 0}
+
+    def test_lru_eviction(self):
+        """
+        Scenario:
+            - More entries than maxsize are cached.
+        Expectation:
+            - The least recently used entry is evicted and an eviction is recorded.
+        """
+        cache = LocalGeocodeCache(maxsize=2, ttl=None)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_ttl_expiry(self):
+        """
+        Scenario:
+            - An entry is read after its TTL has passed.
+        Expectation:
+            - The entry is treated as a miss and dropped from the cache.
+        """
+        cache = LocalGeocodeCache(maxsize=2, ttl=10)
+
+        with patch("geo.services.cache.time.monotonic", return_value=100):
+            cache.set("a", 1)
+        with patch("geo.services.cache.time.monotonic", return_value=109):
+            assert cache.get("a") == 1
+        with patch("geo.services.cache.time.monotonic", return_value=110):
+            assert cache.get("a") is None
+
+        assert len(cache) == 0
+
+    def test_disabled(self):
+        """
+        Scenario:
+            - The cache is created with a maxsize of 0.
+        Expectation:
+            - Nothing is cached.
+        """
+        cache = LocalGeocodeCache(maxsize=0, ttl=60)
+        cache.set("a", 1)
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+
+@pytest.fixture(params=["locmem", "file"])
+def geocode_cache_settings(request, settings, tmp_path):
+    backends = {
+        "locmem": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "geocode-tests"},
+        "file": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": str(tmp_path)},
+    }
+    settings.CACHES = {**settings.CACHES, "geocode": backends[request.param]}
+    yield settings
+    from django.core.cache import caches
+    caches["geocode"].clear()
+
+
+class TestSharedGeocodeCache:
+
+    def test_get_set_delete(self, geocode_cache_settings):
+        """
+        Scenario:
+            - A value is cached, read back and deleted on a locmem and a file based cache.
+        Expectation:
+            - The cached value is returned until it is deleted.
+        """
+        cache = SharedGeocodeCache("geocode", ttl=60)
+        cache.set("india gate", ("India Gate", 28.61, 77.22))
+
+        assert cache.get("india gate") == ("India Gate", 28.61, 77.22)
+        assert cache.get("qutub minar") is None
+
+        cache.delete("india gate")
+        assert cache.get("india gate") is None
+
+    def test_versioned_keys(self, geocode_cache_settings):
+        """
+        Scenario:
+            - A value is cached with one key version and read with another.
+        Expectation:
+            - Entries from other versions are not returned.
+        """
+        SharedGeocodeCache("geocode", ttl=60, version=1).set("india gate", ("India Gate", 28.61, 77.22))
+
+        assert SharedGeocodeCache("geocode", ttl=60, version=2).get("india gate") is None
+        assert SharedGeocodeCache("geocode", ttl=60, version=1).get("india gate") == ("India Gate", 28.61, 77.22)
+
+    def test_make_key(self):
+        """
+        Scenario:
+            - A cache key is built for a normalized address.
+        Expectation:
+            - The key is prefixed and does not contain the raw address.
+        """
+        key = SharedGeocodeCache("geocode", ttl=60).make_key("india gate")
+
+        assert key.startswith("geocode:")
+        assert " " not in key
+
+    def test_disabled(self):
+        """
+        Scenario:
+            - The cache is created without an alias.
+        Expectation:
+            - Nothing is cached and the cache backend is never touched.
+        """
+        cache = SharedGeocodeCache(None, ttl=60)
+
+        with patch("geo.services.cache.caches") as mock_caches:
+            cache.set("a", 1)
+            assert cache.get("a") is None
+
+        mock_caches.__getitem__.assert_not_called()
+
+    def test_backend_error(self):
+        """
+        Scenario:
+            - The cache backend raises an error.
+        Expectation:
+            - The error is swallowed and the lookup is treated as a miss.
+        """
+        cache = SharedGeocodeCache("geocode", ttl=60)
+
+        with patch("geo.services.cache.caches") as mock_caches:
+            mock_caches.__getitem__.return_value.get.side_effect = ConnectionError("down")
+            mock_caches.__getitem__.return_value.set.side_effect = ConnectionError("down")
+            cache.set("a", 1)
+            assert cache.get("a") is None
+
+
+class TestHitCounter:
+
+    def test_record_and_drain(self):
+        """
+        Scenario:
+            - Hits are recorded for several keys and then drained.
+        Expectation:
+            - The hits are counted per key and reset by the drain.
+        """
+        hit_counter = HitCounter(flush_interval=60)
+
+        hit_counter.record("india gate")
+        hit_counter.record("india gate")
+        hit_counter.record("qutub minar")
+
+        assert hit_counter.drain() == {"india gate": 2, "qutub minar": 1}
+        assert hit_counter.drain() == {}
+
+    def test_flush_due(self):
+        """
+        Scenario:
+            - Hits are recorded after the flush interval has passed.
+        Expectation:
+            - Only the first hit after the interval is told to flush.
+        """
+        hit_counter = HitCounter(flush_interval=0)
+
+        assert hit_counter.record("india gate") is True
+
+        hit_counter.flush_interval = 60
+        assert hit_counter.record("india gate") is False
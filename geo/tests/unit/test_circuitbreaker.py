@@ -0,0 +1,141 @@
+from unittest.mock import patch
+
+import pytest
+
+from geo.services.circuitbreaker import CircuitBreaker, CircuitOpen
+
+
+class UpstreamError(Exception):
+    pass
+
+
+def make_circuit_breaker(**kwargs):
+    options = {
+        "window_size": 4,
+        "min_calls": 4,
+        "failure_rate": 0.5,
+        "slow_call_duration": 1,
+        "slow_call_rate": 0.5,
+        "open_duration": 30,
+        "failure_exceptions": (UpstreamError,),
+    }
+    options.update(kwargs)
+    return CircuitBreaker(**options)
+
+
+def call(circuit_breaker, error=None):
+    with circuit_breaker.guard():
+        if error:
+            raise error
+
+
+class TestCircuitBreaker:
+
+    def test_opens_on_failure_rate(self):
+        """
+        Scenario:
+            - Half of the calls in the window fail.
+        Expectation:
+            - The circuit opens and further calls are rejected without running.
+        """
+        circuit_breaker = make_circuit_breaker()
+
+        for error in [None, UpstreamError(), None, UpstreamError()]:
+            try:
+                call(circuit_breaker, error)
+            except UpstreamError:
+                pass
+
+        assert circuit_breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpen):
+            circuit_breaker.check()
+        with pytest.raises(CircuitOpen):
+            call(circuit_breaker)
+
+        stats = circuit_breaker.stats()
+        assert stats["opened"] == 1
+        assert stats["rejected"] == 2
+
+    def test_stays_closed_below_min_calls(self):
+        """
+        Scenario:
+            - Every call fails, but fewer calls than min_calls were made.
+        Expectation:
+            - The circuit stays closed.
+        """
+        circuit_breaker = make_circuit_breaker()
+
+        for _ in range(3):
+            with pytest.raises(UpstreamError):
+                call(circuit_breaker, UpstreamError())
+
+        assert circuit_breaker.state == CircuitBreaker.CLOSED
+
+    def test_other_errors_are_not_failures(self):
+        """
+        Scenario:
+            - Calls raise an exception that is not a failure exception.
+        Expectation:
+            - The calls count as successful and the circuit stays closed.
+        """
+        circuit_breaker = make_circuit_breaker()
+
+        for _ in range(4):
+            with pytest.raises(ValueError):
+                call(circuit_breaker, ValueError())
+
+        assert circuit_breaker.state == CircuitBreaker.CLOSED
+        assert circuit_breaker.stats()["failures"] == 0
+
+    def test_opens_on_slow_calls(self):
+        """
+        Scenario:
+            - Half of the calls in the window take longer than slow_call_duration.
+        Expectation:
+            - The circuit opens.
+        """
+        circuit_breaker = make_circuit_breaker()
+        # Every call starts at 0 and ends at 0 or 5 seconds, then the circuit opens at 5 seconds
+        durations = [0, 0, 0, 5, 0, 0, 0, 5, 5]
+
+        with patch("geo.services.circuitbreaker.time.monotonic", side_effect=durations):
+            for _ in range(4):
+                call(circuit_breaker)
+
+        assert circuit_breaker.stats()["opened"] == 1
+
+    @pytest.mark.parametrize("error, expected_opened, expected_state", [
+        (None, 1, CircuitBreaker.CLOSED),
+        (UpstreamError(), 2, CircuitBreaker.HALF_OPEN),
+    ])
+    def test_half_open_probe(self, error, expected_opened, expected_state):
+        """
+        Scenario:
+            - The circuit is open and open_duration has passed.
+        Expectation:
+            - A single probe call is let through while others are rejected.
+            - The circuit closes if the probe succeeds and opens again if it fails.
+        """
+        circuit_breaker = make_circuit_breaker(open_duration=0)
+        for _ in range(4):
+            with pytest.raises(UpstreamError):
+                call(circuit_breaker, UpstreamError())
+
+        assert circuit_breaker.state == CircuitBreaker.HALF_OPEN
+
+        def probe():
+            with circuit_breaker.guard():
+                with pytest.raises(CircuitOpen):
+                    call(circuit_breaker)
+                if error:
+                    raise error
+
+        if error:
+            with pytest.raises(UpstreamError):
+                probe()
+        else:
+            probe()
+
+        assert circuit_breaker.stats()["opened"] == expected_opened
+        # With no open_duration a reopened circuit is immediately half open again
+        assert circuit_breaker.state == expected_state
@@ -0,0 +1,70 @@
+import pytest
+
+from geo.services.fuzzy import (FuzzyMatchStats, TrigramIndex, same_numbers,
+                                similarity, trigrams)
+
+
+class TestFuzzy:
+
+    def test_trigrams(self):
+        """
+        Scenario:
+            - Texts are split into trigrams and compared.
+        Expectation:
+            - Words are lowercased and padded like pg_trgm does.
+            - The similarity is the share of trigrams in common.
+        """
+        assert trigrams("Qutb") == {"  q", " qu", "qut", "utb", "tb "}
+        assert trigrams("") == frozenset()
+        assert similarity("qutub minar", "qutub minar") == 1.0
+        assert similarity("qutb minar", "qutub minar") == pytest.approx(9 / 14)
+        assert similarity("qutub minar", "") == 0.0
+
+    def test_same_numbers(self):
+        """
+        Scenario:
+            - Addresses with and without house numbers are compared.
+        Expectation:
+            - Only addresses with the same numbers, in the same order, are the same.
+        """
+        assert same_numbers("123 main st", "123 main street")
+        assert not same_numbers("123 main st", "124 main st")
+        assert not same_numbers("main st", "1 main st")
+
+    def test_trigram_index(self):
+        """
+        Scenario:
+            - Addresses are loaded into a TrigramIndex and one is added afterwards, then similar addresses are searched.
+        Expectation:
+            - The keys above the threshold are returned, most similar first, up to the limit.
+            - The similarities match the similarity function.
+        """
+        index = TrigramIndex()
+        assert index.is_due(300)
+
+        index.load(["qutub minar", "qutub minar delhi", "india gate"])
+        index.add("taj mahal")
+
+        assert len(index) == 4
+        assert not index.is_due(300)
+        assert index.search("qutb minar", 0.4, 5) == [
+            ("qutub minar", similarity("qutb minar", "qutub minar")),
+            ("qutub minar delhi", similarity("qutb minar", "qutub minar delhi")),
+        ]
+        assert [key for key, _ in index.search("qutb minar", 0.4, 1)] == ["qutub minar"]
+        assert index.search("taj mahal agra", 0.9, 5) == []
+        assert index.search("", 0.1, 5) == []
+
+    def test_fuzzy_match_stats(self):
+        """
+        Scenario:
+            - Fuzzy lookups with different outcomes are recorded.
+        Expectation:
+            - Each outcome is counted separately.
+        """
+        stats = FuzzyMatchStats()
+        assert stats.record("matched") == 1
+        assert stats.record("matched") == 2
+        stats.record("ambiguous")
+
+        assert stats.stats() == {"matched": 2, "no_candidate": 0, "ambiguous": 1, "stale": 0}
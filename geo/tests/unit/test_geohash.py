@@ -0,0 +1,49 @@
+import random
+
+from geo.services.geohash import PRECISION, bounding_box, covering_cells, encode
+from geo.services.utils import haversine_distance
+
+
+class TestGeohash:
+
+    def test_encode(self):
+        """
+        Scenario:
+            - Locations are encoded as geohashes.
+        Expectation:
+            - The geohash matches the reference encoding, and is a prefix of the finer geohashes.
+            - A missing coordinate encodes as an empty string.
+        """
+        assert encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+        assert encode(57.64911, 10.40744).startswith("u4pruydqqvj")
+        assert len(encode(57.64911, 10.40744)) == PRECISION
+        assert encode(None, 10.40744) == ""
+
+    def test_covering_cells(self):
+        """
+        Scenario:
+            - The cells covering radii around locations, including one across the antimeridian, are requested.
+        Expectation:
+            - Every location within the radius lies in one of the cells, and there are at most max_cells cells.
+        """
+        rng = random.Random(7)
+        for latitude, longitude, radius_km in [(28.61, 77.22, 5), (51.5, -0.12, 100), (-16.5, 179.9, 50), (64.1, -21.9, 300)]:
+            cells = covering_cells(latitude, longitude, radius_km, max_cells=16)
+            assert 0 < len(cells) <= 16
+
+            min_latitude, max_latitude, min_longitude, max_longitude = bounding_box(latitude, longitude, radius_km)
+            for _ in range(500):
+                point_latitude = rng.uniform(min_latitude, max_latitude)
+                point_longitude = (rng.uniform(min_longitude, max_longitude) + 180) % 360 - 180
+                if haversine_distance(latitude, longitude, point_latitude, point_longitude) <= radius_km:
+                    geohash = encode(point_latitude, point_longitude)
+                    assert any(geohash.startswith(cell) for cell in cells)
+
+    def test_covering_cells_whole_earth(self):
+        """
+        Scenario:
+            - The cells covering a radius spanning most of the earth are requested.
+        Expectation:
+            - None is returned, as every location is a candidate.
+        """
+        assert covering_cells(0, 0, 15000, max_cells=16) is None
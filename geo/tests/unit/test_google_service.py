@@ -1,4 +1,13 @@
-from geo.services.google import GoogleService
+import asyncio
+from unittest.mock import patch
+
+import googlemaps
+import httpx
+import pytest
+
+from geo.services.google import (AsyncGoogleService, GoogleService,
+                                 GoogleServiceUnavailable, get_circuit_breaker)
+
 
 class TestGoogleService:
 
@@ -13,4 +22,216 @@ class TestGoogleService:
         google_service2 = GoogleService("API_KEY")
 
         assert google_service1 is google_service2
-        mock_google_client.assert_called_once_with("API_KEY")
+        mock_google_client.assert_called_once()
+        assert mock_google_client.call_args.args == ("API_KEY",)
+
+    def test_client_settings(self, mock_google_client, settings):
+        """
+        Scenario:
+            - The googlemaps client of GoogleService is created.
+        Expectation:
+            - It uses the configured timeouts, retry budget and a pooled session.
+        """
+        GoogleService("API_KEY")
+
+        kwargs = mock_google_client.call_args.kwargs
+        assert kwargs["connect_timeout"] == settings.GOOGLE_MAPS_CONNECT_TIMEOUT
+        assert kwargs["read_timeout"] == settings.GOOGLE_MAPS_READ_TIMEOUT
+        assert kwargs["retry_timeout"] == settings.GOOGLE_MAPS_RETRY_TIMEOUT
+        assert kwargs["retry_over_query_limit"] is False
+        adapter = kwargs["requests_session"].get_adapter("https://maps.googleapis.com")
+        assert adapter._pool_maxsize == settings.GOOGLE_MAPS_POOL_SIZE
+        assert adapter.max_retries.total == 0
+
+    @pytest.mark.parametrize("error", [
+        googlemaps.exceptions.Timeout(),
+        googlemaps.exceptions.TransportError("connection reset"),
+        googlemaps.exceptions.ApiError("OVER_QUERY_LIMIT"),
+    ])
+    def test_geocode_unavailable(self, mock_google_client, error):
+        """
+        Scenario:
+            - The googlemaps client times out, cannot reach Google or is over the query limit.
+        Expectation:
+            - GoogleServiceUnavailable is raised.
+        """
+        google_service = GoogleService("API_KEY")
+        google_service.client.geocode.side_effect = error
+
+        with pytest.raises(GoogleServiceUnavailable):
+            google_service.geocode("india gate")
+
+    def test_geocode_circuit_open(self, mock_google_client, settings):
+        """
+        Scenario:
+            - Google keeps timing out until the circuit breaker opens.
+        Expectation:
+            - Further calls fail fast with GoogleServiceUnavailable, without calling Google.
+            - Other errors from Google do not count towards opening the circuit.
+        """
+        settings.GOOGLE_MAPS_CIRCUIT_MIN_CALLS = 2
+        google_service = GoogleService("API_KEY")
+
+        google_service.client.geocode.side_effect = googlemaps.exceptions.ApiError("REQUEST_DENIED")
+        for _ in range(2):
+            with pytest.raises(googlemaps.exceptions.ApiError):
+                google_service.geocode("india gate")
+        assert get_circuit_breaker().state == "closed"
+
+        google_service.client.geocode.side_effect = googlemaps.exceptions.Timeout()
+        for _ in range(2):
+            with pytest.raises(GoogleServiceUnavailable):
+                google_service.geocode("india gate")
+        assert get_circuit_breaker().state == "open"
+
+        google_service.client.geocode.reset_mock()
+        with pytest.raises(GoogleServiceUnavailable):
+            google_service.geocode("india gate")
+        google_service.client.geocode.assert_not_called()
+
+    def test_reverse_geocode(self, mock_google_client):
+        """
+        Scenario:
+            - A location is reverse geocoded, then Google times out.
+        Expectation:
+            - The first result of the googlemaps client is returned.
+            - The timeout raises GoogleServiceUnavailable.
+        """
+        google_service = GoogleService("API_KEY")
+        google_service.client.reverse_geocode.return_value = [{"formatted_address": "India Gate"}, {}]
+
+        assert google_service.reverse_geocode(28.6129, 77.2295) == {"formatted_address": "India Gate"}
+        google_service.client.reverse_geocode.assert_called_once_with((28.6129, 77.2295))
+
+        google_service.client.reverse_geocode.return_value = []
+        assert google_service.reverse_geocode(28.6129, 77.2295) is None
+
+        google_service.client.reverse_geocode.side_effect = googlemaps.exceptions.Timeout()
+        with pytest.raises(GoogleServiceUnavailable):
+            google_service.reverse_geocode(28.6129, 77.2295)
+
+
+class TestAsyncGoogleService:
+
+    @pytest.fixture
+    def google_service(self):
+        def respond(request):
+            address = request.url.params["address"]
+            if address == "india gate":
+                return httpx.Response(200, json={
+                    "results": [{"formatted_address": "India Gate", "geometry": {"location": {"lat": 28.61, "lng": 77.22}}}],
+                    "status": "OK",
+                })
+            if address == "denied":
+                return httpx.Response(200, json={"results": [], "status": "REQUEST_DENIED", "error_message": "denied"})
+            if address == "unavailable":
+                return httpx.Response(503)
+            return httpx.Response(200, json={"results": [], "status": "ZERO_RESULTS"})
+
+        google_service = AsyncGoogleService("API_KEY")
+        client = httpx.AsyncClient(transport=httpx.MockTransport(respond))
+        with patch.object(AsyncGoogleService, "get_client", return_value=client):
+            yield google_service
+
+    def test_singleton(self):
+        """
+        Scenario:
+            - Two instances of AsyncGoogleService are created.
+        Expectation:
+            - Both instances are the same object.
+        """
+        assert AsyncGoogleService("API_KEY") is AsyncGoogleService("API_KEY")
+
+    def test_aclose(self):
+        """
+        Scenario:
+            - The HTTP client of an event loop is closed before the loop ends.
+        Expectation:
+            - The client is closed and the loop's next call gets a new client.
+        """
+        google_service = AsyncGoogleService("API_KEY")
+
+        async def run():
+            client = google_service.get_client()
+            await google_service.aclose()
+            new_client = google_service.get_client()
+            await google_service.aclose()
+            return client, new_client
+
+        client, new_client = asyncio.run(run())
+        assert client.is_closed
+        assert new_client is not client
+
+    def test_geocode(self, google_service):
+        """
+        Scenario:
+            - geocode is called with an address Google can geocode.
+        Expectation:
+            - The first result is returned.
+        """
+        result = asyncio.run(google_service.geocode("india gate"))
+
+        assert result["formatted_address"] == "India Gate"
+
+    def test_geocode_zero_results(self, google_service):
+        """
+        Scenario:
+            - geocode is called with an address Google cannot geocode.
+        Expectation:
+            - None is returned.
+        """
+        assert asyncio.run(google_service.geocode("none")) is None
+
+    def test_geocode_errors(self, google_service, settings):
+        """
+        Scenario:
+            - Google returns an error status, or keeps returning server errors.
+        Expectation:
+            - ApiError is raised for error statuses.
+            - GoogleServiceUnavailable is raised once the retry budget is spent.
+        """
+        settings.GOOGLE_MAPS_RETRY_TIMEOUT = 0
+
+        with pytest.raises(googlemaps.exceptions.ApiError):
+            asyncio.run(google_service.geocode("denied"))
+
+        with pytest.raises(GoogleServiceUnavailable):
+            asyncio.run(google_service.geocode("unavailable"))
+
+    def test_geocode_retries(self):
+        """
+        Scenario:
+            - Google returns a server error, then a result.
+        Expectation:
+            - The request is retried after a backoff and the result is returned.
+        """
+        responses = [
+            httpx.Response(503),
+            httpx.Response(200, json={"results": [{"formatted_address": "India Gate"}], "status": "OK"}),
+        ]
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: responses.pop(0)))
+
+        with patch.object(AsyncGoogleService, "get_client", return_value=client), \
+                patch("geo.services.google.backoff_delay", return_value=0) as mock_backoff_delay:
+            result = asyncio.run(AsyncGoogleService("API_KEY").geocode("india gate"))
+
+        assert result == {"formatted_address": "India Gate"}
+        mock_backoff_delay.assert_called_once_with(1)
+
+    def test_client_per_event_loop(self):
+        """
+        Scenario:
+            - get_client is called twice within an event loop and once in another.
+        Expectation:
+            - The client is reused within an event loop only.
+        """
+        google_service = AsyncGoogleService("API_KEY")
+
+        async def get_clients():
+            return google_service.get_client(), google_service.get_client()
+
+        first, second = asyncio.run(get_clients())
+        other, _ = asyncio.run(get_clients())
+
+        assert first is second
+        assert first is not other
@@ -1,7 +1,10 @@
+from datetime import timedelta
+from unittest.mock import patch
+
 from django.db import models
 from django.utils import timezone
 
-from geo.models import GeocodeCache
+from geo.models import GeocodeCache, GeocodeResult, Place
 
 
 class TestGeocodeCache:
@@ -19,10 +22,12 @@ class TestGeocodeCache:
         expected_fields = {
             'id',
             'input_address',
-            'latitude',
-            'longitude',
-            'formatted_address',
-            'created_at'
+            'normalized_address',
+            'place',
+            'created_at',
+            'expires_at',
+            'hit_count',
+            'last_hit_at'
         }
 
         # Get the actual fields from the model
@@ -35,15 +40,18 @@ class TestGeocodeCache:
         Scenario:
             - A GeocodeCache model is present in code.
         Expectation:
-            - The model has an index on the input_address field.
+            - The model has a unique constraint, and so an index, on the normalized_address field.
         """
         # Get the model's metadata
         meta = GeocodeCache._meta
 
-        # Check if the index exists
-        index_exists = any(isinstance(index, models.Index) and 'input_address' in index.fields for index in meta.indexes)
+        # Check if the constraint exists
+        constraint_exists = any(
+            isinstance(constraint, models.UniqueConstraint) and constraint.fields == ('normalized_address',)
+            for constraint in meta.constraints
+        )
 
-        assert index_exists, "GeocodeCache model should have an index on the input_address field"
+        assert constraint_exists, "GeocodeCache model should have a unique constraint on the normalized_address field"
 
     def test_str(self):
         """Scenario:
@@ -53,10 +61,122 @@ class TestGeocodeCache:
         """
         geocode_cache = GeocodeCache(
             input_address="123 Main St",
-            formatted_address="123 Main St, City, State",
-            latitude=37.123456,
-            longitude=-122.987654,
+            place=Place(formatted_address="123 Main St, City, State", latitude=37.123456, longitude=-122.987654),
             created_at=timezone.now()
         )
-        expected_str = "123 Main St -> 37.123456, -122.987654"
+        expected_str = "123 Main St -> 123 Main St, City, State -> 37.123456, -122.987654"
         assert str(geocode_cache) == expected_str
+
+    def test_save_sets_normalized_address(self):
+        """Scenario:
+            - A GeocodeCache instance is saved without a normalized address.
+        Expectation:
+            - The normalized address is derived from the input address.
+        """
+        geocode_cache = GeocodeCache(input_address="  123 Main St. ")
+
+        with patch("django.db.models.Model.save") as mock_save:
+            geocode_cache.save()
+
+        assert geocode_cache.normalized_address == "123 main st"
+        mock_save.assert_called_once()
+
+    def test_save_sets_expires_at(self, settings):
+        """Scenario:
+            - A new GeocodeCache instance is saved without an expiry while GEOCODE_CACHE_TTL is set.
+        Expectation:
+            - The entry expires GEOCODE_CACHE_TTL seconds from now.
+            - Entries never expire when GEOCODE_CACHE_TTL is 0.
+        """
+        settings.GEOCODE_CACHE_TTL = 3600
+        geocode_cache = GeocodeCache(input_address="123 Main St")
+
+        with patch("django.db.models.Model.save"):
+            geocode_cache.save()
+
+        assert timezone.now() + timedelta(seconds=3590) < geocode_cache.expires_at <= timezone.now() + timedelta(seconds=3600)
+
+        settings.GEOCODE_CACHE_TTL = 0
+        assert GeocodeCache.default_expires_at() is None
+
+    def test_has_expires_at_index(self):
+        """
+        Scenario:
+            - A GeocodeCache model is present in code.
+        Expectation:
+            - The model has an index on the expires_at field, used to find expired entries.
+        """
+        assert any(index.fields == ['expires_at'] for index in GeocodeCache._meta.indexes)
+
+
+class TestPlace:
+
+    def test_fields(self):
+        """
+        Scenario:
+            - A Place model is present in code.
+        Expectation:
+            - The model has the expected fields, including the entries pointing at it.
+            - The key is unique, the formatted address is not, and the geohash is indexed.
+        """
+        meta = Place._meta
+
+        assert {field.name for field in meta.get_fields()} == {
+            'id', 'place_key', 'formatted_address', 'latitude', 'longitude', 'geohash', 'google_place_id', 'aliases'
+        }
+        assert meta.get_field('place_key').unique
+        assert not meta.get_field('formatted_address').unique
+        assert meta.get_field('geohash').db_index
+
+    def test_key_of(self):
+        """
+        Scenario:
+            - The keys of geocoded data with and without a Google place ID are built.
+        Expectation:
+            - The Google place ID is the key; without one, the formatted address is.
+            - The key of the longest formatted address fits in the place_key column.
+        """
+        assert Place.key_of({"formatted_address": "Unnamed Road, India", "google_place_id": "ChIJ123"}) == "ChIJ123"
+        assert Place.key_of({"formatted_address": "Unnamed Road, India", "google_place_id": ""}) == (
+            "address:Unnamed Road, India"
+        )
+
+        longest_address = "a" * Place._meta.get_field('formatted_address').max_length
+        assert len(Place.key_of({"formatted_address": longest_address})) <= Place._meta.get_field('place_key').max_length
+
+    def test_save_sets_geohash(self):
+        """Scenario:
+            - A Place instance is saved.
+        Expectation:
+            - The geohash is derived from the coordinates, and the key from the formatted address.
+        """
+        place = Place(formatted_address="123 Main St, City, State", latitude=37.123456, longitude=-122.987654)
+
+        with patch("django.db.models.Model.save") as mock_save:
+            place.save()
+
+        assert place.geohash == "9q8e1q55gcy2"
+        assert place.place_key == "address:123 Main St, City, State"
+        mock_save.assert_called_once()
+
+
+class TestGeocodeResult:
+
+    def test_from_instance(self):
+        """
+        Scenario:
+            - A GeocodeResult is built from a GeocodeCache instance.
+        Expectation:
+            - It holds the fields needed to answer a request and compares equal to one built from a values_list() row.
+            - It has no instance dict, so it cannot carry other attributes.
+        """
+        geocode_cache = GeocodeCache(
+            input_address="123 Main St",
+            normalized_address="123 main st",
+            place=Place(formatted_address="123 Main St, City, State", latitude=37.123456, longitude=-122.987654)
+        )
+        result = GeocodeResult.from_instance(geocode_cache)
+
+        assert result == GeocodeResult("123 Main St", "123 main st", "123 Main St, City, State", 37.123456, -122.987654)
+        assert result != GeocodeResult("123 Main St", "123 main st", "123 Main St, City, State", 37.0, -122.987654)
+        assert not hasattr(result, "__dict__")
@@ -0,0 +1,267 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from geo.services.google import GoogleService, GoogleServiceUnavailable
+from geo.services.ratelimit import (GoogleRateLimiter, RateLimitExceeded,
+                                    TokenBucket, get_rate_limiter)
+
+
+class TestTokenBucket:
+
+    def test_burst_then_wait(self):
+        """
+        Scenario:
+            - More tokens are reserved than the bucket holds.
+        Expectation:
+            - The burst is served at once and later callers are told to wait in turn.
+        """
+        bucket = TokenBucket(rate=10, capacity=2)
+
+        assert bucket.reserve(max_wait=1) == 0
+        assert bucket.reserve(max_wait=1) == 0
+        assert bucket.reserve(max_wait=1) == pytest.approx(0.1, abs=0.01)
+        assert bucket.reserve(max_wait=1) == pytest.approx(0.2, abs=0.01)
+
+    def test_shed(self):
+        """
+        Scenario:
+            - A token would only be available after max_wait.
+        Expectation:
+            - None is returned and no token is taken.
+        """
+        bucket = TokenBucket(rate=1, capacity=1)
+        bucket.reserve(max_wait=0)
+
+        assert bucket.reserve(max_wait=0.5) is None
+        assert bucket.reserve(max_wait=1) == pytest.approx(1, abs=0.01)
+
+
+class TestGoogleRateLimiter:
+
+    def test_shed_when_queue_too_long(self):
+        """
+        Scenario:
+            - Calls arrive faster than the rate limit allows for longer than max_wait.
+        Expectation:
+            - The excess call raises RateLimitExceeded and is counted as shed.
+        """
+        rate_limiter = GoogleRateLimiter(qps=1, burst=1, daily_quota=0, max_wait=0)
+
+        rate_limiter.acquire()
+        with pytest.raises(RateLimitExceeded):
+            rate_limiter.acquire()
+
+        stats = rate_limiter.stats()
+        assert stats["acquired"] == 1
+        assert stats["shed"] == 1
+        assert stats["remaining_daily_quota"] is None
+
+    def test_wait_is_tracked(self):
+        """
+        Scenario:
+            - A call has to queue for the rate limit.
+        Expectation:
+            - The call sleeps for its turn and the wait is recorded.
+        """
+        rate_limiter = GoogleRateLimiter(qps=10, burst=1, daily_quota=0, max_wait=1)
+
+        with patch("geo.services.ratelimit.time.sleep") as mock_sleep:
+            rate_limiter.acquire()
+            rate_limiter.acquire()
+
+        mock_sleep.assert_called_once()
+        assert mock_sleep.call_args.args[0] == pytest.approx(0.1, abs=0.01)
+        assert rate_limiter.stats()["total_wait"] == pytest.approx(0.1, abs=0.01)
+
+    def test_async_wait(self):
+        """
+        Scenario:
+            - A coroutine has to queue for the rate limit.
+        Expectation:
+            - It waits with asyncio.sleep instead of blocking the event loop.
+        """
+        rate_limiter = GoogleRateLimiter(qps=10, burst=1, daily_quota=0, max_wait=1)
+
+        async def run():
+            await rate_limiter.aacquire()
+            await rate_limiter.aacquire()
+
+        with patch("geo.services.ratelimit.asyncio.sleep") as mock_sleep, \
+                patch("geo.services.ratelimit.time.sleep") as mock_time_sleep:
+            asyncio.run(run())
+
+        mock_sleep.assert_called_once()
+        mock_time_sleep.assert_not_called()
+
+    def test_daily_quota(self):
+        """
+        Scenario:
+            - More calls are made than the daily quota allows.
+        Expectation:
+            - The remaining quota counts down and calls past it are shed.
+        """
+        rate_limiter = GoogleRateLimiter(qps=0, burst=0, daily_quota=2, max_wait=0)
+
+        rate_limiter.acquire()
+        assert rate_limiter.remaining_daily_quota() == 1
+        rate_limiter.acquire()
+        with pytest.raises(RateLimitExceeded):
+            rate_limiter.acquire()
+
+        assert rate_limiter.remaining_daily_quota() == 0
+
+    def test_shared_across_workers(self, settings):
+        """
+        Scenario:
+            - Two rate limiters, standing in for two workers, share a cache.
+        Expectation:
+            - The daily quota and the per second rate are counted across both.
+            - The call shed by the rate limit does not count against the daily quota.
+        """
+        settings.CACHES = {
+            "ratelimit": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "ratelimit"},
+        }
+        worker1 = GoogleRateLimiter(qps=1, burst=1, daily_quota=3, max_wait=0, cache_alias="ratelimit")
+        worker2 = GoogleRateLimiter(qps=1, burst=1, daily_quota=3, max_wait=0, cache_alias="ratelimit")
+
+        with patch("geo.services.ratelimit.time.time", return_value=1000.5):
+            worker1.acquire()
+            with pytest.raises(RateLimitExceeded):
+                worker2.acquire()
+
+            assert worker1.remaining_daily_quota() == 2
+            assert worker2.remaining_daily_quota() == 2
+
+    def test_shared_fractional_rate_and_burst(self, settings):
+        """
+        Scenario:
+            - Rate limiters sharing a cache allow a call every two seconds, or bursts of 3 calls at 1 per second.
+        Expectation:
+            - Calls are reserved in turn at the fractional rate, and a burst is made at once before calls wait.
+        """
+        settings.CACHES = {
+            "ratelimit": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "ratelimit"},
+        }
+        slow = GoogleRateLimiter(qps=0.5, burst=1, daily_quota=0, max_wait=5, cache_alias="ratelimit")
+        bursty = GoogleRateLimiter(qps=1, burst=3, daily_quota=0, max_wait=5, cache_alias="ratelimit")
+
+        with patch("geo.services.ratelimit.time.time", return_value=1000.5):
+            assert [slow.reserve() for _ in range(3)] == [0.0, pytest.approx(1.5), pytest.approx(3.5)]
+            assert [bursty.reserve() for _ in range(4)] == [0.0, 0.0, 0.0, pytest.approx(1.5)]
+
+    def test_rate_shed_keeps_quota(self):
+        """
+        Scenario:
+            - A call is shed by the rate limit while a daily quota is set.
+        Expectation:
+            - The shed call does not count against the daily quota.
+        """
+        rate_limiter = GoogleRateLimiter(qps=1, burst=1, daily_quota=5, max_wait=0)
+
+        rate_limiter.acquire()
+        with pytest.raises(RateLimitExceeded):
+            rate_limiter.acquire()
+
+        assert rate_limiter.remaining_daily_quota() == 4
+
+    def test_quota_refusal_gives_rate_back(self, settings):
+        """
+        Scenario:
+            - Calls are refused by the daily quota, once per process and once across workers.
+        Expectation:
+            - The refused calls give back the rate they reserved.
+        """
+        settings.CACHES = {
+            "ratelimit": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "quota-refusal"},
+        }
+        local = GoogleRateLimiter(qps=1, burst=2, daily_quota=1, max_wait=0)
+        shared = GoogleRateLimiter(qps=1, burst=2, daily_quota=1, max_wait=0, cache_alias="ratelimit")
+
+        local.acquire()
+        with pytest.raises(RateLimitExceeded):
+            local.acquire()
+        assert local.bucket.tokens == pytest.approx(1, abs=0.1)
+
+        with patch("geo.services.ratelimit.time.time", return_value=1000.5):
+            shared.acquire()
+            with pytest.raises(RateLimitExceeded):
+                shared.acquire()
+            assert shared.reserve_rate() == (0.0, "geocode:ratelimit:window:2.0:500")
+
+    def test_async_shared_off_event_loop(self, settings):
+        """
+        Scenario:
+            - A coroutine acquires a call from a rate limiter that shares a cache.
+        Expectation:
+            - The shared cache is called from a worker thread, not from the event loop.
+        """
+        settings.CACHES = {
+            "ratelimit": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "ratelimit"},
+        }
+        rate_limiter = GoogleRateLimiter(qps=1, burst=1, daily_quota=1, max_wait=0, cache_alias="ratelimit")
+        threads = []
+
+        def reserve():
+            threads.append(threading.current_thread())
+            return 0.0
+
+        async def run():
+            with patch.object(rate_limiter, "reserve", side_effect=reserve):
+                await rate_limiter.aacquire()
+            return threading.current_thread()
+
+        assert asyncio.run(run()) not in threads
+
+    def test_get_rate_limiter(self, settings):
+        """
+        Scenario:
+            - The rate limiter is requested twice.
+        Expectation:
+            - The same instance, configured from settings, is returned.
+        """
+        settings.GOOGLE_MAPS_QPS = 5
+        settings.GOOGLE_MAPS_DAILY_QUOTA = 100
+
+        rate_limiter = get_rate_limiter()
+
+        assert rate_limiter is get_rate_limiter()
+        assert rate_limiter.qps == 5
+        assert rate_limiter.daily_quota == 100
+
+
+class TestGoogleServiceRateLimit:
+
+    def test_shed_call_is_unavailable(self, mock_google_client, settings):
+        """
+        Scenario:
+            - The daily quota is spent when GoogleService geocodes an address.
+        Expectation:
+            - GoogleServiceUnavailable is raised without calling Google.
+        """
+        settings.GOOGLE_MAPS_DAILY_QUOTA = 1
+        settings.GOOGLE_MAPS_RATE_LIMIT_CACHE_ALIAS = None
+        google_service = GoogleService("API_KEY")
+        google_service.client.geocode.return_value = [{"formatted_address": "India Gate"}]
+
+        assert google_service.geocode("india gate") == {"formatted_address": "India Gate"}
+        with pytest.raises(GoogleServiceUnavailable):
+            google_service.geocode("qutub minar")
+
+        google_service.client.geocode.assert_called_once()
+
+    def test_client_rate_limit(self, mock_google_client, settings):
+        """
+        Scenario:
+            - GoogleService is created with a rate limit above googlemaps' default of 50 calls per second.
+        Expectation:
+            - The googlemaps client is allowed every call the rate limiter lets through in a second.
+        """
+        settings.GOOGLE_MAPS_QPS = 100
+        settings.GOOGLE_MAPS_BURST = 20
+
+        GoogleService("API_KEY")
+
+        assert mock_google_client.call_args.kwargs["queries_per_second"] == 120
@@ -1,8 +1,29 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
 import pytest
 from django.db.utils import Error
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
-from geo.serializers import DistanceSerializer
+from geo.exceptions import GeocodeServiceUnavailable
+from geo.models import GeocodeResult
+from geo.services.cache import SharedGeocodeCache
+from geo.services.google import GoogleServiceUnavailable
+from geo.services.snapshot import SnapshotLookup, write_snapshot
+from geo.serializers import (DistanceSerializer, geocode_flights,
+                             local_geocode_cache)
+
+
+def set_cached_row(mock_geocode_cache, row):
+    """
+    Makes the GeocodeCache lookup of a single normalized address return the given
+    values_list() row, or nothing if row is None.
+    """
+    rows = mock_geocode_cache.objects.filter.return_value.values_list.return_value
+    rows.__getitem__.return_value = [row] if row is not None else []
 
 
 class TestDistanceSerializer:
@@ -85,21 +106,21 @@ class TestDistanceSerializer:
             - geocode is called with an address that is already in the cache.
         Expectation:
             - Google API is not called
-            - The cached GeocodeCache instance is returned.
+            - The cached entry is read as a single values_list() row, without instantiating the model.
             - The cache is not populated with the geocoded address.
         """
         address = "123 Main St"
-        geocode_cache = mock_geocode_cache(
-            input_address=address,
-            formatted_address=address,
-            latitude=37.123456,
-            longitude=-122.987654
-        )
-
-        mock_geocode_cache.objects.filter.return_value.first.return_value = geocode_cache
+        set_cached_row(mock_geocode_cache, (address, "123 main st", address, 37.123456, -122.987654, None))
 
-        assert distance_serializer.geocode(address) == geocode_cache
-        mock_geocode_cache.objects.filter.assert_called_once_with(input_address__iexact=address)
+        assert distance_serializer.geocode(address) == GeocodeResult(
+            address, "123 main st", address, 37.123456, -122.987654
+        )
+        mock_geocode_cache.objects.filter.assert_called_once_with(normalized_address="123 main st")
+        mock_geocode_cache.objects.filter.return_value.values_list.assert_called_once_with(*GeocodeResult.COLUMNS)
+        mock_geocode_cache.objects.filter.return_value.values_list.return_value.__getitem__.assert_called_once_with(
+            slice(None, 1)
+        )
+        mock_geocode_cache.objects.filter.return_value.first.assert_not_called()
         mock_google_service.geocode.assert_not_called()
 
     def test_geocode_cache_miss(self, mock_geocode_cache, distance_serializer, mock_google_service):
@@ -107,19 +128,14 @@ class TestDistanceSerializer:
         Scenario:
             - geocode is called with an address that is not in the cache.
         Expectation:
-            - The geocoded GeocodeCache instance is returned.
+            - The geocoded address is returned.
             - Google geocode api is used to fetch the geocode.
-            - The cache is populated with the geocoded address.
+            - The cache is populated with the geocoded address in a single upsert.
         """
         address = "123 Main St"
-        geocode_cache = mock_geocode_cache(
-            input_address=address,
-            formatted_address=address,
-            latitude=37.123456,
-            longitude=-122.987654
-        )
-        mock_geocode_cache.objects.filter.return_value.first.return_value = None
-        mock_geocode_cache.objects.create.return_value = geocode_cache
+        geocode_cache = GeocodeResult(address, "123 main st", address, 37.123456, -122.987654)
+        set_cached_row(mock_geocode_cache, None)
+        mock_geocode_cache.default_expires_at.return_value = None
 
         mock_google_service.geocode.return_value = {
             "formatted_address": geocode_cache.formatted_address,
@@ -132,35 +148,33 @@ class TestDistanceSerializer:
         }
 
         assert distance_serializer.geocode(address) == geocode_cache
-        mock_geocode_cache.objects.filter.assert_called_once_with(input_address__iexact=address)
+        mock_geocode_cache.objects.filter.assert_called_once_with(normalized_address="123 main st")
         mock_google_service.geocode.assert_called_once_with(address)
-        mock_geocode_cache.objects.create.assert_called_once_with(
-            input_address=address,
-            formatted_address=geocode_cache.formatted_address,
-            latitude=geocode_cache.latitude,
-            longitude=geocode_cache.longitude
-        )
+        mock_geocode_cache.upsert.assert_called_once_with([{
+            "input_address": address,
+            "normalized_address": "123 main st",
+            "formatted_address": geocode_cache.formatted_address,
+            "latitude": geocode_cache.latitude,
+            "longitude": geocode_cache.longitude,
+            "google_place_id": "",
+            "expires_at": None
+        }])
 
     def test_geocode_cache_error(self, mock_geocode_cache, distance_serializer, mock_google_service):
         """
         Scenario:
             - geocode is called with cache failing due to DB issues.
         Expectation:
-            - The geocoded GeocodeCache instance is returned.
+            - The geocoded address is returned.
             - Google geocode api is used to fetch the geocode.
             - The cache is not populated with the geocoded address.
         """
         address = "123 Main St"
-        geocode_cache = mock_geocode_cache(
-            input_address=address,
-            formatted_address=address,
-            latitude=37.123456,
-            longitude=-122.987654
-        )
+        geocode_cache = GeocodeResult(address, "123 main st", address, 37.123456, -122.987654)
 
-        mock_geocode_cache.return_value = geocode_cache
+        mock_geocode_cache.default_expires_at.return_value = None
         mock_geocode_cache.objects.filter.side_effect = Error('test error')
-        mock_geocode_cache.objects.create.side_effect = Error('test error')
+        mock_geocode_cache.upsert.side_effect = Error('test error')
 
         mock_google_service.geocode.return_value = {
             "formatted_address": geocode_cache.formatted_address,
@@ -173,14 +187,70 @@ class TestDistanceSerializer:
         }
         
         assert distance_serializer.geocode(address) == geocode_cache
-        mock_geocode_cache.objects.filter.assert_called_once_with(input_address__iexact=address)
+        mock_geocode_cache.objects.filter.assert_called_once_with(normalized_address="123 main st")
         mock_google_service.geocode.assert_called_once_with(address)
-        mock_geocode_cache.objects.create.assert_called_once_with(
-            input_address=address,
-            formatted_address=geocode_cache.formatted_address,
-            latitude=geocode_cache.latitude,
-            longitude=geocode_cache.longitude
-        )
+        mock_geocode_cache.upsert.assert_called_once_with([{
+            "input_address": address,
+            "normalized_address": "123 main st",
+            "formatted_address": geocode_cache.formatted_address,
+            "latitude": geocode_cache.latitude,
+            "longitude": geocode_cache.longitude,
+            "google_place_id": "",
+            "expires_at": None
+        }])
+
+    def test_geocode_write_behind(self, mock_geocode_cache, distance_serializer, mock_google_service):
+        """
+        Scenario:
+            - geocode is called with an address that is not in the cache while GEOCODE_WRITE_BEHIND is enabled.
+        Expectation:
+            - The geocoded address is queued for the write-behind buffer instead of being written before returning.
+        """
+        address = "123 Main St"
+        set_cached_row(mock_geocode_cache, None)
+        mock_geocode_cache.default_expires_at.return_value = None
+        mock_google_service.geocode.return_value = {
+            "formatted_address": address,
+            "geometry": {"location": {"lat": 37.123456, "lng": -122.987654}}
+        }
+
+        with patch("api.settings.GEOCODE_WRITE_BEHIND", True), patch("geo.serializers.geocode_writes") as mock_writes:
+            geocoded_address = distance_serializer.geocode(address)
+
+        assert geocoded_address == GeocodeResult(address, "123 main st", address, 37.123456, -122.987654)
+        mock_writes.put.assert_called_once_with("123 main st", {
+            "input_address": address,
+            "normalized_address": "123 main st",
+            "formatted_address": address,
+            "latitude": 37.123456,
+            "longitude": -122.987654,
+            "google_place_id": "",
+            "expires_at": None
+        })
+        mock_geocode_cache.upsert.assert_not_called()
+
+    def test_geocode_write_behind_unlocked(self, mock_geocode_cache, distance_serializer, mock_google_service):
+        """
+        Scenario:
+            - geocode is called with an address that is not in the cache, with and without GEOCODE_WRITE_BEHIND.
+        Expectation:
+            - The advisory lock is only taken when the result is written before the lock is released.
+        """
+        set_cached_row(mock_geocode_cache, None)
+        mock_google_service.geocode.return_value = {
+            "formatted_address": "123 Main St",
+            "geometry": {"location": {"lat": 37.123456, "lng": -122.987654}}
+        }
+
+        with patch("geo.serializers.advisory_lock") as mock_lock, patch("geo.serializers.geocode_writes"):
+            mock_lock.return_value.__enter__.return_value = False
+            with patch("api.settings.GEOCODE_WRITE_BEHIND", True):
+                distance_serializer.geocode("123 Main St")
+            mock_lock.assert_not_called()
+
+            local_geocode_cache.clear()
+            distance_serializer.geocode("123 Main St")
+            mock_lock.assert_called_once_with("123 main st")
 
     def test_geocode_error(self, mock_geocode_cache, distance_serializer, mock_google_service):
         """
@@ -194,13 +264,360 @@ class TestDistanceSerializer:
         """
         address = "123 Main St"
 
-        mock_geocode_cache.objects.filter.return_value.first.return_value = None
+        set_cached_row(mock_geocode_cache, None)
         mock_google_service.geocode.return_value = None
 
         with pytest.raises(ValidationError) as error:
             distance_serializer.geocode(address)
         
         assert error.value.detail[0] == f"Could not geocode address: {address}"
-        mock_geocode_cache.objects.filter.assert_called_once_with(input_address__iexact=address)
+        mock_geocode_cache.objects.filter.assert_called_once_with(normalized_address="123 main st")
         mock_google_service.geocode.assert_called_once_with(address)
-        mock_geocode_cache.objects.create.assert_not_called()
+        mock_geocode_cache.upsert.assert_not_called()
+
+    def test_geocode_google_unavailable(self, mock_geocode_cache, distance_serializer, mock_google_service):
+        """
+        Scenario:
+            - geocode is called with an uncached address while Google is unavailable.
+        Expectation:
+            - GeocodeServiceUnavailable is raised with a 503 status.
+            - Cache population is not done
+        """
+        address = "123 Main St"
+
+        set_cached_row(mock_geocode_cache, None)
+        mock_google_service.geocode.side_effect = GoogleServiceUnavailable(address)
+
+        with pytest.raises(GeocodeServiceUnavailable) as error:
+            distance_serializer.geocode(address)
+
+        assert error.value.status_code == 503
+        assert error.value.detail[0] == f"Geocoding service unavailable for address: {address}"
+        mock_geocode_cache.upsert.assert_not_called()
+
+    @pytest.fixture
+    def stale_address(self, mock_geocode_cache):
+        stale_address = GeocodeResult(
+            "123 Main St", "123 main st", "123 Main St", 37.123456, -122.987654,
+            timezone.now() - timedelta(seconds=60)
+        )
+        set_cached_row(mock_geocode_cache, tuple(getattr(stale_address, field) for field in GeocodeResult.FIELDS))
+        return stale_address
+
+    @pytest.fixture
+    def refreshed_response(self):
+        return {
+            "formatted_address": "123 Main Street",
+            "geometry": {"location": {"lat": 37.2, "lng": -122.9}}
+        }
+
+    def test_geocode_stale_while_revalidate(
+        self, mock_geocode_cache, distance_serializer, mock_google_service, stale_address, refreshed_response
+    ):
+        """
+        Scenario:
+            - geocode is called with an address whose GeocodeCache entry has expired.
+        Expectation:
+            - The stale entry is returned right away and a refresh is scheduled in the background.
+            - The refresh updates the entry and its place, and the in-process cache.
+        """
+        mock_google_service.geocode.return_value = refreshed_response
+
+        with patch("geo.serializers.geocode_executor") as mock_executor:
+            assert distance_serializer.geocode("123 Main St") == stale_address
+            mock_google_service.geocode.assert_not_called()
+
+            # A second stale hit while the refresh is pending does not schedule another one
+            distance_serializer.geocode("123 main st.")
+            mock_executor.submit_detached.assert_called_once()
+
+        # Run on a thread of its own, as the refresh releases the database connection of its thread
+        refresh, *args = mock_executor.submit_detached.call_args.args
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(refresh, *args).result()
+
+        mock_google_service.geocode.assert_called_once_with("123 Main St")
+        normalized_address, geocoded_data = mock_geocode_cache.refresh.call_args.args
+        assert normalized_address == "123 main st"
+        assert geocoded_data["formatted_address"] == "123 Main Street"
+        assert geocoded_data["input_address"] == "123 Main St"
+        assert local_geocode_cache.get("123 main st") == ("123 Main Street", 37.2, -122.9)
+
+    def test_geocode_stale_revalidated_first(
+        self, mock_geocode_cache, distance_serializer, mock_google_service, stale_address, refreshed_response
+    ):
+        """
+        Scenario:
+            - geocode is called with a stale address while GEOCODE_STALE_WHILE_REVALIDATE is disabled.
+        Expectation:
+            - The entry is refreshed before returning.
+        """
+        mock_google_service.geocode.return_value = refreshed_response
+
+        with patch("api.settings.GEOCODE_STALE_WHILE_REVALIDATE", False):
+            geocoded_address = distance_serializer.geocode("123 Main St")
+
+        assert geocoded_address.formatted_address == "123 Main Street"
+        assert geocoded_address.normalized_address == "123 main st"
+        mock_google_service.geocode.assert_called_once_with("123 Main St")
+
+    def test_geocode_stale_if_unavailable(
+        self, mock_geocode_cache, distance_serializer, mock_google_service, stale_address
+    ):
+        """
+        Scenario:
+            - geocode is called with a stale address while GEOCODE_STALE_WHILE_REVALIDATE
+              is disabled and Google is unavailable.
+        Expectation:
+            - The stale entry is returned instead of an error.
+        """
+        mock_google_service.geocode.side_effect = GoogleServiceUnavailable("123 Main St")
+
+        with patch("api.settings.GEOCODE_STALE_WHILE_REVALIDATE", False):
+            assert distance_serializer.geocode("123 Main St") == stale_address
+
+        mock_geocode_cache.objects.filter.return_value.update.assert_not_called()
+
+    def test_geocode_stale_not_remembered(
+        self, mock_geocode_cache, distance_serializer, mock_google_service, stale_address
+    ):
+        """
+        Scenario:
+            - A stale address is served twice, while GEOCODE_STALE_WHILE_REVALIDATE is disabled
+              and Google is unavailable.
+        Expectation:
+            - The stale entry is kept out of the in-memory caches, so the second request
+              tries to refresh it again.
+        """
+        mock_google_service.geocode.side_effect = GoogleServiceUnavailable("123 Main St")
+
+        with patch("api.settings.GEOCODE_STALE_WHILE_REVALIDATE", False):
+            assert distance_serializer.geocode("123 Main St") == stale_address
+            assert local_geocode_cache.get("123 main st") is None
+            assert distance_serializer.geocode("123 Main St") == stale_address
+
+        assert mock_google_service.geocode.call_count == 2
+
+    def test_geocode_local_cache_hit(self, mock_geocode_cache, distance_serializer, mock_google_service):
+        """
+        Scenario:
+            - geocode is called twice with the same address, spelled differently.
+        Expectation:
+            - The first call reads the database cache.
+            - The second call is served from the in-process cache without touching the database or Google.
+        """
+        address = "123 Main St"
+        set_cached_row(mock_geocode_cache, (address, "123 main st", address, 37.123456, -122.987654, None))
+
+        distance_serializer.geocode(address)
+        geocoded_address = distance_serializer.geocode("123 MAIN ST.")
+
+        mock_geocode_cache.objects.filter.assert_called_once_with(normalized_address="123 main st")
+        assert geocoded_address == GeocodeResult("123 MAIN ST.", "123 main st", address, 37.123456, -122.987654)
+        mock_google_service.geocode.assert_not_called()
+
+    def test_geocode_shared_cache_hit(self, mock_geocode_cache, distance_serializer, mock_google_service):
+        """
+        Scenario:
+            - geocode is called with an address that another worker has put in the shared cache.
+        Expectation:
+            - The address is served from the shared cache without touching the database or Google.
+            - The in-process cache is populated.
+        """
+        shared_cache = SharedGeocodeCache("default", ttl=60, version=99)
+        shared_cache.set("123 main st", ("123 Main St", 37.123456, -122.987654))
+
+        with patch("geo.serializers.shared_geocode_cache", shared_cache):
+            geocoded_address = distance_serializer.geocode("123 Main St")
+
+        assert geocoded_address == GeocodeResult("123 Main St", "123 main st", "123 Main St", 37.123456, -122.987654)
+        mock_geocode_cache.objects.filter.assert_not_called()
+        mock_google_service.geocode.assert_not_called()
+        assert local_geocode_cache.get("123 main st") == ("123 Main St", 37.123456, -122.987654)
+        shared_cache.delete("123 main st")
+
+    def test_geocode_snapshot_hit(self, mock_geocode_cache, distance_serializer, mock_google_service, tmp_path):
+        """
+        Scenario:
+            - geocode is called with an address held by the memory-mapped snapshot.
+        Expectation:
+            - The address is served from the snapshot without querying the database or Google.
+        """
+        path = str(tmp_path / "geocode.snap")
+        write_snapshot(path, [("123 main st", "123 Main St", "123 Main St, City", 37.123456, -122.987654)])
+
+        with patch("geo.serializers.snapshot_geocode_cache", SnapshotLookup(path, check_interval=60)):
+            geocoded_address = distance_serializer.geocode("123 Main St.")
+
+        assert geocoded_address.formatted_address == "123 Main St, City"
+        assert (geocoded_address.latitude, geocoded_address.longitude) == (37.123456, -122.987654)
+        mock_geocode_cache.objects.filter.assert_not_called()
+        mock_google_service.geocode.assert_not_called()
+
+    def test_geocode_shared_cache_before_snapshot(self, mock_geocode_cache, distance_serializer, tmp_path):
+        """
+        Scenario:
+            - geocode is called with an address held by the snapshot, and refreshed since into the shared cache.
+        Expectation:
+            - The refreshed address is served from the shared cache.
+        """
+        path = str(tmp_path / "geocode.snap")
+        write_snapshot(path, [("123 main st", "123 Main St", "123 Main St, City", 37.123456, -122.987654)])
+        shared_cache = SharedGeocodeCache("default", ttl=60, version=99)
+        shared_cache.set("123 main st", ("123 Main Street, City", 37.2, -122.9))
+
+        with patch("geo.serializers.snapshot_geocode_cache", SnapshotLookup(path, check_interval=60)), \
+                patch("geo.serializers.shared_geocode_cache", shared_cache):
+            geocoded_address = distance_serializer.geocode("123 Main St")
+
+        assert geocoded_address.formatted_address == "123 Main Street, City"
+        shared_cache.delete("123 main st")
+
+    def test_geocode_concurrent_misses(self, mock_geocode_cache, distance_serializer, mock_google_service):
+        """
+        Scenario:
+            - geocode is called concurrently for the same uncached address.
+        Expectation:
+            - Google geocode api is called once.
+            - The cache is populated once.
+        """
+        set_cached_row(mock_geocode_cache, None)
+
+        release = threading.Event()
+
+        def geocode(address):
+            release.wait(5)
+            return {
+                "formatted_address": "123 Main St",
+                "geometry": {"location": {"lat": 37.123456, "lng": -122.987654}}
+            }
+
+        mock_google_service.geocode.side_effect = geocode
+        coalesced = geocode_flights.coalesced
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(distance_serializer.geocode, "123 Main St") for _ in range(5)]
+            while geocode_flights.coalesced < coalesced + 4:
+                pass
+            release.set()
+            results = [future.result() for future in futures]
+
+        assert {result.formatted_address for result in results} == {"123 Main St"}
+        mock_google_service.geocode.assert_called_once_with("123 Main St")
+        mock_geocode_cache.upsert.assert_called_once()
+
+    def test_create_geocodes_concurrently(self, distance_serializer):
+        """
+        Scenario:
+            - create is called with two addresses that both miss the cache.
+        Expectation:
+            - Both addresses are geocoded at the same time.
+            - The geocoded origin and destination are returned in order.
+        """
+        barrier = threading.Barrier(2, timeout=5)
+
+        def geocode(address):
+            barrier.wait()
+            return address.upper()
+
+        with patch.object(distance_serializer, "geocode", side_effect=geocode):
+            result = distance_serializer.create(
+                {"from_address": "123 Main St", "destination_address": "456 Elm St"}
+            )
+
+        assert result == ("123 MAIN ST", "456 ELM ST")
+
+    @pytest.mark.parametrize("failing_addresses, expected_error", [
+        ({"123 Main St"}, "Could not geocode address: 123 Main St"),
+        ({"456 Elm St"}, "Could not geocode address: 456 Elm St"),
+        ({"123 Main St", "456 Elm St"}, "Could not geocode address: 123 Main St"),
+    ])
+    def test_create_geocode_error(self, distance_serializer, failing_addresses, expected_error):
+        """
+        Scenario:
+            - create is called and geocoding fails for the origin, the destination or both.
+        Expectation:
+            - ValidationError is raised with the failing address, the origin taking precedence.
+        """
+        def geocode(address):
+            if address in failing_addresses:
+                raise ValidationError(f"Could not geocode address: {address}")
+            return address
+
+        with patch.object(distance_serializer, "geocode", side_effect=geocode):
+            with pytest.raises(ValidationError) as error:
+                distance_serializer.create(
+                    {"from_address": "123 Main St", "destination_address": "456 Elm St"}
+                )
+
+        assert error.value.detail[0] == expected_error
+
+    def test_create_same_address(self, distance_serializer):
+        """
+        Scenario:
+            - create is called with the same address as origin and destination.
+        Expectation:
+            - No worker thread is used.
+        """
+        with patch.object(distance_serializer, "geocode", side_effect=lambda address: address), \
+                patch("geo.serializers.geocode_executor") as mock_executor:
+            result = distance_serializer.create(
+                {"from_address": "123 Main St", "destination_address": "123 main st."}
+            )
+
+        assert result == ("123 Main St", "123 main st.")
+        mock_executor.submit.assert_not_called()
+
+    def test_geocode_many(self, mock_geocode_cache, distance_serializer, mock_google_service):
+        """
+        Scenario:
+            - geocode_many is called with an address in the in-process cache, one in the
+              GeocodeCache table, one that can be geocoded and one that cannot.
+        Expectation:
+            - The GeocodeCache table is queried once for the addresses missing from memory.
+            - Google is only called for the addresses missing from the GeocodeCache table.
+            - Geocoding errors are returned instead of raised.
+        """
+        local_geocode_cache.set("india gate", ("India Gate", 28.61, 77.22))
+        cached_row = ("123 Main St", "123 main st", "123 Main St", 37.123456, -122.987654, None)
+        mock_geocode_cache.objects.filter.side_effect = lambda **lookup: (
+            MagicMock(values_list=lambda *fields: [cached_row]) if "normalized_address__in" in lookup else MagicMock()
+        )
+        mock_google_service.geocode.side_effect = lambda address: {
+            "formatted_address": "456 Elm St",
+            "geometry": {"location": {"lat": 37.1, "lng": -122.1}}
+        } if address == "456 Elm St" else None
+
+        geocoded_addresses = distance_serializer.geocode_many({
+            "india gate": "India Gate",
+            "123 main st": "123 Main St",
+            "456 elm st": "456 Elm St",
+            "none": "none",
+        })
+
+        assert geocoded_addresses["india gate"] == GeocodeResult("India Gate", "india gate", "India Gate", 28.61, 77.22)
+        assert geocoded_addresses["123 main st"].formatted_address == "123 Main St"
+        assert geocoded_addresses["456 elm st"].formatted_address == "456 Elm St"
+        assert geocoded_addresses["none"].detail[0] == "Could not geocode address: none"
+
+        in_query = mock_geocode_cache.objects.filter.call_args_list[0]
+        assert sorted(in_query.kwargs["normalized_address__in"]) == ["123 main st", "456 elm st", "none"]
+        assert sorted(call.args[0] for call in mock_google_service.geocode.call_args_list) == ["456 Elm St", "none"]
+
+    def test_geocode_many_batch_pool(self, mock_geocode_cache, distance_serializer, mock_google_service):
+        """
+        Scenario:
+            - geocode_many is called with addresses missing from every cache.
+        Expectation:
+            - The addresses are geocoded on batch_geocode_executor, leaving geocode_executor to interactive requests.
+        """
+        mock_geocode_cache.objects.filter.return_value.values_list.return_value = []
+        mock_google_service.geocode.return_value = None
+
+        with ThreadPoolExecutor(max_workers=2) as executor, \
+                patch("geo.serializers.geocode_executor") as mock_executor, \
+                patch("geo.serializers.batch_geocode_executor", wraps=executor) as batch_executor:
+            distance_serializer.geocode_many({"456 elm st": "456 Elm St", "none": "none"})
+
+        mock_executor.submit.assert_not_called()
+        assert batch_executor.submit.call_count == 2
@@ -0,0 +1,170 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from geo.services.singleflight import (AsyncSingleFlight, SingleFlight,
+                                      advisory_lock, advisory_lock_id)
+
+
+class TestSingleFlight:
+
+    def test_concurrent_calls_coalesce(self):
+        """
+        Scenario:
+            - Several threads call do() with the same key while the first call is in flight.
+        Expectation:
+            - The function runs once and every caller receives its result.
+            - The followers are counted as coalesced.
+        """
+        single_flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "result"
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            leader = executor.submit(single_flight.do, "key", fn)
+            started.wait(5)
+            followers = [executor.submit(single_flight.do, "key", fn) for _ in range(4)]
+            while single_flight.coalesced < 4:
+                pass
+            release.set()
+            results = [leader.result()] + [future.result() for future in followers]
+
+        assert results == ["result"] * 5
+        assert len(calls) == 1
+        assert single_flight.in_flight() == 0
+
+    def test_error_is_shared(self):
+        """
+        Scenario:
+            - The in-flight call raises an exception.
+        Expectation:
+            - The exception is raised in the caller and the key is released.
+        """
+        single_flight = SingleFlight()
+
+        def fn():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            single_flight.do("key", fn)
+
+        assert single_flight.in_flight() == 0
+        assert single_flight.do("key", lambda: "retried") == "retried"
+
+    def test_different_keys(self):
+        """
+        Scenario:
+            - do() is called with different keys.
+        Expectation:
+            - Each key runs its own function.
+        """
+        single_flight = SingleFlight()
+
+        assert single_flight.do("a", lambda: 1) == 1
+        assert single_flight.do("b", lambda: 2) == 2
+
+
+class TestAdvisoryLock:
+
+    def test_lock_id(self):
+        """
+        Scenario:
+            - A lock id is derived from a key.
+        Expectation:
+            - The id is stable and fits in a signed 64 bit integer.
+        """
+        lock_id = advisory_lock_id("india gate")
+
+        assert lock_id == advisory_lock_id("india gate")
+        assert lock_id != advisory_lock_id("qutub minar")
+        assert -2**63 <= lock_id < 2**63
+
+    def test_disabled(self, settings):
+        """
+        Scenario:
+            - advisory_lock is used with GEOCODE_ADVISORY_LOCK disabled.
+        Expectation:
+            - No lock is taken.
+        """
+        settings.GEOCODE_ADVISORY_LOCK = False
+
+        with advisory_lock("india gate") as locked:
+            assert locked is False
+
+    def test_session_lock(self, settings):
+        """
+        Scenario:
+            - advisory_lock is used on Postgres.
+        Expectation:
+            - A session-level lock is taken on entering, and released on leaving.
+        """
+        settings.GEOCODE_ADVISORY_LOCK = True
+        lock_id = advisory_lock_id("india gate")
+
+        with patch("geo.services.singleflight.connections") as mock_connections:
+            connection = mock_connections.__getitem__.return_value
+            connection.vendor = "postgresql"
+            cursor = connection.cursor.return_value.__enter__.return_value
+
+            with advisory_lock("india gate") as locked:
+                assert locked is True
+                cursor.execute.assert_called_once_with("SELECT pg_advisory_lock(%s)", [lock_id])
+
+        cursor.execute.assert_called_with("SELECT pg_advisory_unlock(%s)", [lock_id])
+
+
+class TestAsyncSingleFlight:
+
+    def test_concurrent_calls_coalesce(self):
+        """
+        Scenario:
+            - Several coroutines call do() with the same key while the first call is in flight.
+        Expectation:
+            - The function is awaited once and every caller receives its result.
+        """
+        single_flight = AsyncSingleFlight()
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        async def run():
+            return await asyncio.gather(*(single_flight.do("key", fn) for _ in range(5)))
+
+        assert asyncio.run(run()) == ["result"] * 5
+        assert len(calls) == 1
+        assert single_flight.coalesced == 4
+        assert single_flight.in_flight() == 0
+
+    def test_error_is_shared(self):
+        """
+        Scenario:
+            - The in-flight call raises an exception.
+        Expectation:
+            - Every caller receives the exception and the key is released.
+        """
+        single_flight = AsyncSingleFlight()
+
+        async def fn():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def run():
+            return await asyncio.gather(*(single_flight.do("key", fn) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert single_flight.in_flight() == 0
@@ -0,0 +1,176 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from geo.services.snapshot import (SnapshotLookup, SnapshotReader,
+                                   write_snapshot)
+
+ENTRIES = [
+    ("qutub minar", "Qutub Minar", "Qutub Minar, Mehrauli, New Delhi", 28.5244754, 77.1855206),
+    ("india gate", "india gate", "India Gate, New Delhi", 28.612912, 77.2295097),
+    ("taj mahal agra", "Taj Mahal, Agra", "Taj Mahal, Agra, Uttar Pradesh", 27.1751448, 78.0421422),
+]
+
+
+class TestSnapshot:
+
+    def test_round_trip(self, tmp_path):
+        """
+        Scenario:
+            - Entries are written to a snapshot and read back.
+        Expectation:
+            - Every entry is found by its normalized address with its exact coordinates.
+            - Unknown addresses are not found.
+            - Iterating yields every entry.
+        """
+        path = str(tmp_path / "geocode.snap")
+
+        assert write_snapshot(path, iter(ENTRIES)) == 3
+
+        snapshot = SnapshotReader(path)
+        assert len(snapshot) == 3
+        for normalized_address, _, formatted_address, latitude, longitude in ENTRIES:
+            assert snapshot.get(normalized_address) == (formatted_address, latitude, longitude)
+        assert snapshot.get("red fort") is None
+        assert sorted(snapshot) == sorted(ENTRIES)
+        snapshot.close()
+
+    def test_float32(self, tmp_path):
+        """
+        Scenario:
+            - A snapshot is written with float32 coordinates.
+        Expectation:
+            - Coordinates are read back within float32 precision.
+        """
+        path = str(tmp_path / "geocode.snap")
+        write_snapshot(path, ENTRIES, dtype=np.float32)
+
+        snapshot = SnapshotReader(path)
+        formatted_address, latitude, longitude = snapshot.get("india gate")
+
+        assert formatted_address == "India Gate, New Delhi"
+        assert latitude == pytest.approx(28.612912, abs=1e-5)
+        assert longitude == pytest.approx(77.2295097, abs=1e-5)
+        snapshot.close()
+
+    def test_hash_collision(self, tmp_path):
+        """
+        Scenario:
+            - Every address hashes to the same key.
+        Expectation:
+            - Lookups still return the entry of the requested address.
+        """
+        path = str(tmp_path / "geocode.snap")
+
+        with patch("geo.services.snapshot.snapshot_key", return_value=42):
+            write_snapshot(path, ENTRIES)
+            snapshot = SnapshotReader(path)
+
+            assert snapshot.get("taj mahal agra")[0] == "Taj Mahal, Agra, Uttar Pradesh"
+            assert snapshot.get("india gate")[0] == "India Gate, New Delhi"
+            assert snapshot.get("red fort") is None
+        snapshot.close()
+
+    def test_empty(self, tmp_path):
+        """
+        Scenario:
+            - A snapshot is written with no entries.
+        Expectation:
+            - It can be read and finds nothing.
+        """
+        path = str(tmp_path / "geocode.snap")
+        write_snapshot(path, [])
+
+        snapshot = SnapshotReader(path)
+        assert len(snapshot) == 0
+        assert snapshot.get("india gate") is None
+        snapshot.close()
+
+    @pytest.mark.parametrize("content", [b"", b"not a snapshot at all, just text"])
+    def test_invalid_file(self, tmp_path, content):
+        """
+        Scenario:
+            - A file that is not a snapshot is opened.
+        Expectation:
+            - ValueError is raised.
+        """
+        path = tmp_path / "geocode.snap"
+        path.write_bytes(content)
+
+        with pytest.raises(ValueError):
+            SnapshotReader(str(path))
+
+
+class TestSnapshotLookup:
+
+    def test_disabled(self):
+        """
+        Scenario:
+            - A SnapshotLookup is created without a path.
+        Expectation:
+            - Every lookup misses without touching the filesystem.
+        """
+        snapshot_lookup = SnapshotLookup(None, check_interval=0)
+
+        assert snapshot_lookup.enabled is False
+        assert snapshot_lookup.get("india gate") is None
+
+    def test_missing_file(self, tmp_path):
+        """
+        Scenario:
+            - The snapshot file does not exist yet.
+        Expectation:
+            - Lookups miss until a snapshot is published, which is then picked up.
+        """
+        path = str(tmp_path / "geocode.snap")
+        snapshot_lookup = SnapshotLookup(path, check_interval=0)
+
+        assert snapshot_lookup.get("india gate") is None
+
+        write_snapshot(path, ENTRIES)
+
+        assert snapshot_lookup.get("india gate") == ("India Gate, New Delhi", 28.612912, 77.2295097)
+        assert snapshot_lookup.stats() == {"size": 3, "hits": 1, "misses": 1, "reloads": 1}
+
+    def test_reload_on_publish(self, tmp_path):
+        """
+        Scenario:
+            - A new snapshot is published over the mapped one.
+        Expectation:
+            - The new snapshot is not checked for before the check interval has passed.
+            - After that, the new snapshot is swapped in while the old reader stays usable.
+        """
+        path = str(tmp_path / "geocode.snap")
+        write_snapshot(path, ENTRIES[:1])
+        snapshot_lookup = SnapshotLookup(path, check_interval=60)
+
+        assert snapshot_lookup.get("qutub minar") is not None
+        old_reader = snapshot_lookup.reader()
+
+        write_snapshot(path, ENTRIES[1:])
+        assert snapshot_lookup.get("india gate") is None
+
+        snapshot_lookup.check_interval = 0
+        assert snapshot_lookup.get("india gate") == ("India Gate, New Delhi", 28.612912, 77.2295097)
+        assert snapshot_lookup.get("qutub minar") is None
+        assert snapshot_lookup.reloads == 2
+        assert old_reader.get("qutub minar") is not None
+
+    def test_invalid_publish(self, tmp_path):
+        """
+        Scenario:
+            - An invalid file replaces the mapped snapshot.
+        Expectation:
+            - The mapped snapshot keeps being served.
+        """
+        path = tmp_path / "geocode.snap"
+        write_snapshot(str(path), ENTRIES)
+        snapshot_lookup = SnapshotLookup(str(path), check_interval=0)
+        assert snapshot_lookup.get("india gate") is not None
+
+        path.unlink()
+        path.write_bytes(b"garbage")
+
+        assert snapshot_lookup.get("india gate") is not None
+        assert snapshot_lookup.reloads == 1
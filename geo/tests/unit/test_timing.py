@@ -0,0 +1,119 @@
+import asyncio
+
+from geo.services.timing import (ContextThreadPoolExecutor, StageTimer,
+                                 current_timer, stage, start_timer,
+                                 stop_timer, timed)
+
+
+class TestStageTimer:
+
+    def test_record(self):
+        """
+        Scenario:
+            - A stage is recorded twice and another once.
+        Expectation:
+            - The durations of a stage add up, and are counted.
+            - The Server-Timing header lists the stages in the order they were first recorded.
+        """
+        timer = StageTimer()
+        timer.record("cache_read", 0.001)
+        timer.record("google", 0.0852)
+        timer.record("cache_read", 0.002)
+
+        assert timer.timings() == {
+            "cache_read": {"duration_ms": 3.0, "count": 2},
+            "google": {"duration_ms": 85.2, "count": 1},
+        }
+        assert timer.server_timing() == "cache_read;dur=3.0, google;dur=85.2"
+
+
+class TestStage:
+
+    def test_untimed(self):
+        """
+        Scenario:
+            - Stages run without a running timer.
+        Expectation:
+            - Nothing is recorded and decorated functions return as usual.
+        """
+        @timed("double")
+        def double(value):
+            return value * 2
+
+        assert current_timer() is None
+        with stage("cache_read"):
+            pass
+        assert double(2) == 4
+
+    def test_timed(self):
+        """
+        Scenario:
+            - A block, a function and a coroutine function are timed while a timer runs.
+        Expectation:
+            - Every stage is recorded on the timer, which is no longer running once stopped.
+        """
+        @timed("double")
+        def double(value):
+            return value * 2
+
+        @timed("adouble")
+        async def adouble(value):
+            return value * 2
+
+        timer, token = start_timer()
+        try:
+            with stage("cache_read"):
+                pass
+            assert double(2) == 4
+            assert asyncio.run(adouble(2)) == 4
+        finally:
+            stop_timer(token)
+
+        assert current_timer() is None
+        assert {name: timing["count"] for name, timing in timer.timings().items()} == {
+            "cache_read": 1, "double": 1, "adouble": 1
+        }
+
+    def test_executor_propagates_timer(self):
+        """
+        Scenario:
+            - Timed functions are submitted to a ContextThreadPoolExecutor while a timer runs.
+        Expectation:
+            - The stages run on the worker threads are recorded on the timer of the submitter.
+        """
+        @timed("double")
+        def double(value):
+            return value * 2
+
+        with ContextThreadPoolExecutor(max_workers=2) as executor:
+            timer, token = start_timer()
+            try:
+                assert [executor.submit(double, value).result() for value in range(3)] == [0, 2, 4]
+                assert list(executor.map(double, range(3))) == [0, 2, 4]
+            finally:
+                stop_timer(token)
+
+            assert executor.submit(current_timer).result() is None
+
+        assert timer.timings()["double"]["count"] == 6
+
+    def test_executor_detached(self):
+        """
+        Scenario:
+            - A background task is submitted with submit_detached while a timer runs.
+        Expectation:
+            - The task runs without a timer, so its stages are not recorded on the timer of the submitter.
+        """
+        @timed("double")
+        def double(value):
+            return value * 2
+
+        with ContextThreadPoolExecutor(max_workers=1) as executor:
+            timer, token = start_timer()
+            try:
+                assert executor.submit_detached(current_timer).result() is None
+                assert executor.submit_detached(double, 2).result() == 4
+            finally:
+                stop_timer(token)
+
+        assert timer.timings() == {}
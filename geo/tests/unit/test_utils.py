@@ -1,6 +1,11 @@
+import math
+
+import numpy as np
 import pytest
 
-from geo.services.utils import haversine_distance
+from geo.services.utils import (haversine_distance, haversine_distances,
+                               haversine_matrix, normalize_address,
+                               parse_reverse_geocode_key, reverse_geocode_key)
 
 
 def test_haversine_distance():
@@ -42,3 +47,108 @@ def test_haversine_distance():
     assert haversine_distance(None, None, -33.8651, 151.2099) == None
     assert haversine_distance(None, None, None, 151.2099) == None
     assert haversine_distance(None, None, None, None) == None
+
+
+def test_normalize_address():
+    """
+        Covers all test cases for the normalize_address function.
+    """
+    # Test case 1: Case is folded
+    assert normalize_address("India Gate") == "india gate"
+
+    # Test case 2: Whitespace is collapsed and stripped
+    assert normalize_address("  india   gate\t") == "india gate"
+
+    # Test case 3: Punctuation is treated as whitespace
+    assert normalize_address("India-Gate.") == "india gate"
+    assert normalize_address("Qutub Minar, Delhi") == "qutub minar delhi"
+    assert normalize_address("123 Main St.") == normalize_address("123 main st")
+
+    # Test case 4: Unicode compatibility forms are folded
+    assert normalize_address("STRASSE") == normalize_address("straße")
+
+    # Test case 5: for None value
+    assert normalize_address(None) == None
+
+
+def test_haversine_matrix():
+    """
+        Covers all test cases for the haversine_matrix function.
+    """
+    origins = [(40.7128, -74.0060), (51.5074, -0.1278), (-33.8651, 151.2099)]
+    destinations = [(34.0522, -118.2437), (48.8566, 2.3522)]
+
+    matrix = haversine_matrix(
+        [lat for lat, _ in origins], [lon for _, lon in origins],
+        [lat for lat, _ in destinations], [lon for _, lon in destinations],
+    )
+
+    # Test case 1: One row per origin and one column per destination
+    assert matrix.shape == (3, 2)
+
+    # Test case 2: Every cell matches the scalar haversine_distance
+    for i, (lat1, lon1) in enumerate(origins):
+        for j, (lat2, lon2) in enumerate(destinations):
+            assert pytest.approx(matrix[i, j], abs=1e-9) == haversine_distance(lat1, lon1, lat2, lon2)
+
+    # Test case 3: NaN coordinates give NaN distances for that origin only
+    matrix = haversine_matrix([math.nan, 40.7128], [0, -74.0060], [34.0522], [-118.2437])
+    assert math.isnan(matrix[0, 0])
+    assert pytest.approx(matrix[1, 0], 0.1) == 3939.2
+
+
+def test_haversine_distances():
+    """
+        Covers all test cases for the haversine_distances function.
+    """
+    pairs = [
+        (40.7128, -74.0060, 34.0522, -118.2437),
+        (51.5074, -0.1278, 48.8566, 2.3522),
+        (-33.8651, 151.2099, 35.6895, 139.6917),
+        (90, 0, -90, 0),
+        (40.7128, -74.0060, 40.7128, -74.0060),
+    ]
+
+    distances = haversine_distances(*zip(*pairs))
+
+    # Test case 1: One distance per pair, matching the scalar haversine_distance
+    assert distances.shape == (5,)
+    assert distances.dtype == np.float64
+    for distance, pair in zip(distances, pairs):
+        assert pytest.approx(distance, abs=1e-9) == haversine_distance(*pair)
+
+    # Test case 2: float32 results
+    distances = haversine_distances(*zip(*pairs), dtype=np.float32)
+    assert distances.dtype == np.float32
+    assert pytest.approx(distances[0], 0.1) == 3939.2
+
+    # Test case 3: One point against many points
+    distances = haversine_distances(40.7128, -74.0060, [34.0522, 51.5074], [-118.2437, -0.1278])
+    assert pytest.approx(distances.tolist(), 0.1) == [3939.2, 5573.9]
+
+    # Test case 4: None and NaN values are masked as NaN
+    distances = haversine_distances([None, 40.7128, math.nan], [0, -74.0060, 0], [0, 34.0522, 0], [0, -118.2437, 0])
+    assert math.isnan(distances[0])
+    assert pytest.approx(distances[1], 0.1) == 3939.2
+    assert math.isnan(distances[2])
+
+
+def test_reverse_geocode_key():
+    """
+        Covers all test cases for the reverse_geocode_key and parse_reverse_geocode_key functions.
+    """
+    # Test case 1: Locations of the same grid cell share a key
+    key = reverse_geocode_key(28.61291, 77.22951, 0.0001)
+    assert key == "latlng:28.6129000,77.2295000"
+    assert reverse_geocode_key(28.61289, 77.22949, 0.0001) == key
+    assert reverse_geocode_key(28.61296, 77.22951, 0.0001) != key
+
+    # Test case 2: The cell around the equator and meridian has a single key
+    assert reverse_geocode_key(-0.00001, -0.00001, 0.0001) == reverse_geocode_key(0.00001, 0.00001, 0.0001)
+
+    # Test case 3: The key is parsed back into the location of the cell
+    assert parse_reverse_geocode_key(key) == (28.6129, 77.2295)
+    assert parse_reverse_geocode_key("india gate") is None
+
+    # Test case 4: Keys never collide with normalized addresses
+    assert normalize_address(key) != key
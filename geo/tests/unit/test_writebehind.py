@@ -0,0 +1,76 @@
+import threading
+from unittest.mock import patch
+
+from geo.services.writebehind import WriteBehindBuffer
+
+
+class TestWriteBehindBuffer:
+
+    def test_flush_on_batch_size(self):
+        """
+        Scenario:
+            - Writes are queued until the batch size is reached, one of them twice.
+        Expectation:
+            - The writes are handed to the writer in one batch from a background thread.
+            - A write replaces the pending write with the same key.
+        """
+        batches = []
+        written = threading.Event()
+
+        def write(batch):
+            batches.append((threading.current_thread().name, batch))
+            written.set()
+
+        with patch("geo.services.writebehind.atexit"):
+            buffer = WriteBehindBuffer(write, batch_size=2, flush_interval=60, max_size=10)
+            assert buffer.put("india gate", 1)
+            assert buffer.put("india gate", 2)
+            assert buffer.put("qutub minar", 3)
+
+            assert written.wait(5)
+            buffer.close()
+
+        assert batches == [("write-behind", [2, 3])]
+        assert buffer.stats() == {
+            "depth": 0, "max_depth": 2, "written": 2, "failed": 0, "rejected": 0, "batches": 1
+        }
+
+    def test_flush_on_close(self):
+        """
+        Scenario:
+            - A write is queued below the batch size and the buffer is closed before the interval passes.
+        Expectation:
+            - The write is flushed by close.
+            - Writes queued after close are refused, so the caller writes them itself.
+        """
+        batches = []
+
+        with patch("geo.services.writebehind.atexit") as mock_atexit:
+            buffer = WriteBehindBuffer(batches.append, batch_size=100, flush_interval=60, max_size=10)
+            buffer.put("india gate", 1)
+            buffer.close(timeout=5)
+
+        mock_atexit.register.assert_called_once_with(buffer.close)
+        assert batches == [[1]]
+        assert buffer.put("qutub minar", 2) is False
+
+    def test_full(self):
+        """
+        Scenario:
+            - More writes are queued than the buffer holds, and the writer fails.
+        Expectation:
+            - Writes beyond max_size are refused, but a pending key can still be replaced.
+            - The failed writes are counted and dropped.
+        """
+        def write(batch):
+            raise ValueError("database is down")
+
+        with patch("geo.services.writebehind.atexit"):
+            buffer = WriteBehindBuffer(write, batch_size=100, flush_interval=60, max_size=1)
+            assert buffer.put("india gate", 1)
+            assert buffer.put("qutub minar", 2) is False
+            assert buffer.put("india gate", 3)
+            buffer.close(timeout=5)
+
+        stats = buffer.stats()
+        assert (stats["depth"], stats["written"], stats["failed"], stats["rejected"]) == (0, 0, 1, 1)
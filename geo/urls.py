@@ -4,4 +4,9 @@ from geo import views
 
 urlpatterns = [
     path("distance", views.distance, name="distance"),
+    path("distance/async", views.distance_async, name="distance-async"),
+    path("distance/batch", views.distance_batch, name="distance-batch"),
+    path("distance/matrix", views.distance_matrix, name="distance-matrix"),
+    path("nearby", views.nearby, name="nearby"),
+    path("geocode/reverse", views.reverse_geocode, name="reverse-geocode"),
 ]
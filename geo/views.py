@@ -1,7 +1,23 @@
-from rest_framework.decorators import api_view
+import json
+import math
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (HttpResponseNotAllowed, JsonResponse,
+                         StreamingHttpResponse)
+from rest_framework.decorators import api_view, renderer_classes
+from rest_framework.exceptions import APIException
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from api import settings
+from geo.renderers import BinaryMatrixRenderer
+from geo.serializers import (BatchDistanceSerializer, DistanceSerializer,
+                             MatrixDistanceSerializer, NearbySerializer,
+                             ReverseGeocodeSerializer)
+from geo.services.google import AsyncGoogleService
 
-from geo.serializers import DistanceSerializer
+# Number of matrix rows rendered per streamed chunk
+MATRIX_CHUNK_ROWS = 64
 
 
 @api_view(['POST'])
@@ -29,3 +45,197 @@ def distance(request):
     response = distance_serializer.calculate_distance()
 
     return Response(response)
+
+
+async def distance_async(request):
+    """
+    Calculate the distance between two addresses and return the response, without
+    tying up a thread while waiting on the database or Google.
+
+    Takes the same request body and returns the same responses as the distance view.
+    Like the DRF views, it is exempt from CSRF checks. Only served by an ASGI server do
+    requests share pooled Google connections; under WSGI every request runs on an event
+    loop of its own, whose connections are closed when it is done.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        JsonResponse: The HTTP response object containing the calculated distance and address details.
+
+    Raises:
+        None
+
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"detail": "JSON parse error"}, status=400)
+
+    distance_serializer = DistanceSerializer(data=data)
+
+    if not distance_serializer.is_valid():
+        return JsonResponse(distance_serializer.errors, status=400)
+
+    try:
+        response = await distance_serializer.acalculate_distance()
+    except APIException as e:
+        return JsonResponse(e.detail, status=e.status_code, safe=False)
+    finally:
+        if not isinstance(request, ASGIRequest):
+            await AsyncGoogleService(settings.GOOGLE_MAPS_API_KEY).aclose()
+
+    return JsonResponse(response)
+
+
+# What csrf_exempt sets; its wrapper would turn the view into a sync one on Django 4.2
+distance_async.csrf_exempt = True
+
+
+@api_view(['POST'])
+def distance_batch(request):
+    """
+    Calculate the distance between many pairs of addresses and return the response.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response object containing the per-pair results in input order.
+
+    Raises:
+        None
+
+    """
+
+    batch_distance_serializer = BatchDistanceSerializer(data=request.data)
+
+    if not batch_distance_serializer.is_valid():
+        return Response(batch_distance_serializer.errors, status=400)
+
+    response = batch_distance_serializer.calculate_distances()
+
+    return Response(response)
+
+
+def stream_matrix_json(geocoded_origins, geocoded_destinations, matrix):
+    """
+    Streams the distance matrix as a JSON document, a chunk of rows at a time.
+    NaN distances are rendered as null.
+    """
+    yield '{"origins": %s, "destinations": %s, "distances": [' % (
+        json.dumps(geocoded_origins), json.dumps(geocoded_destinations)
+    )
+    for start in range(0, len(matrix), MATRIX_CHUNK_ROWS):
+        rows = [
+            json.dumps([None if math.isnan(distance) else distance for distance in row])
+            for row in matrix[start:start + MATRIX_CHUNK_ROWS].tolist()
+        ]
+        yield ("," if start else "") + ",".join(rows)
+    yield "]}"
+
+
+def stream_matrix_binary(matrix):
+    """
+    Streams the distance matrix as little-endian float32 values in row-major order.
+    """
+    matrix = matrix.astype("<f4")
+    for start in range(0, len(matrix), MATRIX_CHUNK_ROWS):
+        yield matrix[start:start + MATRIX_CHUNK_ROWS].tobytes()
+
+
+@api_view(['POST'])
+@renderer_classes([*api_settings.DEFAULT_RENDERER_CLASSES, BinaryMatrixRenderer])
+def distance_matrix(request):
+    """
+    Calculate the distance between every origin and every destination and stream the response.
+
+    The response is JSON by default. Requests accepting application/octet-stream (or using
+    ?format=bin) get the matrix as raw little-endian float32 values in row-major order, with its
+    shape in the X-Matrix-Shape header. Distances involving an address that could not be
+    geocoded are null (JSON) or NaN (binary).
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        StreamingHttpResponse: The streamed distance matrix.
+
+    Raises:
+        None
+
+    """
+
+    matrix_distance_serializer = MatrixDistanceSerializer(data=request.data)
+
+    if not matrix_distance_serializer.is_valid():
+        return Response(matrix_distance_serializer.errors, status=400)
+
+    geocoded_origins, geocoded_destinations, matrix = matrix_distance_serializer.calculate_matrix()
+
+    if request.accepted_renderer.format == BinaryMatrixRenderer.format:
+        response = StreamingHttpResponse(
+            stream_matrix_binary(matrix), content_type=BinaryMatrixRenderer.media_type
+        )
+        response["X-Matrix-Shape"] = ",".join(str(size) for size in matrix.shape)
+        response["X-Matrix-Dtype"] = "float32"
+        return response
+
+    return StreamingHttpResponse(
+        stream_matrix_json(geocoded_origins, geocoded_destinations, matrix), content_type="application/json"
+    )
+
+
+@api_view(['POST'])
+def nearby(request):
+    """
+    Find the cached places within a radius of, or nearest to, an address or a location and return the response.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response object containing the origin and the places found, nearest first.
+
+    Raises:
+        None
+
+    """
+
+    nearby_serializer = NearbySerializer(data=request.data)
+
+    if not nearby_serializer.is_valid():
+        return Response(nearby_serializer.errors, status=400)
+
+    response = nearby_serializer.find_nearby()
+
+    return Response(response)
+
+
+@api_view(['POST'])
+def reverse_geocode(request):
+    """
+    Find the address of a location and return the response.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response object containing the location and its address.
+
+    Raises:
+        None
+
+    """
+
+    reverse_geocode_serializer = ReverseGeocodeSerializer(data=request.data)
+
+    if not reverse_geocode_serializer.is_valid():
+        return Response(reverse_geocode_serializer.errors, status=400)
+
+    response = reverse_geocode_serializer.reverse_geocode()
+
+    return Response(response)
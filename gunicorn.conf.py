@@ -0,0 +1,42 @@
+"""
+Gunicorn configuration for running the API in production.
+
+    gunicorn -c gunicorn.conf.py api.wsgi:application
+
+Every setting can be overridden from the environment. The default gthread workers serve
+requests from a pool of threads per process, each keeping its own persistent database
+connection (see CONN_MAX_AGE). To serve the API over ASGI instead, run
+
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py api.asgi:application
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Worker processes, and threads per worker process. Every worker keeps up to
+# GUNICORN_THREADS + GEOCODE_THREAD_POOL_SIZE + GEOCODE_BATCH_THREAD_POOL_SIZE + 1
+# database connections open, so the
+# default number of workers is capped to stay well within Postgres' max_connections
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 4)))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+
+# Seconds a request may take, and seconds a worker gets on shutdown, or when it is recycled,
+# to finish its requests and flush what it buffered in memory (hit counts, write-behind
+# cache entries) at exit
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+# Restart workers after a number of requests, spread out so they do not all restart at once
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 1000))
+
+# The app creates thread pools and HTTP connection pools at import time, which must not be
+# shared across a fork, so every worker loads the app itself
+preload_app = False
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"